@@ -0,0 +1,56 @@
+"""
+Compares the cost of reading a property of a loaded resource with a plain dict lookup::
+
+    python benchmarks/attribute_access.py
+
+On CPython 3.11, ``user.name`` takes about 55ns and a dict lookup about 13ns: the remaining cost is the call of the
+Python-level accessor of :class:`potion_client.resource.ResourceProperty`.
+"""
+from functools import partial
+from operator import getitem
+import collections
+import timeit
+
+from potion_client import Client
+
+NUMBER = 1000000
+
+
+def main():
+    client = Client('http://example.com', fetch_schema=False)
+    User = client.resource_factory('user', {
+        "type": "object",
+        "properties": {
+            "$uri": {"type": "string", "readOnly": True},
+            "name": {"type": "string"}
+        },
+        "links": [
+            {"rel": "self", "href": "/user/{id}", "method": "GET"}
+        ]
+    })
+
+    # the accessor used before ResourceProperty, for comparison
+    OldUser = type('OldUser', (User,), {
+        'name': property(fget=partial((lambda name, obj: getitem(obj, name)), 'name'))
+    })
+
+    user = User(1, name='foo')
+    old_user = OldUser._new('/user/2', {'name': 'foo'})
+    properties = dict(user._properties)
+
+    globals().update(user=user, old_user=old_user, properties=properties)
+    statements = collections.OrderedDict([
+        ('dict lookup', "properties['name']"),
+        ('user.name', "user.name"),
+        ("user['name']", "user['name']"),
+        ('user.name (property + partial)', "old_user.name"),
+    ])
+
+    for label, statement in statements.items():
+        timer = timeit.Timer(statement, setup='from __main__ import user, old_user, properties')
+        seconds = min(timer.repeat(5, NUMBER))
+        print('{:<32} {:8.1f} ns'.format(label, seconds / NUMBER * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures the time to decode a page of wide items, and to then read one of their properties::
+
+    python benchmarks/decode.py
+"""
+import json
+import timeit
+
+from potion_client import Client, PotionJSONDecoder
+
+NUMBER = 20
+FIELDS = 40
+ITEMS = 500
+
+
+def main():
+    schema = {
+        "type": "object",
+        "properties": {"$uri": {"type": "string", "readOnly": True}},
+        "links": [
+            {"rel": "self", "href": "/item/{id}", "method": "GET"}
+        ]
+    }
+    item = {}
+    for i in range(FIELDS):
+        if i % 10 == 0:
+            schema['properties']['date_{}'.format(i)] = {"type": "object", "properties": {"$date": {"type": "integer"}}}
+            item['date_{}'.format(i)] = {"$date": 1451606400000 + i}
+        elif i % 10 == 1:
+            schema['properties']['ref_{}'.format(i)] = {"type": "object", "properties": {"$ref": {"type": "string"}}}
+            item['ref_{}'.format(i)] = {"$ref": "/item/{}".format(i)}
+        else:
+            schema['properties']['value_{}'.format(i)] = {"type": "integer"}
+            item['value_{}'.format(i)] = i
+
+    page = json.dumps([dict(item, **{"$uri": "/item/{}".format(1000 + n)}) for n in range(ITEMS)])
+
+    for lazy in (False, True):
+        client = Client('http://example.com', fetch_schema=False, lazy_decode=lazy)
+        client.resource_factory('item', schema)
+
+        def decode():
+            items = json.loads(page, cls=PotionJSONDecoder, client=client)
+            for item in items:
+                item.date_0
+
+        seconds = min(timeit.Timer(decode).repeat(5, NUMBER)) / NUMBER
+        print('{:<24} {:8.2f} ms per page of {} items'.format('lazy' if lazy else 'eager', seconds * 1000, ITEMS))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from operator import getitem, delitem, setitem
 from six.moves.urllib.parse import urlparse, urljoin
 from weakref import WeakValueDictionary
 import collections
-import requests
+import os
+import threading
+import uuid
 
-from potion_client.converter import PotionJSONDecoder, PotionJSONSchemaDecoder
-from potion_client.resource import Reference, Resource, uri_for
+import six
+
+from potion_client.converter import PotionJSONDecoder, PotionJSONSchemaDecoder, JSONSchemaReference, ijson
+from potion_client.http2 import HTTP2Session, CLIENT_OPTIONS as HTTP2_CLIENT_OPTIONS
+from potion_client.resource import Reference, Resource, ResourceProperty, uri_for
 from potion_client.links import Link
-from potion_client.utils import upper_camel_case, snake_case
+from potion_client.profiler import Profiler, phase
+from potion_client.ratelimit import RateLimiter
+from potion_client.transport import RequestsTransport
+from potion_client.utils import upper_camel_case, snake_case, SingleFlight
 
 
 class Client(object):
-    # TODO optional HTTP/2 support: this makes multiple queries simultaneously.
+    """
+    A client for a Flask-Potion API. A client may be shared between threads; concurrent fetches of the same URI are
+    merged into a single request.
+
+    :param str api_root_url: the URL of the API, such as ``'http://localhost/api'``
+    :param str schema_path: the path of the root schema below ``api_root_url``
+    :param bool fetch_schema: if false, resource classes are only created through :meth:`resource_factory`
+    :param bool adaptive_pagination: if true, a :class:`PaginatedList` adjusts its page size to the response times
+    :param http2: ``True`` or a dict of options for :class:`httpx.Client` to send requests over HTTP/2 with a
+        :class:`potion_client.http2.HTTP2Session`, which also receives the ``verify``, ``cert``, ``timeout`` and
+        ``trust_env`` session options. Requires ``httpx``.
+    :param transport: a :class:`potion_client.transport.Transport`, by default a
+        :class:`potion_client.transport.RequestsTransport`
+    :param int compress_threshold: the size in bytes from which request bodies are compressed with gzip
+    :param int stream_threshold: the number of items from which lists are streamed with chunked encoding
+    :param bool stream_pages: if true, the items of a page are decoded while it is downloaded. Requires ``ijson``.
+    :param bool lazy_decode: if true, objects and arrays in properties are decoded the first time they are read
+    :param registry: a :class:`potion_client.registry.SchemaRegistry` to share resource classes with other clients
+    :param str schema_version: the version of the schema in the ``registry``, which is then not fetched again
+    :param rate_limit: a :class:`potion_client.ratelimit.RateLimiter` or a number of requests per second
+    :param hedging: a :class:`potion_client.hedging.HedgingPolicy` for slow GET requests
+    :param cache: a :class:`potion_client.cache.LinkCache` for the results of GET requests through links
+    :param page_store: a callable such as :class:`potion_client.pagestore.SQLitePageStore` that returns the store
+        for the pages of each :class:`PaginatedList`
+    :param session_kwargs: attributes to set on the :class:`requests.Session` of the default transport, such as
+        ``auth``
+    """
 
-    def __init__(self, api_root_url, schema_path='/schema', fetch_schema=True, **session_kwargs):
+    def __init__(self, api_root_url, schema_path='/schema', fetch_schema=True, adaptive_pagination=False, http2=False,
+                 transport=None, compress_threshold=None, stream_threshold=None, stream_pages=False, lazy_decode=False,
+                 registry=None, schema_version=None, rate_limit=None, hedging=None,
+                 cache=None, page_store=None, **session_kwargs):
         self._instances = WeakValueDictionary()
         self._resources = {}
+        self._adaptive_pagination = adaptive_pagination
+        self._compress_threshold = compress_threshold
+        self._stream_threshold = stream_threshold
+        self._stream_pages = stream_pages
+        self._lazy_decode = lazy_decode
+        self._registry = registry
+        self._schema_version = schema_version
+        if rate_limit is not None and not isinstance(rate_limit, RateLimiter):
+            rate_limit = RateLimiter(rate_limit)
+        self._rate_limiter = rate_limit
+        self._hedging = hedging
+        self._cache = cache
+        self._page_store = page_store
+        self._profiler = None
+
+        if stream_pages and ijson is None:
+            raise ImportError("Streaming pages requires ijson: pip install 'potion-client[streaming]'")
+
+        if transport is None:
+            if http2:
+                http2_kwargs = dict(http2) if isinstance(http2, dict) else {}
+                for key in HTTP2_CLIENT_OPTIONS:
+                    if key in session_kwargs:
+                        http2_kwargs.setdefault(key, session_kwargs.pop(key))
+                if 'proxies' in session_kwargs:
+                    raise TypeError("Proxies cannot be set on an HTTP/2 session; use http2={'proxy': url} instead")
+                session_factory = partial(HTTP2Session, **http2_kwargs)
+                transport = RequestsTransport(session_factory, **session_kwargs)
+            else:
+                transport = RequestsTransport(**session_kwargs)
+        elif session_kwargs or http2:
+            raise TypeError('Session options cannot be combined with a custom transport')
 
-        self.session = session = requests.Session()
-        for key, value in session_kwargs.items():
-            setattr(session, key, value)
+        self._transport = transport
+        self._config = dict(api_root_url=api_root_url,
+                            schema_path=schema_path,
+                            adaptive_pagination=adaptive_pagination,
+                            transport=transport,
+                            compress_threshold=compress_threshold,
+                            stream_threshold=stream_threshold,
+                            stream_pages=stream_pages,
+                            lazy_decode=lazy_decode,
+                            rate_limit=rate_limit,
+                            hedging=hedging,
+                            cache=cache,
+                            page_store=page_store)
+        self._key = uuid.uuid4().hex
+        self._reset()
+        _clients[self._key] = self
 
         parse_result = urlparse(api_root_url)
         self._root_url = '{}://{}'.format(parse_result.scheme, parse_result.netloc)
@@ -31,48 +113,229 @@ class Client(object):
         if fetch_schema:
             self._fetch_schema()
 
+    def _reset(self):
+        self._pid = os.getpid()
+        self._instances_lock = threading.RLock()
+        self._fetches = SingleFlight()
+
+    def _reset_after_fork(self):
+        # A forked child process must not share connections or locks with its parent.
+        self._reset()
+        self._transport.reset()
+
+    @property
+    def transport(self):
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        return self._transport
+
+    @property
+    def session(self):
+        """
+        The :class:`requests.Session` of the transport, or ``None`` if the transport does not use one, such as
+        :class:`potion_client.transport.Urllib3Transport`.
+        """
+        return getattr(self.transport, 'session', None)
+
+    @session.setter
+    def session(self, session):
+        transport = self.transport
+        if not hasattr(transport, 'session'):
+            raise TypeError('{} does not use a session'.format(type(transport).__name__))
+        transport.session = session
+
+    def _send(self, request, stream=False, link=None):
+        """
+        Sends a request using the transport of the client.
+
+        :param requests.Request request:
+        :param bool stream:
+        :param Link link: the link of the request, whose rate limiter and hedging policy are used in place of those of
+            the client
+        :rtype: requests.Response
+        """
+        transport = self.transport
+        with phase(self._profiler, 'prepare'):
+            prepared_request = transport.prepare(request)
+        rate_limiter = hedging = None
+        if link is not None:
+            rate_limiter = link.rate_limiter
+            hedging = link.hedging
+        hedging = hedging or self._hedging
+
+        # a streamed body is consumed as it is sent, so it cannot be sent again
+        replayable = isinstance(request.data, (six.binary_type, six.text_type, dict, list, tuple, type(None)))
+
+        def send():
+            return self._rate_limited(lambda: transport.send(prepared_request, stream=stream), rate_limiter, replayable)
+
+        if hedging is not None and request.method == 'GET' and not stream:
+            return hedging.send(link, send)
+        return send()
+
+    def _rate_limited(self, send, rate_limiter=None, replayable=True):
+        """
+        Calls ``send`` once a rate limiter allows it, and again as long as the response is a 429 and the limiter allows
+        another attempt.
+
+        :return: the last response
+        """
+        rate_limiter = rate_limiter or self._rate_limiter
+        profiler = self._profiler
+        if profiler is not None:
+            send = partial(profiler.transfer, send)
+        if rate_limiter is None:
+            return send()
+
+        retries = 0
+        while True:
+            with phase(profiler, 'rate_limit'):
+                rate_limiter.acquire()
+            response = send()
+            if not (rate_limiter.update(response) and replayable and retries < rate_limiter.max_retries):
+                return response
+            close = getattr(response, 'close', None)
+            if close is not None:
+                close()
+            retries += 1
+
+    def __reduce__(self):
+        # Resources are rebuilt from the schemas sent along with the client so that no requests are needed to
+        # restore the client in another process.
+        resources = [(cls._name,
+                      cls._schema,
+                      cls._resource_cls,
+                      getattr(self, upper_camel_case(cls._name), None) is cls) for cls in self._resources.values()]
+        return _restore_client, (self._key, self._config), {'resources': resources}
+
+    def __setstate__(self, state):
+        for name, schema, resource_cls, is_attribute in state['resources']:
+            try:
+                self._resource_class(name)
+            except KeyError:
+                resource = self.resource_factory(name, schema, resource_cls)
+                if is_attribute:
+                    setattr(self, upper_camel_case(name), resource)
+
+    def _resource_class(self, name):
+        for cls in self._resources.values():
+            if cls._name == name:
+                return cls
+        raise KeyError(name)
+
     def _fetch_schema(self):
-        schema = self.session \
-            .get(self._schema_url) \
-            .json(cls=PotionJSONSchemaDecoder,
-                  referrer=self._schema_url,
-                  client=self)
+        if self._registry is not None:
+            for name, template in self._registry.templates(self, self._schema_version).items():
+                # a thin subclass binds the shared class to this client
+                resource = type(template.__name__, (template,), {'__doc__': template.__doc__})
+                setattr(self, upper_camel_case(name), self._register_resource(name, resource))
+            return
+
+        schema = self._load_schema(self.transport.get(self._schema_url))
 
         # NOTE these should perhaps be definitions in Flask-Potion
         for name, resource_schema in schema['properties'].items():
             resource = self.resource_factory(name, resource_schema)
             setattr(self, upper_camel_case(name), resource)
 
+    def _load_schema(self, response):
+        """
+        Decodes the root schema of the API and resolves the schemas it references.
+
+        :param requests.Response response: the response to a request for the root schema
+        :return: the root schema
+        """
+        schema = response.json(cls=PotionJSONSchemaDecoder,
+                               referrer=self._schema_url,
+                               client=self)
+
+        # Resolve all schemas referenced by the root schema at once rather than one at a time as they are needed.
+        references = {reference._uri: reference
+                      for reference in _schema_references(schema) if reference._status is None}
+        references = list(references.values())
+        if references:
+            with ThreadPoolExecutor(min(len(references), SCHEMA_FETCH_WORKERS)) as executor:
+                for _ in executor.map(lambda reference: reference._properties, references):
+                    pass
+        return schema
+
+    def profile(self, memory=False):
+        """
+        Profiles the requests of the client in all threads, as a context manager::
+
+            with client.profile() as profile:
+                client.User.instances()[:1000]
+            print(profile.summary())
+
+        :param bool memory: if true, allocations are traced with :mod:`tracemalloc` as well
+        :rtype: potion_client.profiler.Profiler
+        """
+        return Profiler(self, memory=memory)
+
     def instance(self, uri, cls=None, default=None, **kwargs):
+        profiler = self._profiler
+        if profiler is None:
+            return self._instance(uri, cls, default, **kwargs)
+        with profiler.phase('identity_map'):
+            return self._instance(uri, cls, default, **kwargs)
+
+    def _instance(self, uri, cls, default, **kwargs):
         instance = self._instances.get(uri, None)
 
         if instance is None:
-            if cls is None:
-                try:
-                    cls = self._resources[uri[:uri.rfind('/')]]
-                except KeyError:
-                    cls = Reference
-
-            if isinstance(default, Resource) and default._uri is None:
-                default._status = 200
-                default._uri = uri
-                instance = default
-            else:
-                instance = cls(uri=uri, **kwargs)
-            self._instances[uri] = instance
+            with self._instances_lock:
+                instance = self._instances.get(uri, None)
+                if instance is not None:
+                    return instance
+
+                if cls is None:
+                    try:
+                        cls = self._resources[uri[:uri.rfind('/')]]
+                    except KeyError:
+                        cls = Reference
+
+                if isinstance(default, Resource) and default._uri is None:
+                    default._status = 200
+                    default._uri = uri
+                    instance = default
+                else:
+                    instance = cls(uri=uri, **kwargs)
+                self._instances[uri] = instance
         return instance
 
     def fetch(self, uri, cls=PotionJSONDecoder, **kwargs):
+        try:
+            key = (uri, cls) + tuple(sorted(kwargs.items()))
+            hash(key)
+        except TypeError:
+            return self._fetch(uri, cls, **kwargs)
+        return self._fetches.do(key, self._fetch, uri, cls, **kwargs)
+
+    def _fetch(self, uri, cls, **kwargs):
+        profiler = self._profiler
+        if profiler is None:
+            return self._fetch_uri(uri, cls, **kwargs)
+        with profiler.phase('fetch'):
+            return self._fetch_uri(uri, cls, **kwargs)
+
+    def _fetch_uri(self, uri, cls, **kwargs):
         # TODO handle URL fragments (#properties/id etc.)
-        response = self.session \
-            .get(urljoin(self._root_url, uri, True))
+        def send():
+            return self._rate_limited(lambda: self.transport.get(urljoin(self._root_url, uri, True)))
+
+        if self._hedging is not None:
+            # latencies are observed for each resource, by the path its URIs start with
+            response = self._hedging.send(uri[:uri.rfind('/')], send)
+        else:
+            response = send()
 
         response.raise_for_status()
 
-        return response.json(cls=cls,
-                             client=self,
-                             referrer=uri,
-                             **kwargs)
+        with phase(self._profiler, 'parse'):
+            return response.json(cls=cls,
+                                 client=self,
+                                 referrer=uri,
+                                 **kwargs)
 
     def resource_factory(self, name, schema, resource_cls=None):
         """
@@ -85,12 +348,19 @@ class Client(object):
         :param Resource resource_cls: a subclass of :class:`Resource` or None
         :return: The new :class:`Resource`.
         """
+        return self._register_resource(name, self._build_resource_class(name, schema, resource_cls))
+
+    def _build_resource_class(self, name, schema, resource_cls=None):
+        """
+        Creates a resource class with the links and properties of a schema, without binding it to this client.
+        """
         cls = type(str(upper_camel_case(name)), (resource_cls or Resource, collections.MutableMapping), {
             '__doc__': schema.get('description', '')
         })
 
+        cls._name = name
         cls._schema = schema
-        cls._client = self
+        cls._resource_cls = resource_cls
         cls._links = links = {}
 
         for link_schema in schema['links']:
@@ -117,24 +387,30 @@ class Client(object):
             if property_name.startswith('$'):
                 continue
 
-            if property_schema.get('readOnly', False):
-                # TODO better error message. Raises AttributeError("can't set attribute")
-                setattr(cls,
-                        property_name,
-                        property(fget=partial((lambda name, obj: getitem(obj, name)), property_name),
-                                 doc=property_schema.get('description', None)))
-            else:
-                setattr(cls,
-                        property_name,
-                        property(fget=partial((lambda name, obj: getitem(obj, name)), property_name),
-                                 fset=partial((lambda name, obj, value: setitem(obj, name, value)), property_name),
-                                 fdel=partial((lambda name, obj: delitem(obj, name)), property_name),
-                                 doc=property_schema.get('description', None)))
+            setattr(cls,
+                    property_name,
+                    ResourceProperty(property_name,
+                                     read_only=property_schema.get('readOnly', False),
+                                     doc=property_schema.get('description', None)))
+
+        return cls
+
+    def _register_resource(self, name, cls):
+        """
+        Binds a resource class to this client. References to URIs of the resource are then decoded as instances of the
+        class.
+
+        :param str name:
+        :param Resource cls: a subclass of :class:`Resource` with links set up as by :meth:`resource_factory`
+        :return: The class.
+        """
+        cls._name = name
+        cls._client = self
 
         root = None
-        if 'instances' in links:
+        if 'instances' in cls._links:
             root = cls._instances.href
-        elif 'self' in links:
+        elif 'self' in cls._links:
             root = cls._self.href[:cls._self.href.rfind('/')]
         else:
             root = self._root_path + '/' + name.replace('_', '-')
@@ -143,5 +419,55 @@ class Client(object):
         return cls
 
 
+SCHEMA_FETCH_WORKERS = 16
+
+
+def _schema_references(schema):
+    if isinstance(schema, JSONSchemaReference):
+        yield schema
+    elif isinstance(schema, dict):
+        for value in schema.values():
+            for reference in _schema_references(value):
+                yield reference
+    elif isinstance(schema, list):
+        for value in schema:
+            for reference in _schema_references(value):
+                yield reference
+
+
+# Clients by key, used to restore each client at most once per process when unpickling.
+_clients = WeakValueDictionary()
+
+# The most recently restored clients are kept alive, so that a worker process that unpickles one task at a time does
+# not rebuild the client for each task; older ones are kept only as long as they are used.
+_restored_clients = collections.OrderedDict()
+_MAX_RESTORED_CLIENTS = 8
+
+
+def _restore_client(key, config):
+    client = _clients.get(key)
+    if client is None:
+        config = dict(config)
+        client = Client(config.pop('api_root_url'), fetch_schema=False, **config)
+        client._key = key
+        _clients[key] = client
+    elif key not in _restored_clients:
+        return client  # the original client, or a restored one that is still in use
+    _restored_clients.pop(key, None)
+    _restored_clients[key] = client
+    while len(_restored_clients) > _MAX_RESTORED_CLIENTS:
+        _restored_clients.popitem(last=False)
+    return client
+
+
+def _reset_clients():
+    for client in list(_clients.values()):
+        client._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients)
+
+
 ASC = ASCENDING = False
 DESC = DESCENDING = True
\ No newline at end of file
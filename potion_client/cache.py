@@ -0,0 +1,80 @@
+"""
+A cache for the results of GET requests made through links.
+
+With ``Client(..., cache=LinkCache(ttl=30))``, the decoded result of a GET request through a link, such as a page of
+``User.instances(where=...)``, is kept for ``ttl`` seconds and returned for identical requests, without a request to
+the server. Entries are keyed by the resource class, the link, the URL and the encoded query parameters, so the cache
+of a client is never shared with other clients, even when they share their resource classes.
+
+A successful request through any other method of a link of a resource class, as made by :meth:`Resource.save`,
+:meth:`Resource.delete` or the ``create``, ``update`` and ``destroy`` links, removes all entries of that class. Changes
+made by other clients or other classes are not seen until the entries expire.
+
+The cache holds at most ``max_entries`` results, removing the least recently used first.
+"""
+from timeit import default_timer
+import collections
+import threading
+
+
+class LinkCache(object):
+    """
+    A TTL cache with a bounded size, which may be shared between threads.
+
+    :param float ttl: the time in seconds an entry is kept
+    :param int max_entries: the maximum number of entries
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        """
+        :return: the value for a key, or ``None`` if there is none or it has expired
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < default_timer():
+                self.misses += 1
+                return None
+            self._entries[key] = entry  # most recently used entries are kept at the end
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, owner, value):
+        """
+        :param key:
+        :param owner: the resource class of the entry, whose entries are removed together by :meth:`invalidate`
+        :param value:
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (default_timer() + self.ttl, owner, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, owner=None):
+        """
+        Removes the entries of a resource class, or all entries.
+        """
+        with self._lock:
+            if owner is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items() if entry[1] is owner]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # the entries are not sent to other processes
+        return {'ttl': self.ttl, 'max_entries': self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
@@ -0,0 +1,267 @@
+"""
+Command-line tool for exporting and importing the items of a resource::
+
+    potion-client export http://localhost/api user > users.ndjson
+    potion-client export http://localhost/api user --format csv --output users.csv
+    potion-client import http://localhost/api user --input users.ndjson --checkpoint users.done
+
+Pages are exported by several workers at once and written in order. Items are imported concurrently: lines with a
+``$uri`` update the existing item, other lines create a new one. With ``--checkpoint``, the numbers of the lines that
+have been imported are recorded in a file, and lines found there are skipped when the import is run again.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date
+import argparse
+import collections
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+
+import six
+from requests.utils import default_headers
+
+from potion_client import Client
+from potion_client.converter import PotionJSONEncoder, PotionJSONDecoder
+from potion_client.resource import Reference
+from potion_client.utils import upper_camel_case
+
+
+def export_items(resource, output, format='ndjson', workers=4, per_page=100, where=None):
+    """
+    Writes all items of a resource to a file.
+
+    :param resource: a resource class with an ``instances`` link
+    :param output: a text file
+    :param str format: ``'ndjson'`` or ``'csv'``
+    :param int workers: the number of pages to fetch at the same time
+    :param int per_page:
+    :param dict where: a filter for the items to export
+    :return: the number of items written
+    """
+    binding = resource._instances
+    params = {'per_page': per_page}
+    if where:
+        params['where'] = where
+
+    def fetch(page):
+        response, items = binding.make_request(None, dict(params, page=page))
+        return response, items
+
+    if format == 'csv':
+        write = _csv_writer(resource, output)
+    else:
+        encoder = PotionJSONEncoder()
+
+        def write(item):
+            output.write(encoder.encode(item._properties))
+            output.write(u'\n')
+
+    response, items = fetch(1)
+    try:
+        total_count = int(response.headers['X-Total-Count'])
+    except KeyError:
+        total_count = len(items)
+
+    count = 0
+    with ThreadPoolExecutor(workers) as executor:
+        pages = _ordered_map(executor, fetch, range(2, (total_count - 1) // per_page + 2), workers * 2)
+        for response, items in itertools.chain([(response, items)], pages):
+            for item in items:
+                write(item)
+                count += 1
+    return count
+
+
+def _ordered_map(executor, fn, iterable, window):
+    # Like executor.map(), but with no more than `window` calls pending, so that results are not kept in memory when
+    # they are consumed more slowly than they are produced.
+    pending = collections.deque()
+    for value in iterable:
+        pending.append(executor.submit(fn, value))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _csv_writer(resource, output):
+    columns = ['$uri'] + sorted(name for name in resource._schema['properties'] if not name.startswith('$'))
+    encoder = PotionJSONEncoder()
+
+    def value(v):
+        if v is None:
+            return u''
+        if isinstance(v, Reference):
+            return v._uri
+        if isinstance(v, date):
+            return v.isoformat()
+        if isinstance(v, (dict, list, tuple)):
+            return encoder.encode(v)
+        if isinstance(v, bool):
+            return u'true' if v else u'false'
+        return six.text_type(v)
+
+    writer = csv.writer(output)
+    writer.writerow(columns)
+
+    def write(item):
+        # read through the item, so that lazily decoded dates and references are decoded
+        writer.writerow([value(item.get(column)) for column in columns])
+
+    return write
+
+
+class Checkpoint(object):
+    """
+    Records the numbers of the lines that have been imported in a file, one per line.
+
+    :param str path:
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with io.open(path) as f:
+                self.done.update(int(line) for line in f if line.strip())
+        self._file = io.open(path, 'a')
+        self._lock = threading.Lock()
+
+    def __contains__(self, number):
+        return number in self.done
+
+    def add(self, number):
+        with self._lock:
+            self.done.add(number)
+            self._file.write(u'{:d}\n'.format(number))
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def import_items(resource, lines, workers=4, checkpoint=None, create=False, errors=None):
+    """
+    Creates or updates items from lines of NDJSON, as written by :func:`export_items`. Lines with a ``$uri`` update
+    the item at that URI; other lines create a new item. Read-only properties are ignored.
+
+    :param resource: a resource class
+    :param lines: an iterable of lines of NDJSON
+    :param int workers: the number of items to save at the same time
+    :param Checkpoint checkpoint: lines already recorded are skipped; lines imported are recorded
+    :param bool create: if true, all items are created, ignoring any ``$uri``
+    :param errors: a text file to report failed lines to
+    :return: a tuple of the number of items imported and the number of lines that failed
+    """
+    decoder = PotionJSONDecoder(client=resource._client)
+    read_only = set(name for name, schema in resource._schema['properties'].items() if schema.get('readOnly'))
+    counts = {'imported': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def save(number, line):
+        try:
+            data = json.loads(line)
+            uri = None if create else data.get('$uri')
+            properties = {name: decoder._decode(value, 1) for name, value in data.items()
+                          if not name.startswith('$') and name not in read_only}
+            if uri is None:
+                resource._create(**properties)
+            else:
+                resource(uri, **properties)._update(**properties)
+        except Exception as e:
+            with lock:
+                counts['failed'] += 1
+                if errors is not None:
+                    errors.write(u'line {}: {}\n'.format(number, e))
+            return
+
+        with lock:
+            counts['imported'] += 1
+        if checkpoint is not None:
+            checkpoint.add(number)
+
+    pending = set()
+    with ThreadPoolExecutor(workers) as executor:
+        for number, line in enumerate(lines, 1):
+            if not line.strip() or (checkpoint is not None and number in checkpoint):
+                continue
+            if len(pending) >= workers * 2:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(executor.submit(save, number, line))
+    return counts['imported'], counts['failed']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='potion-client', description='Export and import items of a Flask-Potion API.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('url', help='the root URL of the API')
+    common.add_argument('resource', help='the name of the resource')
+    common.add_argument('--schema-path', default='/schema')
+    common.add_argument('--header', action='append', default=[], metavar='NAME:VALUE',
+                        help='a header to send with each request, e.g. for authentication')
+    common.add_argument('--workers', type=int, default=4, help='the number of concurrent requests')
+
+    export_parser = subparsers.add_parser('export', parents=[common], help='write all items of a resource to a file')
+    export_parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    export_parser.add_argument('--output', default='-')
+    export_parser.add_argument('--per-page', type=int, default=100)
+    export_parser.add_argument('--where', type=json.loads, help='a filter for the items to export, as JSON')
+
+    import_parser = subparsers.add_parser('import', parents=[common], help='create or update items from NDJSON')
+    import_parser.add_argument('--input', default='-')
+    import_parser.add_argument('--checkpoint', help='a file recording the lines that have been imported')
+    import_parser.add_argument('--create', action='store_true', help='create all items, ignoring their $uri')
+
+    args = parser.parse_args(argv)
+
+    headers = default_headers()
+    for header in args.header:
+        name, _, value = header.partition(':')
+        headers[name.strip()] = value.strip()
+
+    client = Client(args.url, schema_path=args.schema_path, headers=headers)
+    try:
+        resource = getattr(client, upper_camel_case(args.resource))
+    except AttributeError:
+        parser.error("unknown resource '{}'".format(args.resource))
+
+    if args.command == 'export':
+        output = _open(args.output, 'w')
+        try:
+            count = export_items(resource, output, args.format, args.workers, args.per_page, args.where)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        sys.stderr.write('{} items exported\n'.format(count))
+        return 0
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    lines = _open(args.input, 'r')
+    try:
+        imported, failed = import_items(resource, lines, args.workers, checkpoint, args.create, errors=sys.stderr)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    sys.stderr.write('{} items imported, {} failed\n'.format(imported, failed))
+    return 1 if failed else 0
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdout if mode == 'w' else sys.stdin
+    if six.PY2 and mode == 'w':
+        return open(path, 'wb')  # the csv module writes bytes on Python 2
+    return io.open(path, mode, encoding='utf-8', newline='')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Generates a Python module with static resource classes for a Flask-Potion API, so that the schema does not need to be
+fetched when a client is created::
+
+    python -m potion_client.codegen http://localhost/api > myapi.py
+
+The generated module contains a class for every resource and a ``connect()`` function that returns a :class:`Client`
+using these classes. Importing the module makes no requests.
+
+To check whether a generated module still matches the schema of the API, run::
+
+    python -m potion_client.codegen --check myapi http://localhost/api
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import keyword
+import re
+import sys
+from pprint import pformat
+
+import requests
+from six.moves.urllib.parse import urljoin, urlparse
+
+from potion_client.converter import schema_resolve_refs
+from potion_client.utils import upper_camel_case, snake_case
+
+
+def fetch_schemas(api_root_url, schema_path='/schema', session=None):
+    """
+    Fetches the schemas of an API as they are returned by the server, without resolving any references.
+
+    :return: a tuple of the root schema and a dict with the schema of each resource.
+    """
+    session = session or requests.Session()
+    parse_result = urlparse(api_root_url)
+    root_url = '{}://{}'.format(parse_result.scheme, parse_result.netloc)
+
+    response = session.get(api_root_url + schema_path)
+    response.raise_for_status()
+    root = response.json()
+
+    schemas = {}
+    for name, reference in root['properties'].items():
+        response = session.get(urljoin(root_url, reference['$ref'], True))
+        response.raise_for_status()
+        schemas[name] = response.json()
+    return root, schemas
+
+
+def schema_digest(root, schemas):
+    return hashlib.sha1(json.dumps([root, schemas], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def resolve_schemas(root, schemas):
+    """
+    Resolves the references in the schemas of a generated module. References to the schema of another resource are
+    replaced with that schema; other references are left as they are.
+
+    :return: a dict with the resolved schema of each resource.
+    """
+    names = {root['properties'][name]['$ref'].rstrip('#'): name for name in schemas}
+    resolved = {name: {} for name in schemas}
+
+    def ref_resolver(uri):
+        if uri.rstrip('#') in names:
+            return resolved[names[uri.rstrip('#')]]
+        return {"$ref": uri}
+
+    for name, schema in schemas.items():
+        for key, value in schema.items():
+            resolved[name][key] = schema_resolve_refs(value, ref_resolver, root=resolved[name])
+    return resolved
+
+
+def bind(client, resources):
+    """
+    Binds the resource classes of a generated module to a client. Because resource classes refer to their client, a
+    subclass of each class is registered with the client.
+
+    :param Client client:
+    :param resources: the resource classes of a generated module
+    :return: the client
+    """
+    for cls in resources:
+        resource = type(cls.__name__, (cls,), {'__doc__': cls.__doc__,
+                                               '__module__': cls.__module__,
+                                               '_resource_cls': cls})
+        client._register_resource(cls._name, resource)
+        setattr(client, cls.__name__, resource)
+    return client
+
+
+def _is_identifier(name):
+    return re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name) and not keyword.iskeyword(name)
+
+
+def _indent(text, spaces):
+    return '\n'.join(' ' * spaces + line if line else line for line in text.splitlines())
+
+
+def _generate_class(name, schema):
+    class_name = str(upper_camel_case(name))
+    schema_expr = 'SCHEMAS[{!r}]'.format(name)
+    after = []
+
+    def assign(attribute, expr, statements):
+        if _is_identifier(attribute):
+            statements.append('{} = {}'.format(attribute, expr))
+        else:
+            after.append('setattr({}, {!r}, {})'.format(class_name, attribute, expr))
+
+    blocks = ['_name = {!r}\n'
+              '_schema = {}\n'
+              '__doc__ = {!r}'.format(name, schema_expr, schema.get('description', ''))]
+
+    statements = []
+    links = []
+    for i, link_schema in enumerate(schema['links']):
+        rel = link_schema['rel']
+        if rel in ('self', 'instances', 'create', 'update', 'destroy'):
+            variable = '_{}'.format(rel)
+        else:
+            variable = '_link_{}'.format(snake_case(re.sub(r'\W', '_', rel)))
+
+        arguments = ['None', 'method={!r}'.format(link_schema['method']), 'href={!r}'.format(link_schema['href']),
+                     'rel={!r}'.format(rel)]
+        for key, argument in (('schema', 'schema'), ('targetSchema', 'target_schema')):
+            if key in link_schema:
+                arguments.append("{}={}['links'][{}][{!r}]".format(argument, schema_expr, i, key))
+        statements.append('{} = Link({})'.format(variable, ', '.join(arguments)))
+        links.append((rel, variable))
+
+        if rel != 'update':  # 'update' is a special case because of MutableMapping.update()
+            assign(snake_case(rel), variable, statements)
+
+    statements.append('_links = {{{}}}'.format(', '.join('{!r}: {}'.format(rel, variable) for rel, variable in links)))
+    blocks.append('\n'.join(statements))
+
+    statements = []
+    for property_name, property_schema in sorted(schema['properties'].items()):
+        if property_name.startswith('$'):
+            continue
+
+        arguments = [repr(property_name)]
+        if property_schema.get('readOnly', False):
+            arguments.append('read_only=True')
+        if 'description' in property_schema:
+            arguments.append('doc={!r}'.format(property_schema['description']))
+        assign(property_name, 'ResourceProperty({})'.format(', '.join(arguments)), statements)
+
+    if statements:
+        blocks.append('\n'.join(statements))
+
+    source = 'class {}(Resource, collections.MutableMapping):\n'.format(class_name)
+    source += '\n\n'.join(_indent(block, 4) for block in blocks) + '\n'
+    if after:
+        source += '\n\n' + '\n'.join(after) + '\n'
+    return class_name, source
+
+
+def generate(api_root_url, root, schemas, schema_path='/schema'):
+    """
+    :param str api_root_url:
+    :param dict root: the root schema of the API
+    :param dict schemas: the schema of each resource
+    :return: the source code of a module with the resource classes of the API
+    """
+    classes = [_generate_class(name, schemas[name]) for name in sorted(schemas)]
+
+    return '''# -*- coding: utf-8 -*-
+"""
+Resource classes for the API at {api_root_url}.
+
+Generated by potion_client.codegen. Do not edit; regenerate with:
+
+    python -m potion_client.codegen {api_root_url} > module.py
+"""
+import collections
+
+from potion_client import Client
+from potion_client.codegen import bind, resolve_schemas
+from potion_client.links import Link
+from potion_client.resource import Resource, ResourceProperty
+
+API_ROOT_URL = {api_root_url!r}
+SCHEMA_PATH = {schema_path!r}
+SCHEMA_DIGEST = {digest!r}
+
+SCHEMAS = resolve_schemas({root}, {schemas})
+
+
+{classes}
+
+RESOURCES = ({resources})
+
+
+def connect(api_root_url=API_ROOT_URL, **kwargs):
+    """
+    :return: a :class:`Client` for the API that uses the resource classes of this module. The schema is not fetched.
+    """
+    return bind(Client(api_root_url, fetch_schema=False, **kwargs), RESOURCES)
+'''.format(api_root_url=api_root_url,
+           schema_path=schema_path,
+           digest=schema_digest(root, schemas),
+           root=_indent(pformat(root, width=100), 4).lstrip(),
+           schemas=_indent(pformat(schemas, width=100), 4).lstrip(),
+           classes='\n\n'.join(source for _, source in classes),
+           resources=', '.join(class_name for class_name, _ in classes) + (',' if len(classes) == 1 else ''))
+
+
+def check(module, session=None):
+    """
+    Checks whether a generated module matches the current schema of its API.
+
+    :param module: a generated module, or its name
+    :return: ``True`` if the schema is unchanged
+    """
+    if not hasattr(module, 'SCHEMA_DIGEST'):
+        module = importlib.import_module(module)
+    root, schemas = fetch_schemas(module.API_ROOT_URL, module.SCHEMA_PATH, session=session)
+    return schema_digest(root, schemas) == module.SCHEMA_DIGEST
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m potion_client.codegen',
+                                     description='Generate a module with the resource classes of a Flask-Potion API.')
+    parser.add_argument('url', help='the root URL of the API')
+    parser.add_argument('--schema-path', default='/schema')
+    parser.add_argument('--header', action='append', default=[], metavar='NAME:VALUE',
+                        help='a header to send with each request, e.g. for authentication')
+    parser.add_argument('--check', metavar='MODULE',
+                        help='check whether a generated module matches the schema of the API instead')
+    args = parser.parse_args(argv)
+
+    session = requests.Session()
+    for header in args.header:
+        name, _, value = header.partition(':')
+        session.headers[name.strip()] = value.strip()
+
+    if args.check:
+        sys.path.insert(0, '')
+        module = importlib.import_module(args.check)
+        module.API_ROOT_URL, module.SCHEMA_PATH = args.url, args.schema_path
+        if not check(module, session=session):
+            sys.stderr.write('{} does not match the schema at {}\n'.format(args.check, args.url))
+            return 1
+        return 0
+
+    root, schemas = fetch_schemas(args.url, args.schema_path, session=session)
+    sys.stdout.write(generate(args.url, root, schemas, args.schema_path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
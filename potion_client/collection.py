@@ -1,16 +1,84 @@
 import collections
 from pprint import pformat
+from timeit import default_timer
 
-from potion_client.utils import escape
+from potion_client.exceptions import ItemNotFound
+from potion_client.utils import escape, finalize, SingleFlight
+
+
+class PageSizeController(object):
+    """
+    Adjusts the page size used by an adaptive :class:`PaginatedList` from the latency and payload size observed for
+    the pages fetched so far. The page size grows by at most a factor of two per page and never leaves the range
+    from ``min_per_page`` to ``max_per_page``.
+
+    :param int min_per_page: smallest page size, also the page size used for the first page
+    :param int max_per_page: largest page size accepted by the server
+    :param float target_latency: the time in seconds a single page fetch should take
+    :param int target_size: the number of bytes a single page should not exceed
+    """
+
+    def __init__(self, min_per_page, max_per_page=100, target_latency=0.5, target_size=2 ** 20):
+        self.min_per_page = min_per_page
+        self.max_per_page = max(min_per_page, max_per_page)
+        self.target_latency = target_latency
+        self.target_size = target_size
+        self.per_page = min_per_page
+
+    def observe(self, count, elapsed, size):
+        if not count:
+            return
+
+        limits = [self.max_per_page, count * 2]
+        if elapsed > 0:
+            limits.append(int(count * self.target_latency / elapsed))
+        if size > 0:
+            limits.append(int(count * self.target_size / size))
+
+        self.per_page = max(self.min_per_page, min(limits))
 
 
 class PaginatedList(collections.Sequence):
-    def __init__(self, binding, params):
-        self._pages = {}
+    """
+    A lazily-fetched list of the items returned by a paginated link.
+
+    Items are stored in pages of ``per_page`` items. In adaptive mode, later pages are fetched several at a time in a
+    single request whose size is chosen by a :class:`PageSizeController`; the response is then split into pages of
+    ``per_page`` items so that item indexes continue to map onto the same pages.
+
+    In streaming mode, iterating over the list yields the items of each page as they are decoded, before the page has
+    finished downloading.
+
+    Pages are kept in a dict, or in the page store of the client, such as a
+    :class:`potion_client.pagestore.SQLitePageStore`. A store with a ``close()`` method is closed when the list is
+    garbage collected, or earlier with :meth:`close` or by using the list as a context manager.
+    """
+
+    def __init__(self, binding, params, adaptive=None, stream=None):
+        client = binding.owner._client
+        self._pages = {} if client._page_store is None else client._page_store(client)
+        self._close_pages = self._finalize_pages()
         self._per_page = per_page = params.pop('per_page', 20)
+        self._fetches = SingleFlight()
         self._binding = binding
         self._total_count = 0
         self._request_params = params
+
+        if adaptive is None:
+            adaptive = binding.owner._client._adaptive_pagination
+        if stream is None:
+            stream = binding.owner._client._stream_pages
+        self._stream = stream
+
+        if adaptive:
+            try:
+                max_per_page = binding.link.schema['properties']['per_page']['maximum']
+            except KeyError:
+                max_per_page = 100
+            self._page_size = PageSizeController(per_page, max_per_page)
+        else:
+            self._page_size = None
+
         self.fetch_page(1, per_page)
 
     def __getitem__(self, item):
@@ -22,23 +90,130 @@ class PaginatedList(collections.Sequence):
 
         page, offset = item // self._per_page + 1, item % self._per_page
         if page not in self._pages:
-            self.fetch_page(page, self._per_page)
+            self._fetch_once(*self._request_for(page))
         return self._pages[page][offset]
 
+    def __iter__(self):
+        if not self._stream:
+            for item in super(PaginatedList, self).__iter__():
+                yield item
+            return
+
+        page = 1
+        while (page - 1) * self._per_page < self._total_count:
+            if page in self._pages:
+                for item in self._pages[page]:
+                    yield item
+                page += 1
+            else:
+                request_page, per_page = self._request_for(page)
+                for item in self._stream_page(request_page, per_page):
+                    yield item
+                page += per_page // self._per_page
+
     def __len__(self):
         return self._total_count
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_fetches']
+        del state['_close_pages']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._fetches = SingleFlight()
+        self._close_pages = self._finalize_pages()
+
+    def _finalize_pages(self):
+        close = getattr(self._pages, 'close', None)
+        return None if close is None else finalize(self, close)
+
+    def close(self):
+        """
+        Closes the page store of the list, if it has one. Pages that have not been fetched cannot be fetched after.
+        """
+        if self._close_pages is not None:
+            self._close_pages()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request_for(self, page):
+        """
+        :return: the page number and page size of the request to make for a missing page
+        """
+        if self._page_size is None:
+            return page, self._per_page
+
+        # A request for k pages at once is only possible where the first page falls on a multiple of k, and should not
+        # fetch pages that are already present.
+        last_page = (self._total_count - 1) // self._per_page + 1
+        k = max(1, min(self._page_size.per_page // self._per_page, last_page - page + 1))
+        while k > 1 and ((page - 1) % k or any(p in self._pages for p in range(page, page + k))):
+            k -= 1
+        return (page - 1) // k + 1, k * self._per_page
+
+    def _fetch_once(self, page, per_page):
+        # Concurrent requests for the same page are merged; a page that arrived in the meantime is not fetched again.
+        def fetch():
+            if (page - 1) * (per_page // self._per_page) + 1 not in self._pages:
+                self.fetch_page(page, per_page)
+
+        self._fetches.do((page, per_page), fetch)
+
     def fetch_page(self, page, per_page):
+        """
+        Fetches a page of items from the server. ``per_page`` must be a multiple of the page size of the list; larger
+        pages are split up and stored as several pages.
+
+        :param int page: the page number, counting pages of ``per_page`` items
+        :param int per_page: number of items to request
+        """
         params = dict(page=page, per_page=per_page)
         params.update(self._request_params)
+        started = default_timer()
         response, response_data = self._binding.make_request(None, params)
+        elapsed = default_timer() - started
 
+        self._store(page, per_page, response, response_data)
+        if self._page_size is not None:
+            self._page_size.observe(len(response_data), elapsed, len(response.content))
+
+    def _stream_page(self, page, per_page):
+        params = dict(page=page, per_page=per_page)
+        params.update(self._request_params)
+        started = default_timer()
+        response, items = self._binding.make_request(None, params, stream=True)
+
+        response_data = []
+        try:
+            for item in items:
+                response_data.append(item)
+                yield item
+        finally:
+            response.close()
+        elapsed = default_timer() - started
+
+        self._store(page, per_page, response, response_data)
+        if self._page_size is not None:
+            self._page_size.observe(len(response_data), elapsed, int(response.headers.get('Content-Length', 0)))
+
+    def _store(self, page, per_page, response, response_data):
         try:
             self._total_count = int(response.headers['X-Total-Count'])
         except KeyError:
             self._total_count = len(response_data)
 
-        self._pages[page] = response_data
+        if per_page == self._per_page:
+            self._pages[page] = response_data
+        else:
+            first_page = (page - 1) * (per_page // self._per_page) + 1
+            for i in range(0, len(response_data), self._per_page):
+                self._pages[first_page + i // self._per_page] = response_data[i:i + self._per_page]
 
     def _repr_html_(self):
         if len(self) <= 10:
@@ -65,3 +240,95 @@ class PaginatedList(collections.Sequence):
         return 'PaginatedList({params})'.format(params=', '.join(
             ['{}.{}'.format(self._binding.owner.__name__, self._binding.link.rel)] +
             ['{}={}'.format(k, repr(v)) for k, v in self._request_params.items()]), )
+
+
+FILTER_OPERATORS = ('eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'in', 'contains', 'icontains', 'startswith',
+                    'istartswith', 'endswith', 'iendswith', 'between', 'text')
+
+
+class Query(collections.Iterable):
+    """
+    A lazy query on a paginated link such as ``instances``. Calls to :meth:`where`, :meth:`sort` and
+    :meth:`per_page` return a new query and do not make any requests. The query is only run when it is iterated or
+    when one of :meth:`all`, :meth:`count`, :meth:`exists` or :meth:`first` is called.
+
+    Filter conditions can be given as keyword arguments, with operators appended to the property name::
+
+        User.instances.where(age__gt=18, name__startswith='J').sort(age=DESC)
+    """
+
+    def __init__(self, binding, where=None, sort=None, per_page=None):
+        self._binding = binding
+        self._where = where or {}
+        self._sort = sort or collections.OrderedDict()
+        self._per_page = per_page
+
+    def _clone(self, **kwargs):
+        state = dict(where=self._where, sort=self._sort, per_page=self._per_page)
+        state.update(kwargs)
+        return Query(self._binding, **state)
+
+    def where(self, *args, **kwargs):
+        where = dict(self._where)
+        for condition in args + (kwargs,):
+            for key, value in condition.items():
+                name, _, operator = key.rpartition('__')
+                if name and operator in FILTER_OPERATORS:
+                    value = {'${}'.format(operator): value}
+                else:
+                    name = key
+
+                if isinstance(value, dict) and isinstance(where.get(name), dict):
+                    value = dict(where[name], **value)
+                where[name] = value
+        return self._clone(where=where)
+
+    def sort(self, *args, **kwargs):
+        sort = collections.OrderedDict(self._sort)
+        for name in args:
+            sort[name] = False
+        for name, descending in sorted(kwargs.items()):
+            sort[name] = descending
+        return self._clone(sort=sort)
+
+    def per_page(self, per_page):
+        return self._clone(per_page=per_page)
+
+    def _params(self, **params):
+        if self._where:
+            params['where'] = self._where
+        if self._sort:
+            params['sort'] = self._sort
+        if self._per_page is not None and 'per_page' not in params:
+            params['per_page'] = self._per_page
+        return params
+
+    def all(self):
+        return PaginatedList(self._binding, self._params())
+
+    def count(self):
+        response, response_data = self._binding.make_request(None, self._params(page=1, per_page=1))
+        try:
+            return int(response.headers['X-Total-Count'])
+        except KeyError:
+            return len(response_data)
+
+    def exists(self):
+        response, response_data = self._binding.make_request(None, self._params(page=1, per_page=1))
+        return len(response_data) > 0
+
+    def first(self):
+        response, response_data = self._binding.make_request(None, self._params(page=1, per_page=1))
+        try:
+            return response_data[0]
+        except IndexError:
+            raise ItemNotFound("No '{}' item found matching: {}".format(self._binding.owner.__name__,
+                                                                         repr(self._params())))
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def __repr__(self):
+        return 'Query({params})'.format(params=', '.join(
+            ['{}.{}'.format(self._binding.owner.__name__, self._binding.link.rel)] +
+            ['{}={}'.format(k, repr(v)) for k, v in self._params().items()]), )
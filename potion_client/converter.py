@@ -1,12 +1,19 @@
 import calendar
+import collections
 from functools import partial
 from json import JSONEncoder, JSONDecoder
 from datetime import date, datetime
 from six.moves.urllib.parse import urljoin
 import six
 
+from potion_client.profiler import phase
 from potion_client.resource import Reference
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
 try:
     from datetime import timezone
 except ImportError:
@@ -31,7 +38,7 @@ except ImportError:
 
 
 class PotionJSONEncoder(JSONEncoder):
-    def encode(self, o):
+    def _transform(self, o):
         if self.check_circular:
             markers = {}
         else:
@@ -64,27 +71,60 @@ class PotionJSONEncoder(JSONEncoder):
 
             return o
 
-        return JSONEncoder.encode(self, _encode(o))
+        return _encode(o)
+
+    def encode(self, o):
+        return JSONEncoder.encode(self, self._transform(o))
+
+    def iterencode(self, o, _one_shot=False):
+        """
+        Encodes the given object incrementally. The items of a list are converted and encoded one at a time, so that
+        the encoded form of a large list is never held in memory at once.
+        """
+        # encode() calls iterencode() with _one_shot=True on an object that has already been converted.
+        if _one_shot:
+            return JSONEncoder.iterencode(self, o, _one_shot)
+        if isinstance(o, (list, tuple)):
+            return self._iterencode_list(o)
+        return JSONEncoder.iterencode(self, self._transform(o))
+
+    def _iterencode_list(self, o):
+        yield '['
+        for i, item in enumerate(o):
+            if i:
+                yield self.item_separator
+            for chunk in JSONEncoder.iterencode(self, self._transform(item)):
+                yield chunk
+        yield ']'
 
 
 class PotionJSONDecoder(JSONDecoder):
-    def __init__(self, client, referrer=None, uri_to_instance=True, default_instance=None, *args, **kwargs):
+    """
+    :param bool lazy: if true, the values of resource properties that are objects or arrays are decoded the first time
+        they are read. Defaults to the ``lazy_decode`` option of the client.
+    """
+
+    def __init__(self, client, referrer=None, uri_to_instance=True, default_instance=None, lazy=None, *args, **kwargs):
         self.client = client
         self.referrer = referrer
         self.uri_to_instance = uri_to_instance
         self.default_instance = default_instance
+        self.lazy = getattr(client, '_lazy_decode', False) if lazy is None else lazy
+        self.profiler = getattr(client, '_profiler', None)
         JSONDecoder.__init__(self, *args, **kwargs)
 
+    def _decode_reference(self, reference):
+        if reference.startswith("#"):
+            reference = urljoin(self.referrer, reference, True)
+        return self.client.instance(reference)
+
     def _decode(self, o, depth=0):
         if isinstance(o, dict):
             if len(o) == 1:
                 if "$date" in o:
                     return datetime.fromtimestamp(o["$date"] / 1000.0, timezone.utc)
                 if "$ref" in o and isinstance(o["$ref"], six.string_types):
-                    reference = o["$ref"]
-                    if reference.startswith("#"):
-                        reference = urljoin(self.referrer, reference, True)
-                    return self.client.instance(reference)
+                    return self._decode_reference(o["$ref"])
             elif self.uri_to_instance and "$uri" in o and isinstance(o["$uri"], six.string_types):
                 # TODO handle or ("$id" in o and "$type" in o)
                 if depth == 0:
@@ -92,8 +132,17 @@ class PotionJSONDecoder(JSONDecoder):
                 else:
                     instance = self.client.instance(o['$uri'])
 
+                mark = self.profiler and self.profiler._enter_resource(type(instance))
+                try:
+                    if self.lazy:
+                        instance._update_properties(o, self._pending_properties(type(instance), o))
+                    else:
+                        instance._update_properties(self._decode_properties(type(instance), o, depth + 1))
+                finally:
+                    if mark is not None:
+                        self.profiler._exit_resource(mark)
+                # the status is set last so that other threads only read the properties once they are complete
                 instance._status = 200
-                instance._properties.update({k: self._decode(v, depth + 1) for k, v in o.items()})
                 return instance
 
             return {k: self._decode(v, depth + 1) for k, v in o.items()}
@@ -101,12 +150,144 @@ class PotionJSONDecoder(JSONDecoder):
             return [self._decode(v, depth + 1) for v in o]
         return o
 
+    @staticmethod
+    def _field_decoders(cls):
+        """
+        :return: a tuple of the date properties, the reference properties and all properties of known kind of a
+            resource class, compiled from its schema the first time they are needed.
+        """
+        try:
+            return cls.__dict__['_field_decoders']
+        except KeyError:
+            field_decoders = compile_field_decoders(getattr(cls, '_schema', None))
+            cls._field_decoders = (tuple(name for name, kind in field_decoders.items() if kind is DATE),
+                                   tuple(name for name, kind in field_decoders.items() if kind is REFERENCE),
+                                   frozenset(field_decoders))
+            return cls._field_decoders
+
+    def _pending_properties(self, cls, o):
+        dates, references, known = self._field_decoders(cls)
+        pending = {k: self for k in dates + references if o.get(k) is not None}
+        for k in six.viewkeys(o) - known:
+            if isinstance(o[k], (dict, list)):
+                pending[k] = self
+        return pending
+
+    def _decode_properties(self, cls, o, depth):
+        # Properties the schema of the resource describes as scalars are used as they are; only dates, references
+        # and properties of other or unknown types are converted. The dict is converted in place.
+        dates, references, known = self._field_decoders(cls)
+
+        for k in dates:
+            v = o.get(k)
+            if type(v) is dict and len(v) == 1 and "$date" in v:
+                o[k] = datetime.fromtimestamp(v["$date"] / 1000.0, timezone.utc)
+            elif v is not None:
+                o[k] = self._decode(v, depth)
+        for k in references:
+            v = o.get(k)
+            if type(v) is dict and len(v) == 1 and isinstance(v.get("$ref"), six.string_types):
+                o[k] = self._decode_reference(v["$ref"])
+            elif v is not None:
+                o[k] = self._decode(v, depth)
+        for k in six.viewkeys(o) - known:
+            o[k] = self._decode(o[k], depth)
+        return o
+
     def decode(self, s, *args, **kwargs):
         o = JSONDecoder.decode(self, s, *args, **kwargs)
-        return self._decode(o)
+        if self.profiler is None:
+            return self._decode(o)
+        with self.profiler.phase('decode'):
+            return self._decode(o)
+
+    def iterdecode(self, chunks):
+        """
+        Decodes the items of a JSON array one at a time from an iterable of byte strings, such as
+        :meth:`requests.Response.iter_content`. Each item is returned as soon as it has been read. Requires the
+        optional ``ijson`` dependency.
+        """
+        for item in ijson.items(_ChunkReader(chunks), 'item', use_float=True):
+            with phase(self.profiler, 'decode'):
+                item = self._decode(item, 1)
+            yield item
+
+
+SCALAR = 'scalar'
+DATE = 'date'
+REFERENCE = 'reference'
+
+_SCALAR_TYPES = frozenset(['string', 'integer', 'number', 'boolean', 'null'])
+
+
+def compile_field_decoders(schema):
+    """
+    Classifies the properties of a resource schema by how their values are decoded.
+
+    :param dict schema: a resolved resource schema
+    :return: a dict with :data:`SCALAR`, :data:`DATE` or :data:`REFERENCE` for each property of a known kind. Other
+        properties, including those of unresolved schemas, need to be decoded generically.
+    """
+    if not isinstance(schema, collections.Mapping):
+        return {}
+    return {name: kind for name, kind in ((name, _field_kind(property_schema))
+                                          for name, property_schema in schema.get('properties', {}).items())
+            if kind is not None}
+
+
+def _field_kind(schema):
+    if not isinstance(schema, collections.Mapping) or isinstance(schema, Reference) and schema._status is None:
+        return None  # classifying an unresolved schema would cause it to be fetched
+
+    alternatives = schema.get('anyOf') or schema.get('oneOf')
+    if alternatives:
+        kinds = set(_field_kind(alternative) for alternative in alternatives
+                    if not (isinstance(alternative, dict) and alternative.get('type') == 'null'))
+        return kinds.pop() if len(kinds) == 1 else None
+
+    properties = schema.get('properties')
+    if isinstance(properties, collections.Mapping):
+        if '$date' in properties:
+            return DATE
+        if '$ref' in properties or '$uri' in properties:
+            return REFERENCE  # a reference, or the schema of a resource, whose items are sent as references
+    if 'links' in schema:
+        return REFERENCE
+
+    if 'enum' in schema:
+        return SCALAR if all(not isinstance(value, (dict, list)) for value in schema['enum']) else None
+
+    types = schema.get('type')
+    if isinstance(types, six.string_types):
+        types = [types]
+    if types and _SCALAR_TYPES.issuperset(types):
+        return SCALAR
+    return None
+
+
+class _ChunkReader(object):
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        # returns as soon as some data is available so that the parser never waits for more than it needs
+        while size < 0 or not self._buffer:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
 
 
 class JSONSchemaReference(Reference):
+    _monitored = False  # schemas are resolved while they are loaded, not by the application
+
     @classmethod
     def _resolve(self, client, uri):
         return client.fetch(uri, cls=PotionJSONSchemaDecoder)
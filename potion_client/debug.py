@@ -0,0 +1,113 @@
+"""
+Detection of requests that are sent implicitly, and of N+1 request patterns.
+
+Reading a property of a reference that has not been resolved yet, such as ``user.group.name``, fetches the item
+behind it. In a loop over a list, this sends one request per item where a single query would have done. An
+:class:`IOMonitor` records these fetches, with the stack of each, and reports repeated single-item fetches of a
+resource from the same line of code as N+1 patterns::
+
+    with IOMonitor() as monitor:
+        names = [user.group.name for user in User.instances()]
+    print(monitor.report())
+
+In tests, a strict monitor raises :class:`ImplicitFetchError` in place of any implicit fetch::
+
+    with IOMonitor(strict=True):
+        render(users)
+"""
+import collections
+import os
+import threading
+import traceback
+
+from potion_client.exceptions import ImplicitFetchError
+
+Fetch = collections.namedtuple('Fetch', ['implicit', 'resource', 'uri', 'call_site', 'stack'])
+Fetch.__doc__ = """
+A fetch of a single item: either the implicit resolution of a reference, or a request of a ``self`` link.
+``call_site`` is the innermost frame of the stack outside of this package, as a ``(filename, lineno, name)`` tuple,
+and ``stack`` is the formatted stack.
+"""
+
+NPlusOne = collections.namedtuple('NPlusOne', ['resource', 'call_site', 'count', 'uris'])
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+_monitors = []
+_monitors_lock = threading.Lock()
+
+
+class IOMonitor(object):
+    """
+    Records the single-item fetches of all clients in all threads while it is active. Monitors can be nested.
+
+    :param bool strict: if true, implicit fetches raise an :class:`ImplicitFetchError` instead of sending a request.
+        Fetches through the ``self`` link, such as ``User.fetch(1)``, are explicit and are only recorded.
+    :param int threshold: the number of fetches of the same resource from the same line of code that are reported
+        as an N+1 pattern
+    """
+
+    def __init__(self, strict=False, threshold=3):
+        self.strict = strict
+        self.threshold = threshold
+        self.fetches = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with _monitors_lock:
+            _monitors.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _monitors_lock:
+            _monitors.remove(self)
+
+    @property
+    def implicit_fetches(self):
+        return [fetch for fetch in self.fetches if fetch.implicit]
+
+    def n_plus_one(self):
+        """
+        :return: a list of :class:`NPlusOne` patterns, the most frequent first
+        """
+        groups = collections.OrderedDict()
+        for fetch in self.fetches:
+            groups.setdefault((fetch.resource, fetch.call_site), []).append(fetch.uri)
+        patterns = [NPlusOne(resource, call_site, len(uris), uris)
+                    for (resource, call_site), uris in groups.items() if len(uris) >= self.threshold]
+        return sorted(patterns, key=lambda pattern: -pattern.count)
+
+    def report(self):
+        """
+        :return: a summary of the recorded fetches and N+1 patterns, with the stack of the first fetch of each
+        """
+        implicit = len(self.implicit_fetches)
+        lines = ['{} single-item fetches, {} of them implicit'.format(len(self.fetches), implicit)]
+        for pattern in self.n_plus_one():
+            filename, lineno, name = pattern.call_site
+            lines.append('N+1: {} fetches of {} from {}:{} in {}'.format(pattern.count, pattern.resource,
+                                                                        filename, lineno, name))
+            first = next(fetch for fetch in self.fetches
+                         if (fetch.resource, fetch.call_site) == (pattern.resource, pattern.call_site))
+            lines.extend('    ' + line for frame in first.stack for line in frame.rstrip('\n').split('\n'))
+        return '\n'.join(lines)
+
+    def _record(self, fetch):
+        if fetch.implicit and self.strict:
+            filename, lineno, name = fetch.call_site
+            raise ImplicitFetchError('Implicit fetch of {}({!r}) from {}:{} in {}'.format(
+                fetch.resource, fetch.uri, filename, lineno, name))
+        with self._lock:
+            self.fetches.append(fetch)
+
+
+def _observe(implicit, resource_cls, uri):
+    # Called before a single item is fetched while any monitor is active.
+    frames = traceback.extract_stack()[:-1]
+    call_site = next(((frame[0], frame[1], frame[2]) for frame in reversed(frames)
+                      if not os.path.abspath(frame[0]).startswith(_PACKAGE_DIR)), (None, None, None))
+    fetch = Fetch(implicit, resource_cls.__name__, uri, call_site, traceback.format_list(frames))
+    with _monitors_lock:
+        monitors = list(_monitors)
+    for monitor in monitors:
+        monitor._record(fetch)
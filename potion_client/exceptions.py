@@ -1,4 +1,10 @@
 
 
 class ItemNotFound(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class ImplicitFetchError(Exception):
+    """
+    Raised by a strict :class:`potion_client.debug.IOMonitor` in place of a request that resolves a reference.
+    """
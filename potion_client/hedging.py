@@ -0,0 +1,140 @@
+"""
+Hedged requests, which trade a few additional requests for a shorter tail latency.
+
+With a :class:`HedgingPolicy`, a GET request that has not been answered after the usual latency of its link, such as
+the 95th percentile of the latencies observed so far, is sent a second time. Whichever response arrives first is used
+and the other is discarded. Only GET requests are hedged, as they are safe to send twice, and a budget limits the
+share of requests that are hedged, so that a slow server is not put under twice the load::
+
+    client = Client('http://localhost/api', hedging=HedgingPolicy(percentile=95, budget=0.05))
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from timeit import default_timer
+import collections
+import math
+import os
+import threading
+
+
+class HedgingPolicy(object):
+    """
+    :param float percentile: the percentile of the observed latencies of a link after which a request is hedged
+    :param float budget: the share of requests that may be hedged
+    :param int min_samples: the number of latencies to observe for a link before its requests are hedged
+    :param int window: the number of recent latencies kept for each link
+    :param float min_delay: the shortest delay in seconds before a request is hedged
+    :param int max_workers: the number of threads that send requests
+    """
+
+    def __init__(self, percentile=95, budget=0.05, min_samples=20, window=200, min_delay=0.005, max_workers=16):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+
+        self.requests = 0
+        self.hedged = 0
+
+        self._lock = threading.Lock()
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self._tokens = 0.0
+        self._executor = None
+        self._pid = None
+
+    def delay(self, key):
+        """
+        :return: the time in seconds after which a request for a link is hedged, or ``None`` if too few of its
+            latencies have been observed
+        """
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            latencies = sorted(latencies)
+        index = max(0, int(math.ceil(self.percentile / 100.0 * len(latencies))) - 1)
+        return max(self.min_delay, latencies[index])
+
+    def record(self, key, latency):
+        with self._lock:
+            self._latencies[key].append(latency)
+
+    def send(self, key, send):
+        """
+        Calls ``send``, and calls it again if it has not returned within the delay for the link.
+
+        :param key: the link, or another key under which latencies are observed
+        :param callable send: sends the request and returns the response
+        :return: the first response
+        """
+        def timed_send():
+            started = default_timer()
+            response = send()
+            self.record(key, default_timer() - started)
+            return response
+
+        delay = self.delay(key)
+        with self._lock:
+            self.requests += 1
+            # unused budget accumulates up to what one window of requests would earn
+            self._tokens = min(self._tokens + self.budget, max(1.0, self.budget * self.window))
+
+        if delay is None:
+            return timed_send()
+
+        executor = self._get_executor()
+        first = executor.submit(timed_send)
+        if wait([first], timeout=delay).done or not self._spend():
+            return first.result()
+
+        second = executor.submit(timed_send)
+        futures = [first, second]
+        pending = set(futures)
+        winner = None
+        while winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [future for future in futures if future in done and future.exception() is None]
+            if succeeded:
+                winner = succeeded[0]
+            elif not pending:
+                winner = first  # both failed
+
+        for future in futures:
+            if future is not winner:
+                future.add_done_callback(_discard)
+        return winner.result()
+
+    def _spend(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def _get_executor(self):
+        # a forked child process cannot use the threads of its parent
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.max_workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def __getstate__(self):
+        return {'percentile': self.percentile,
+                'budget': self.budget,
+                'min_samples': self.min_samples,
+                'window': self.window,
+                'min_delay': self.min_delay,
+                'max_workers': self.max_workers}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+def _discard(future):
+    if future.exception() is None:
+        close = getattr(future.result(), 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,112 @@
+from requests import Response, Session
+from requests.hooks import dispatch_hook
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+#: the session options of :class:`potion_client.Client` that are passed on to :class:`httpx.Client`
+CLIENT_OPTIONS = ('verify', 'cert', 'timeout', 'trust_env')
+
+
+def _timeout(timeout):
+    # Requests takes a (connect, read) tuple where httpx takes a Timeout
+    if isinstance(timeout, tuple):
+        return httpx.Timeout(None, connect=timeout[0], read=timeout[1])
+    return timeout
+
+
+class _StreamReader(object):
+    """
+    File-like wrapper for a streamed :class:`httpx.Response`, used as :attr:`requests.Response.raw`.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = None
+        self._buffer = b''
+
+    def stream(self, amt=None, decode_content=True):
+        for chunk in self._response.iter_bytes(amt):
+            yield chunk
+
+    def read(self, amt=None):
+        if self._chunks is None:
+            self._chunks = self._response.iter_bytes()
+
+        while amt is None or len(self._buffer) < amt:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+
+        if amt is None:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        self._response.close()
+
+
+class HTTP2Session(Session):
+    """
+    A :class:`requests.Session` that sends its requests over HTTP/2 using `httpx <https://www.python-httpx.org>`_.
+
+    Requests are prepared by Requests as usual, so authentication, default headers, cookies and hooks work unchanged.
+    Concurrent requests from several threads to the same host are multiplexed over a single connection.
+
+    Connection settings such as ``verify``, ``cert``, ``timeout`` and ``proxy`` apply to the whole session and must be
+    given as keyword arguments, which are passed on to :class:`httpx.Client`. Pass ``http1=False`` to use HTTP/2
+    without TLS ("prior knowledge").
+    """
+
+    def __init__(self, **client_kwargs):
+        if httpx is None:
+            raise ImportError("HTTP/2 support requires httpx: pip install 'potion-client[http2]'")
+
+        super(HTTP2Session, self).__init__()
+        client_kwargs.setdefault('http2', True)
+        if 'timeout' in client_kwargs:
+            client_kwargs['timeout'] = _timeout(client_kwargs['timeout'])
+        self.http2_client = httpx.Client(**client_kwargs)
+
+    def send(self, request, stream=False, timeout=None, allow_redirects=True, **kwargs):
+        # requests without a timeout of their own use the timeout of the session
+        timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else _timeout(timeout)
+
+        # HTTP/2 has its own framing; a chunked body is sent as a stream of DATA frames.
+        headers = dict((k, v) for k, v in request.headers.items() if k.lower() != 'transfer-encoding')
+        http2_request = self.http2_client.build_request(request.method,
+                                                        request.url,
+                                                        headers=headers,
+                                                        content=request.body,
+                                                        timeout=timeout)
+        http2_response = self.http2_client.send(http2_request, stream=stream, follow_redirects=allow_redirects)
+
+        for cookie in http2_response.cookies.jar:
+            self.cookies.set_cookie(cookie)
+
+        response = Response()
+        response.status_code = http2_response.status_code
+        response.reason = http2_response.reason_phrase
+        response.headers = CaseInsensitiveDict(http2_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = str(http2_response.url)
+        response.request = request
+        response.connection = self
+        response.raw = _StreamReader(http2_response)
+
+        if not stream:
+            response._content = http2_response.content
+            response.elapsed = http2_response.elapsed
+
+        return dispatch_hook('response', request.hooks, response, **kwargs)
+
+    def close(self):
+        super(HTTP2Session, self).close()
+        self.http2_client.close()
@@ -1,11 +1,13 @@
 import json
 import re
+import zlib
 
 from requests import Request
 
-from potion_client import PotionJSONDecoder
-from potion_client.collection import PaginatedList
+from potion_client import PotionJSONDecoder, debug
+from potion_client.collection import PaginatedList, Query
 from potion_client.converter import PotionJSONEncoder
+from potion_client.profiler import phase
 from potion_client.schema import Schema
 
 
@@ -18,6 +20,21 @@ class Link(object):
         self.rel = rel
         self.schema = Schema(schema)
         self.target_schema = Schema(target_schema)
+        self.compress_threshold = None
+        self.stream_threshold = None
+        self.rate_limiter = None
+        self.hedging = None
+        self._serializer = None
+
+    @property
+    def serializer(self):
+        """
+        A function that selects the properties of an item to send with this link, compiled from its schema the first
+        time it is used. See :meth:`Schema.serializer`.
+        """
+        if self._serializer is None:
+            self._serializer = self.schema.serializer()
+        return self._serializer
 
     @property
     def requires_instance(self):
@@ -39,6 +56,9 @@ class LinkBinding(object):
         self.instance = instance
         self.owner = owner
 
+    def __reduce__(self):
+        return _restore_link_binding, (self.owner._client, self.owner._name, self.link.rel, self.instance)
+
     def request_factory(self, data, params):
         if self.instance is None:
             request_url = self.owner._client._root_url + self.link.href.format(**params)
@@ -60,24 +80,112 @@ class LinkBinding(object):
                           params={k: json.dumps(v, cls=PotionJSONEncoder)
                                   for k, v in request_params.items()})
         else:
+            headers = {'content-type': 'application/json'}
+            with phase(self.owner._client._profiler, 'encode'):
+                body = self._encode_body(request_data, headers)
             req = Request(self.link.method,
                           request_url,
-                          headers={'content-type': 'application/json'},
-                          data=json.dumps(request_data, cls=PotionJSONEncoder))
+                          headers=headers,
+                          data=body)
         return req
 
-    def make_request(self, data, params):
-        req = self.request_factory(data, params)
-        prepared_request = self.owner._client.session.prepare_request(req)
-
-        response = self.owner._client.session.send(prepared_request)
+    def _encode_body(self, data, headers):
+        """
+        Encodes a request body. Lists with at least ``stream_threshold`` items are encoded incrementally and sent
+        with chunked encoding; bodies of at least ``compress_threshold`` bytes, and all streamed bodies if a
+        ``compress_threshold`` is set, are compressed with gzip. Both thresholds are taken from the link or, if not set
+        there, from the client.
+        """
+        client = self.owner._client
+        compress_threshold = self.link.compress_threshold
+        if compress_threshold is None:
+            compress_threshold = client._compress_threshold
+        stream_threshold = self.link.stream_threshold
+        if stream_threshold is None:
+            stream_threshold = client._stream_threshold
+
+        if stream_threshold is not None and isinstance(data, (list, tuple)) and len(data) >= stream_threshold:
+            body = _join_chunks(chunk.encode('utf-8') for chunk in PotionJSONEncoder().iterencode(data))
+            if compress_threshold is not None:
+                headers['content-encoding'] = 'gzip'
+                body = _gzip_chunks(body)
+            return body
+
+        body = json.dumps(data, cls=PotionJSONEncoder)
+        if compress_threshold is not None and len(body) >= compress_threshold:
+            headers['content-encoding'] = 'gzip'
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            return compressor.compress(body.encode('utf-8')) + compressor.flush()
+        return body
+
+    def make_request(self, data, params, stream=False):
+        """
+        :param bool stream: if true, the response must be a JSON array; an iterator that decodes its items while they
+            are downloaded is returned in place of the response data
+        :return: a tuple of the response and the decoded response data
+        """
+        profiler = self.owner._client._profiler
+        if profiler is None:
+            return self._make_request(data, params, stream)
+        with profiler.phase('{}.{}'.format(self.owner.__name__, self.link.rel)):
+            return self._make_request(data, params, stream)
+
+    def _make_request(self, data, params, stream):
+        client = self.owner._client
+        with phase(client._profiler, 'request_factory'):
+            req = self.request_factory(data, params)
+        cache = client._cache
+
+        if debug._monitors and self.link.rel == 'self':
+            debug._observe(False, self.owner, req.url[len(client._root_url):])
+
+        cache_key = None
+        if cache is not None and self.link.method == 'GET' and not stream:
+            cache_key = (self.owner, self.link.rel, req.url, tuple(sorted(req.params.items())))
+            cached = cache.get(cache_key)
+            if cached is not None:
+                response, response_data = cached
+                # a copy, so that changes to the list do not change the entry
+                return response, list(response_data) if isinstance(response_data, list) else response_data
+
+        response = client._send(req, stream=stream, link=self.link)
 
         # return error for some error conditions
         response.raise_for_status()
 
-        return response, response.json(cls=PotionJSONDecoder,
-                                       client=self.owner._client,
-                                       default_instance=self.instance)
+        if cache is not None and self.link.method != 'GET':
+            cache.invalidate(self.owner)
+
+        if stream:
+            decoder = PotionJSONDecoder(client=client, default_instance=self.instance)
+            return response, decoder.iterdecode(_iter_content(response))
+
+        with phase(client._profiler, 'parse'):
+            response_data = response.json(cls=PotionJSONDecoder,
+                                          client=client,
+                                          default_instance=self.instance)
+        if cache_key is not None:
+            cache.set(cache_key, self.owner, (response, list(response_data) if isinstance(response_data, list)
+                                              else response_data))
+        return response, response_data
+
+    def where(self, *args, **kwargs):
+        """
+        :return: a lazy :class:`Query` on this link with the given filter conditions.
+        """
+        return Query(self).where(*args, **kwargs)
+
+    def sort(self, *args, **kwargs):
+        """
+        :return: a lazy :class:`Query` on this link with the given sort order.
+        """
+        return Query(self).sort(*args, **kwargs)
+
+    def per_page(self, per_page):
+        """
+        :return: a lazy :class:`Query` on this link with the given page size.
+        """
+        return Query(self).per_page(per_page)
 
     def __getattr__(self, item):
         return getattr(self.link, item)
@@ -95,4 +203,47 @@ class LinkBinding(object):
             return PaginatedList(self, params)
 
         response, response_data = self.make_request(data, params)
-        return response_data
\ No newline at end of file
+        return response_data
+
+
+def _iter_content(response, size=2 ** 16):
+    # urllib3 2.x can return data as soon as it arrives, whereas iter_content() waits until a chunk is full.
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None:
+        for chunk in response.iter_content(size):
+            yield chunk
+        return
+
+    while True:
+        chunk = read1(size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _join_chunks(chunks, size=2 ** 16):
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _restore_link_binding(client, name, rel, instance):
+    owner = client._resource_class(name)
+    return owner._links[rel].__get__(instance, owner)
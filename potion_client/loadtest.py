@@ -0,0 +1,363 @@
+"""
+Load testing of Flask-Potion APIs using the resource classes of a :class:`Client`.
+
+A workload is a list of weighted operations on resources. :func:`run` performs operations chosen at random according
+to their weight, either with a fixed number of concurrent workers or at a fixed rate, and returns a :class:`Report`
+with the throughput and latency of each link::
+
+    client = Client('http://localhost:5000/api')
+    report = run([Fetch(client.User, ids=range(1, 100), weight=10),
+                  Instances(client.User, per_page=50, weight=2),
+                  Create(client.User, lambda: {'name': 'load test'}),
+                  Update(client.User, ids=range(1, 100), properties=lambda: {'name': 'updated'})],
+                 concurrency=16, duration=30)
+    print(report)
+
+From the command line, the workload is read from a module with a ``workload(client)`` function::
+
+    python -m potion_client.loadtest http://localhost:5000/api myworkload --concurrency 16 --duration 30
+"""
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer
+import argparse
+import bisect
+import collections
+import importlib
+import itertools
+import math
+import random
+import sys
+import threading
+import time
+
+from potion_client import Client
+
+
+class Operation(object):
+    """
+    An operation of a workload. Subclasses implement :meth:`__call__`, which makes one or more requests and reports
+    the latency of each request to a :class:`Recorder`.
+
+    :param resource: a resource class, as created by :meth:`Client.resource_factory`
+    :param float weight: how often the operation is chosen relative to the other operations of the workload
+    """
+    rel = None
+
+    def __init__(self, resource, weight=1):
+        self.resource = resource
+        self.weight = weight
+
+    @property
+    def label(self):
+        return '{}.{}'.format(self.resource.__name__, self.rel)
+
+    def __call__(self, recorder, random):
+        raise NotImplementedError()
+
+
+class Fetch(Operation):
+    """
+    Fetches an item through the ``self`` link.
+
+    :param ids: the ids to choose from
+    """
+    rel = 'self'
+
+    def __init__(self, resource, ids, weight=1):
+        super(Fetch, self).__init__(resource, weight)
+        self.ids = list(ids)
+
+    def __call__(self, recorder, random):
+        id = random.choice(self.ids)
+        with recorder.measure(self.label):
+            self.resource._self(id=id)
+
+
+class Instances(Operation):
+    """
+    Reads pages of items through the ``instances`` link. Each page is measured as a request of its own.
+
+    :param int per_page:
+    :param int pages: the number of pages to read, starting from the first
+    :param dict where: a filter to apply
+    """
+    rel = 'instances'
+
+    def __init__(self, resource, per_page=20, pages=1, where=None, weight=1):
+        super(Instances, self).__init__(resource, weight)
+        self.per_page = per_page
+        self.pages = pages
+        self.where = where
+
+    def __call__(self, recorder, random):
+        params = {'per_page': self.per_page}
+        if self.where is not None:
+            params['where'] = self.where
+
+        for page in range(1, self.pages + 1):
+            with recorder.measure(self.label):
+                response, items = self.resource._instances.make_request(None, dict(params, page=page))
+            if len(items) < self.per_page:
+                break
+
+
+class Create(Operation):
+    """
+    Creates an item through the ``create`` link.
+
+    :param callable properties: returns the properties of a new item
+    """
+    rel = 'create'
+
+    def __init__(self, resource, properties, weight=1):
+        super(Create, self).__init__(resource, weight)
+        self.properties = properties
+
+    def __call__(self, recorder, random):
+        properties = self.properties()
+        with recorder.measure(self.label):
+            self.resource._create(**properties)
+
+
+class Update(Operation):
+    """
+    Updates an item through the ``update`` link.
+
+    :param ids: the ids to choose from
+    :param callable properties: returns the properties to change
+    """
+    rel = 'update'
+
+    def __init__(self, resource, ids, properties, weight=1):
+        super(Update, self).__init__(resource, weight)
+        self.ids = list(ids)
+        self.properties = properties
+
+    def __call__(self, recorder, random):
+        id = random.choice(self.ids)
+        properties = self.properties()
+        instance = self.resource(self.resource._self.href.format(id=id), **properties)
+        with recorder.measure(self.label):
+            instance._update(**properties)
+
+
+class LinkStats(object):
+    """
+    Latencies and errors of the requests made through one link.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    @property
+    def count(self):
+        return len(self.latencies) + self.errors
+
+    def percentile(self, p):
+        """
+        :param float p: a percentile from 0 to 100
+        :return: the latency in seconds below which ``p`` percent of successful requests completed
+        """
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[max(0, int(math.ceil(p / 100.0 * len(latencies))) - 1)]
+
+
+class Recorder(object):
+    """
+    Collects the latencies of requests from several threads.
+    """
+
+    def __init__(self):
+        self.stats = collections.defaultdict(LinkStats)
+        self._lock = threading.Lock()
+
+    def measure(self, label, started=None):
+        return _Measurement(self, label, started)
+
+    def record(self, label, latency=None):
+        with self._lock:
+            stats = self.stats[label]
+            if latency is None:
+                stats.errors += 1
+            else:
+                stats.latencies.append(latency)
+
+
+class _Measurement(object):
+    def __init__(self, recorder, label, started):
+        self.recorder = recorder
+        self.label = label
+        self.started = started
+
+    def __enter__(self):
+        if self.started is None:
+            self.started = default_timer()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.recorder.record(self.label, default_timer() - self.started)
+        else:
+            self.recorder.record(self.label)
+
+
+class Report(object):
+    """
+    The result of a load test.
+
+    :ivar float elapsed: the duration of the test in seconds
+    :ivar dict stats: a :class:`LinkStats` for each link, by label such as ``'User.self'``
+    """
+
+    def __init__(self, stats, elapsed):
+        self.stats = dict(stats)
+        self.elapsed = elapsed
+
+    def throughput(self, label=None):
+        """
+        :return: requests per second through one link, or through all links
+        """
+        if label is None:
+            count = sum(stats.count for stats in self.stats.values())
+        else:
+            count = self.stats[label].count
+        return count / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        lines = ['{:<28} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9}'.format('link', 'requests', 'errors', 'req/s',
+                                                                   'p50 ms', 'p95 ms', 'p99 ms')]
+        for label in sorted(self.stats):
+            stats = self.stats[label]
+            percentiles = [stats.percentile(p) for p in (50, 95, 99)]
+            lines.append('{:<28} {:>8} {:>7} {:>9.1f} {:>9} {:>9} {:>9}'.format(
+                label, stats.count, stats.errors, self.throughput(label),
+                *['-' if p is None else '{:.1f}'.format(p * 1000) for p in percentiles]))
+        lines.append('{} requests in {:.1f} s, {:.1f} req/s'.format(sum(s.count for s in self.stats.values()),
+                                                                  self.elapsed,
+                                                                  self.throughput()))
+        return '\n'.join(lines)
+
+
+def run(operations, concurrency=8, rate=None, duration=10.0, count=None, seed=None):
+    """
+    Performs the operations of a workload until ``duration`` seconds have passed or ``count`` operations have been
+    started.
+
+    Without a ``rate``, each of ``concurrency`` workers starts the next operation as soon as its previous one has
+    completed. With a ``rate``, operations are started at that many per second by up to ``concurrency`` workers; the
+    latency of an operation then includes the time it waited for a worker, so that a slow server is not hidden by a
+    backlog of operations.
+
+    :param list operations: a list of :class:`Operation`
+    :param int concurrency: the number of workers
+    :param float rate: operations to start per second
+    :param float duration: the maximum duration in seconds
+    :param int count: the maximum number of operations
+    :param seed: a seed for choosing operations, for repeatable tests
+    :rtype: Report
+    """
+    if not operations:
+        raise ValueError('The workload has no operations')
+
+    cumulative_weights = []
+    for operation in operations:
+        cumulative_weights.append(operation.weight + (cumulative_weights[-1] if cumulative_weights else 0))
+    total_weight = cumulative_weights[-1]
+    chooser = random.Random(seed)
+    chooser_lock = threading.Lock()
+
+    def choose():
+        with chooser_lock:
+            operation = operations[bisect.bisect_right(cumulative_weights, chooser.random() * total_weight)]
+            return operation, random.Random(chooser.random())
+
+    counter = itertools.count()
+    recorder = Recorder()
+    started = default_timer()
+    deadline = started + duration if duration is not None else None
+
+    def should_stop():
+        return (deadline is not None and default_timer() >= deadline) or (count is not None and next(counter) >= count)
+
+    def perform(operation, rng, scheduled_at=None):
+        operation_recorder = _OperationRecorder(recorder, scheduled_at)
+        try:
+            operation(operation_recorder, rng)
+        except Exception:
+            # failed requests have been counted by the recorder; other errors, such as in the properties of a new
+            # item, count as errors of the operation
+            if not operation_recorder.failed:
+                recorder.record(operation.label)
+
+    if rate is None:
+        def worker():
+            while not should_stop():
+                operation, rng = choose()
+                perform(operation, rng)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        with ThreadPoolExecutor(concurrency) as executor:
+            for i in itertools.count():
+                scheduled_at = started + i / float(rate)
+                delay = scheduled_at - default_timer()
+                if delay > 0:
+                    time.sleep(delay)
+                if should_stop():
+                    break
+                operation, rng = choose()
+                executor.submit(perform, operation, rng, scheduled_at)
+
+    return Report(recorder.stats, default_timer() - started)
+
+
+class _OperationRecorder(object):
+    # Records the requests of one operation, measuring the first from the time the operation was scheduled if given.
+    def __init__(self, recorder, scheduled_at=None):
+        self._recorder = recorder
+        self._scheduled_at = scheduled_at
+        self.failed = False
+
+    def measure(self, label, started=None):
+        scheduled_at, self._scheduled_at = self._scheduled_at, None
+        return _Measurement(self, label, started if started is not None else scheduled_at)
+
+    def record(self, label, latency=None):
+        if latency is None:
+            self.failed = True
+        self._recorder.record(label, latency)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m potion_client.loadtest',
+                                     description='Load test a Flask-Potion API.')
+    parser.add_argument('url', help='the root URL of the API')
+    parser.add_argument('workload', help='a module with a workload(client) function returning a list of operations')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rate', type=float, help='operations to start per second')
+    parser.add_argument('--duration', type=float, default=10.0, help='the duration of the test in seconds')
+    parser.add_argument('--count', type=int, help='the number of operations to perform')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, '')
+    workload = importlib.import_module(args.workload).workload
+    report = run(workload(Client(args.url)),
+                 concurrency=args.concurrency,
+                 rate=args.rate,
+                 duration=args.duration,
+                 count=args.count,
+                 seed=args.seed)
+    sys.stdout.write('{}\n'.format(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Page stores keep the pages of a :class:`PaginatedList`. By default, pages are kept in a dict. For random access over
+collections too large to keep in memory, a client can be created with a disk-backed store::
+
+    client = Client('http://localhost/api', page_store=SQLitePageStore)
+    users = client.User.instances(per_page=100)
+    users[123456]
+
+A page store is created for each list by calling ``page_store(client)``; use :func:`functools.partial` to change the
+options of a store.
+"""
+import collections
+import json
+import sqlite3
+import threading
+import uuid
+import zlib
+
+from potion_client.converter import PotionJSONEncoder, PotionJSONDecoder
+from potion_client.resource import Reference
+
+
+class SQLitePageStore(collections.MutableMapping):
+    """
+    Keeps the most recently used pages in memory and writes the others to an SQLite database, compressed. Pages that
+    are read again are decoded from the database; items that are still loaded elsewhere are reused as they are.
+
+    Pages are not included when a list is pickled; the copy fetches them again as needed.
+
+    :param Client client: the client to decode items with
+    :param str path: the path of the database file, which may be shared by several stores. The default is a temporary
+        file that is removed when the store is closed.
+    :param int memory_pages: the number of pages to keep in memory
+    :param int compress_level: the zlib compression level for pages on disk
+    """
+
+    def __init__(self, client, path='', memory_pages=64, compress_level=1):
+        self._client = client
+        self._path = path
+        self._memory_pages = memory_pages
+        self._compress_level = compress_level
+        self._lock = threading.RLock()
+        self._memory = collections.OrderedDict()
+        self._keys = set()
+        self._written = set()  # pages whose current items are in the database
+        self._encoder = PotionJSONEncoder()
+
+        self._table = table = 'pages_{}'.format(uuid.uuid4().hex)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('CREATE TABLE {} (page INTEGER PRIMARY KEY, data BLOB NOT NULL)'.format(table))
+
+    def __contains__(self, page):
+        return page in self._keys
+
+    def __getitem__(self, page):
+        with self._lock:
+            items = self._memory.pop(page, None)
+            if items is None:
+                row = self._connection.execute('SELECT data FROM {} WHERE page = ?'.format(self._table),
+                                               (page,)).fetchone()
+                if row is None:
+                    raise KeyError(page)
+                items = self._decode(row[0])
+            self._remember(page, items)
+            return items
+
+    def __setitem__(self, page, items):
+        with self._lock:
+            self._memory.pop(page, None)
+            self._written.discard(page)
+            self._remember(page, items)
+            self._keys.add(page)
+
+    def __delitem__(self, page):
+        with self._lock:
+            if page not in self._keys:
+                raise KeyError(page)
+            self._memory.pop(page, None)
+            with self._connection:
+                self._connection.execute('DELETE FROM {} WHERE page = ?'.format(self._table), (page,))
+            self._keys.discard(page)
+            self._written.discard(page)
+
+    def __iter__(self):
+        return iter(sorted(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _remember(self, page, items):
+        self._memory[page] = items
+        while len(self._memory) > self._memory_pages:
+            evicted, evicted_items = self._memory.popitem(last=False)
+            if evicted in self._written:
+                continue
+            with self._connection:
+                self._connection.execute('INSERT OR REPLACE INTO {} (page, data) VALUES (?, ?)'.format(self._table),
+                                         (evicted, sqlite3.Binary(self._encode(evicted_items))))
+            self._written.add(evicted)
+
+    def _encode(self, items):
+        data = [item._properties if isinstance(item, Reference) else item for item in items]
+        return zlib.compress(self._encoder.encode(data).encode('utf-8'), self._compress_level)
+
+    def _decode(self, data):
+        decoder = PotionJSONDecoder(client=self._client)
+        instances = self._client._instances
+        items = []
+        for item in json.loads(zlib.decompress(bytes(data)).decode('utf-8')):
+            instance = instances.get(item.get('$uri')) if isinstance(item, dict) else None
+            if instance is not None and instance._status is not None:
+                items.append(instance)  # may have changed since the page was written
+            else:
+                items.append(decoder._decode(item, 1))
+        return items
+
+    def close(self):
+        """
+        Removes the pages written to the database. A :class:`PaginatedList` closes its store when it is garbage
+        collected.
+        """
+        with self._lock:
+            if self._connection is None:
+                return
+            with self._connection:
+                self._connection.execute('DROP TABLE IF EXISTS {}'.format(self._table))
+            self._connection.close()
+            self._connection = None
+
+    def __reduce__(self):
+        return self.__class__, (self._client, self._path, self._memory_pages, self._compress_level)
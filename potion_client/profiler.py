@@ -0,0 +1,271 @@
+"""
+A profiler that attributes the time of a client, and optionally its allocations, to the phases of a request::
+
+    with client.profile(memory=True) as profile:
+        users = list(client.User.instances(per_page=100))
+    print(profile.summary())
+    profile.write_folded('users.folded')
+
+The phases are:
+
+- ``request_factory``: building the request for a link, including ``encode``, the encoding of the request body
+- ``prepare``: the preparation of the request by the transport
+- ``rate_limit``: waiting for a :class:`potion_client.ratelimit.RateLimiter`
+- ``network``: waiting for the response headers
+- ``download``: reading the response body. Transports that do not report when the headers arrived, such as
+  :class:`potion_client.transport.Urllib3Transport`, count the whole transfer as ``network``.
+- ``parse``: decoding the response text as JSON
+- ``decode``: converting the JSON to resources, dates and references, including ``identity_map``, the lookup and
+  creation of instances in :meth:`Client.instance`
+
+Each request through a link is a root phase named after it, such as ``User.instances``, whose own time is the
+overhead of the client around the other phases. Bodies that are streamed and items that are decoded lazily are read
+outside of these phases.
+
+The time of each phase excludes the phases within it; the time of concurrent threads is added up.
+"""
+from timeit import default_timer
+import collections
+import threading
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+
+class _Phase(object):
+    __slots__ = ('_profiler', '_name')
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler._enter(self._name)
+
+    def __exit__(self, *exc_info):
+        self._profiler._exit()
+
+
+class _NoPhase(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(profiler, name):
+    """
+    :param Profiler profiler: the profiler of a client, or ``None``
+    :return: a context manager that records the time spent in it as the phase ``name``
+    """
+    if profiler is None:
+        return _NO_PHASE
+    return _Phase(profiler, name)
+
+
+class Profiler(object):
+    """
+    Profiles the requests of a client while it is active. Use :meth:`Client.profile` to create one.
+
+    :param Client client:
+    :param bool memory: if true, allocations are traced with :mod:`tracemalloc` and attributed to the phases and to the
+        resource classes whose items allocated them. This slows the client down considerably.
+    """
+
+    def __init__(self, client, memory=False):
+        if memory and tracemalloc is None:
+            raise ImportError('Profiling memory requires tracemalloc, which is part of Python 3.4 and later')
+        self.memory = memory
+        self.wall_time = None
+        self._client = client
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._times = collections.defaultdict(float)  # folded stack -> seconds
+        self._allocated = collections.defaultdict(int)  # folded stack -> bytes
+        self._calls = collections.Counter()  # phase -> calls
+        self._resource_memory = collections.defaultdict(int)  # resource class name -> bytes
+        self._previous = None
+        self._tracing = False
+        self._start = None
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._previous = self._client._profiler
+        self._client._profiler = self
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_time = default_timer() - self._start
+        self._client._profiler = self._previous
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def _traced(self):
+        return tracemalloc.get_traced_memory()[0] if self.memory else 0
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def _enter(self, name):
+        # a frame is [name, start time, traced memory at start, time of inner phases, memory of inner phases]
+        self._stack().append([name, default_timer(), self._traced(), 0.0, 0])
+
+    def _exit(self, split=None):
+        """
+        :param tuple split: a phase and the time of the current phase after which the rest of its time is attributed
+            to that phase, along with the memory allocated within it
+        """
+        end, traced = default_timer(), self._traced()
+        stack = self._stack()
+        name, start, start_traced, inner_time, inner_allocated = stack.pop()
+        elapsed, allocated = end - start, traced - start_traced
+        if stack:
+            stack[-1][3] += elapsed
+            stack[-1][4] += allocated
+
+        path = tuple(frame[0] for frame in stack)
+        own_time, own_allocated = elapsed - inner_time, allocated - inner_allocated
+        with self._lock:
+            if split is not None and 0 < split[1] < own_time:
+                rest, first = split
+                self._add(path + (rest,), own_time - first, own_allocated)
+                own_time, own_allocated = first, 0
+            self._add(path + (name,), own_time, own_allocated)
+
+    def _add(self, path, seconds, allocated):
+        self._times[path] += seconds
+        self._allocated[path] += allocated
+        self._calls[path[-1]] += 1
+
+    def transfer(self, send):
+        """
+        Calls ``send`` and records its time as ``network`` until the response headers arrived, as given by the
+        ``elapsed`` time of the response, and as ``download`` after.
+
+        :return: the response
+        """
+        self._enter('network')
+        response = None
+        try:
+            response = send()
+            return response
+        finally:
+            elapsed = getattr(response, 'elapsed', None)
+            self._exit(('download', elapsed.total_seconds()) if elapsed else None)
+
+    def _enter_resource(self, cls):
+        """
+        Starts attributing allocations to the items of a resource class, until :meth:`_exit_resource`.
+
+        :return: a mark to pass to :meth:`_exit_resource`, or ``None`` if memory is not profiled
+        """
+        if not self.memory:
+            return None
+        try:
+            resources = self._local.resources
+        except AttributeError:
+            resources = self._local.resources = []
+        mark = [cls.__name__, self._traced(), 0]
+        resources.append(mark)
+        return mark
+
+    def _exit_resource(self, mark):
+        resources = self._local.resources
+        resources.pop()
+        allocated = self._traced() - mark[1]
+        if resources:
+            resources[-1][2] += allocated
+        with self._lock:
+            self._resource_memory[mark[0]] += allocated - mark[2]
+
+    def phases(self):
+        """
+        :return: a dict of the time in seconds, the number of calls and the bytes allocated in each phase
+        """
+        phases = {}
+        with self._lock:
+            for path, seconds in self._times.items():
+                name = path[-1]
+                total = phases.setdefault(name, {'time': 0.0, 'calls': self._calls[name], 'allocated': 0})
+                total['time'] += seconds
+                total['allocated'] += self._allocated[path]
+        return phases
+
+    def resource_memory(self):
+        """
+        :return: a dict of the bytes allocated while decoding the items of each resource class, excluding the items
+            nested within them. Empty unless memory is profiled.
+        """
+        with self._lock:
+            return dict(self._resource_memory)
+
+    def summary(self):
+        """
+        :return: a table of the phases, the most time-consuming first, and of the memory of each resource class
+        """
+        phases = self.phases()
+        total = sum(phase['time'] for phase in phases.values())
+        lines = []
+        if self.wall_time is not None:
+            lines.append('wall time {:.3f}s, {:.3f}s in client phases'.format(self.wall_time, total))
+
+        columns = '{:<28} {:>8} {:>10} {:>7}'
+        header = columns.format('phase', 'calls', 'time (s)', 'share')
+        if self.memory:
+            header += ' {:>15}'.format('allocated (KiB)')
+        lines.append(header)
+        for name, phase in sorted(phases.items(), key=lambda item: -item[1]['time']):
+            line = columns.format(name, phase['calls'], '{:.4f}'.format(phase['time']),
+                                  '{:.1%}'.format(phase['time'] / total if total else 0))
+            if self.memory:
+                line += ' {:>15.1f}'.format(phase['allocated'] / 1024.0)
+            lines.append(line)
+
+        resource_memory = self.resource_memory()
+        if resource_memory:
+            lines.append('')
+            lines.append('{:<28} {:>15}'.format('resource', 'allocated (KiB)'))
+            for name, allocated in sorted(resource_memory.items(), key=lambda item: -item[1]):
+                lines.append('{:<28} {:>15.1f}'.format(name, allocated / 1024.0))
+        return '\n'.join(lines)
+
+    def folded(self, memory=False):
+        """
+        :param bool memory: if true, the bytes allocated are given in place of the time
+        :return: the phases as folded stacks, one ``root;phase;inner-phase count`` line for each, as read by
+            ``flamegraph.pl`` and speedscope. Counts are in microseconds or bytes.
+        """
+        lines = []
+        with self._lock:
+            for path in sorted(self._times):
+                count = self._allocated[path] if memory else int(round(self._times[path] * 1e6))
+                if count > 0:
+                    lines.append('{} {}'.format(';'.join(path), count))
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write_folded(self, path, memory=False):
+        """
+        Writes :meth:`folded` to a file.
+
+        :param str path:
+        :param bool memory:
+        """
+        with open(path, 'w') as f:
+            f.write(self.folded(memory))
@@ -0,0 +1,167 @@
+"""
+Client-side rate limiting that adapts to the limits of the server.
+
+A :class:`RateLimiter` delays requests so that they are sent no faster than its current rate. The rate adapts to the
+responses of the server:
+
+- A ``429 Too Many Requests`` response halves the rate, measured from the requests actually sent, and pauses all
+  requests for as long as its ``Retry-After`` header asks. The request is then sent again, up to ``max_retries``
+  times.
+- ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset`` headers cap the rate so that the remaining requests are spread
+  until the limit resets, and pause requests once none are left.
+- Every successful response raises the rate a little, so that the client returns to the highest rate the server
+  allows.
+
+A limiter is set for all requests of a client with ``Client(..., rate_limit=...)``, or for the requests of a single
+link with :attr:`Link.rate_limiter`. A limiter may be shared between threads and clients.
+"""
+from email.utils import parsedate_tz, mktime_tz
+from timeit import default_timer
+import collections
+import threading
+import time
+
+_EPOCH_THRESHOLD = 10 ** 9  # X-RateLimit-Reset values above this are timestamps rather than seconds
+
+
+class RateLimiter(object):
+    """
+    A token bucket with an adaptive rate.
+
+    :param float rate: the initial rate in requests per second, or ``None`` to send requests without delay until the
+        server asks for fewer
+    :param float max_rate: the highest rate to return to after the rate has been reduced; defaults to ``rate``, or no
+        limit if ``rate`` is ``None``
+    :param float min_rate: the lowest rate in requests per second
+    :param int burst: the number of requests that may be sent at once after a quiet period
+    :param float increase: how much the rate grows per second of successful requests
+    :param int max_retries: how often a request that received a 429 response is sent again
+    :param float retry_after: the pause in seconds after a 429 response without a ``Retry-After`` header
+    """
+
+    def __init__(self, rate=None, max_rate=None, min_rate=0.1, burst=1, increase=1.0, max_retries=5, retry_after=1.0):
+        self.rate = self._initial_rate = rate
+        self.max_rate = rate if max_rate is None else max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.increase = increase
+        self.max_retries = max_retries
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = default_timer()
+        self._paused_until = 0.0
+        self._sent = collections.deque(maxlen=64)
+
+    def acquire(self):
+        """
+        Waits until a request may be sent.
+        """
+        with self._lock:
+            now = default_timer()
+            start = max(now, self._paused_until)
+            if self.rate is None:
+                delay = start - now
+            else:
+                # tokens may go negative, which reserves a place for the caller after those already waiting
+                self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                self._tokens -= 1
+                delay = max(start - now, -self._tokens / self.rate if self._tokens < 0 else 0.0)
+            self._sent.append(now + delay)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, response):
+        """
+        Adapts the rate to a response.
+
+        :param requests.Response response:
+        :return: true if the request was throttled and should be sent again
+        """
+        headers = response.headers
+        now = default_timer()
+
+        with self._lock:
+            if response.status_code == 429:
+                rate = self._observed_rate(now)
+                if rate is not None:
+                    self._set_rate(rate / 2.0)
+                delay = _parse_retry_after(headers.get('Retry-After'))
+                self._pause(now + (self.retry_after if delay is None else delay))
+                return True
+
+            if self.rate is not None:
+                self._set_rate(self.rate + self.increase / self.rate)
+
+            remaining = _parse_number(headers.get('X-RateLimit-Remaining'))
+            reset = _parse_number(headers.get('X-RateLimit-Reset'))
+            if remaining is not None and reset is not None:
+                if reset > _EPOCH_THRESHOLD:
+                    reset -= time.time()
+                reset = max(reset, 0.0)
+                if remaining < 1:
+                    self._pause(now + reset)
+                elif reset > 0 and (self.rate is None or self.rate > remaining / reset):
+                    self.rate = max(self.min_rate, remaining / reset)
+            return False
+
+    def _observed_rate(self, now):
+        # the rate at which requests were actually sent, which may be lower than the rate of the limiter; None until
+        # enough requests have been sent to tell
+        rates = [] if self.rate is None else [self.rate]
+        if len(self._sent) > 1:
+            rates.append(len(self._sent) / max(now - self._sent[0], 1e-3))
+        return min(rates) if rates else None
+
+    def _set_rate(self, rate):
+        rate = max(self.min_rate, rate)
+        if self.max_rate is not None:
+            rate = min(self.max_rate, rate)
+        if self.rate is None:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = default_timer()
+        self.rate = rate
+
+    def _pause(self, until):
+        self._paused_until = max(self._paused_until, until)
+
+    def __getstate__(self):
+        # the state of the bucket is not sent to other processes, which start with the configured rate
+        return {'rate': self._initial_rate,
+                'max_rate': self.max_rate,
+                'min_rate': self.min_rate,
+                'burst': self.burst,
+                'increase': self.increase,
+                'max_retries': self.max_retries,
+                'retry_after': self.retry_after}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return '{}(rate={})'.format(self.__class__.__name__, self.rate)
+
+
+def _parse_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_retry_after(value):
+    """
+    :return: the delay in seconds from a ``Retry-After`` header, which is either a number of seconds or an HTTP date
+    """
+    if value is None:
+        return None
+    delay = _parse_number(value)
+    if delay is None:
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        delay = mktime_tz(date) - time.time()
+    return max(delay, 0.0)
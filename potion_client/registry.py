@@ -0,0 +1,130 @@
+"""
+A registry of resource classes shared by the clients of an API.
+
+A service that creates a client for each user or tenant, each with its own authentication, would otherwise fetch the
+schemas of the API and build its resource classes once per client. Clients created with the same registry share one
+set of classes and links for each API and schema version; each client subclasses the shared classes and keeps its own
+session and instances::
+
+    registry = SchemaRegistry()
+
+    def client_for(tenant):
+        return Client('http://localhost/api', registry=registry, auth=tenant.auth)
+
+The schemas in the registry are plain dicts that do not refer to any client: all schemas they reference are fetched
+while the classes are built, so that no client ever resolves a reference through the session of another.
+
+By default, the root schema is fetched by every client, and its ``ETag`` header, or a hash of its content if there is
+none, decides the version. If the version of the schema is known in advance, it can be passed as ``schema_version``
+and clients after the first are created without any requests.
+"""
+import collections
+import hashlib
+import threading
+
+from potion_client.resource import Reference
+from potion_client.utils import SingleFlight
+
+
+class SchemaRegistry(object):
+    """
+    Resource classes by API and schema version. A registry may be shared between threads; concurrent clients that
+    find no classes for their API build them only once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._builds = SingleFlight()
+
+    def templates(self, client, version=None):
+        """
+        Returns the shared resource classes for the API of a client, fetching its schemas and building the classes if
+        they are not in the registry yet. The classes are not bound to any client.
+
+        :param Client client:
+        :param str version: the version of the schema, or ``None`` to take it from the root schema
+        :return: an ordered dict of resource classes by resource name
+        """
+        response = None
+        if version is None:
+            response = client.transport.get(client._schema_url)
+            version = response.headers.get('ETag') or hashlib.sha1(response.content).hexdigest()
+
+        key = (client._schema_url, version)
+        with self._lock:
+            templates = self._entries.get(key)
+        if templates is not None:
+            return templates
+        return self._builds.do(key, self._build, client, key, response)
+
+    def _build(self, client, key, response):
+        with self._lock:
+            templates = self._entries.get(key)
+        if templates is not None:
+            return templates
+
+        if response is None:
+            response = client.transport.get(client._schema_url)
+        schema = client._load_schema(response)
+        _resolve_references(schema)
+        schema = _detach(schema, {})
+
+        templates = collections.OrderedDict()
+        for name, resource_schema in schema['properties'].items():
+            templates[name] = client._build_resource_class(name, resource_schema)
+
+        with self._lock:
+            self._entries[key] = templates
+        return templates
+
+    def clear(self):
+        """
+        Removes all classes from the registry. Clients that have already been created keep their classes.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _resolve_references(schema):
+    # Resolves the references the root schema does not list, such as those in the schema of a resource to schemas of
+    # their own, which would otherwise be resolved later through the client that built the classes.
+    pending = [schema]
+    seen = set()
+    while pending:
+        value = pending.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, Reference):
+            pending.append(value._properties)
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+
+
+def _detach(value, memo):
+    # Copies the resolved schema references into plain dicts so that the shared schemas do not refer to the client that
+    # fetched them.
+    if isinstance(value, Reference):
+        properties = value._properties
+        if id(value) not in memo:
+            memo[id(value)] = _detach(properties, memo)
+        return memo[id(value)]
+    if isinstance(value, dict):
+        try:
+            return memo[id(value)]
+        except KeyError:
+            pass
+        detached = memo[id(value)] = {}
+        for k, v in value.items():
+            detached[k] = _detach(v, memo)
+        return detached
+    if isinstance(value, list):
+        return [_detach(v, memo) for v in value]
+    return value
@@ -0,0 +1,270 @@
+import collections
+import json
+import sqlite3
+import threading
+
+from potion_client.collection import Query
+from potion_client.converter import PotionJSONEncoder, PotionJSONDecoder
+from potion_client.exceptions import ItemNotFound
+
+_SQL_OPERATORS = {
+    '$eq': '=',
+    '$ne': '!=',
+    '$lt': '<',
+    '$lte': '<=',
+    '$gt': '>',
+    '$gte': '>=',
+}
+
+
+class Replica(object):
+    """
+    A local copy of the items of one or more resources, kept in an SQLite database.
+
+    :meth:`sync` loads all items of a resource through its ``instances`` link the first time it is called, and from
+    then on only the items whose ``updated_at`` property is at or after the latest value seen so far. Items deleted on
+    the server are only removed by a full reload with ``sync(full=True)``.
+
+    :meth:`query` returns a :class:`ReplicaQuery` that is answered from the database. Items are returned as instances
+    of their resource, shared with the rest of the client like the items of any other response. Writes are not
+    affected by the replica and go to the API as usual.
+
+    A replica may be shared between threads. Reads are not blocked while a sync fetches items from the API, only while
+    it writes them.
+
+    :param Client client:
+    :param str path: the path of the database file. The default keeps the database in memory.
+    :param resources: resources to replicate; more can be added with :meth:`add`
+    :param str updated_at: the property holding the time each item was last changed
+    :param int per_page: the page size used when syncing
+    """
+
+    def __init__(self, client, path=':memory:', resources=(), updated_at='updated_at', per_page=100):
+        self._client = client
+        self._updated_at = updated_at
+        self._per_page = per_page
+        self._resources = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # syncs run one at a time, so that they do not overwrite newer items
+        self._encoder = PotionJSONEncoder()
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS items ('
+                                     'resource TEXT NOT NULL, '
+                                     'uri TEXT PRIMARY KEY, '
+                                     'data TEXT NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS items_resource ON items (resource)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta ('
+                                     'resource TEXT PRIMARY KEY, '
+                                     'watermark TEXT)')
+
+        for resource in resources:
+            self.add(resource)
+
+    def add(self, resource):
+        """
+        :param resource: a resource class with an ``instances`` link
+        """
+        if resource._instances is None:
+            raise ValueError("'{}' has no 'instances' link".format(resource.__name__))
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR IGNORE INTO meta (resource) VALUES (?)', (resource._name,))
+            self._resources[resource._name] = resource
+
+    def sync(self, resource=None, full=False):
+        """
+        Brings the replica up to date with the API.
+
+        :param resource: the resource to sync, or ``None`` for all resources of the replica
+        :param bool full: if true, all items are loaded again, removing any that no longer exist
+        :return: the number of items loaded
+        """
+        resources = list(self._resources.values()) if resource is None else [self._resources[resource._name]]
+        return sum(self._sync(resource, full) for resource in resources)
+
+    def _sync(self, resource, full):
+        with self._sync_lock:
+            watermark = None
+            if not full:
+                with self._lock:
+                    row = self._connection.execute('SELECT watermark FROM meta WHERE resource = ?',
+                                                   (resource._name,)).fetchone()
+                if row and row[0] is not None:
+                    watermark = self._decode(row[0])
+
+            query = resource._instances.per_page(self._per_page)
+            if watermark is not None:
+                # items changed at the same time as the watermark may not have been seen yet, so they are loaded again
+                query = query.where({self._updated_at: {'$gte': watermark}})
+
+            # the items are fetched without holding the lock, so that reads are answered in the meantime
+            rows = []
+            for item in query.all():
+                rows.append((resource._name, item._uri, self._encode(item._properties)))
+                # read through the item, so that a lazily decoded date is decoded
+                updated_at = item.get(self._updated_at)
+                if updated_at is not None and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+
+            with self._lock, self._connection:
+                if full:
+                    self._connection.execute('DELETE FROM items WHERE resource = ?', (resource._name,))
+                self._connection.executemany('INSERT OR REPLACE INTO items (resource, uri, data) VALUES (?, ?, ?)',
+                                             rows)
+                self._connection.execute('UPDATE meta SET watermark = ? WHERE resource = ?',
+                                         (None if watermark is None else self._encode(watermark), resource._name))
+            return len(rows)
+
+    def query(self, resource):
+        """
+        :param resource: a resource class of the replica
+        :rtype: ReplicaQuery
+        """
+        if resource._name not in self._resources:
+            raise KeyError("'{}' is not replicated".format(resource.__name__))
+        return ReplicaQuery(self, resource)
+
+    def get(self, resource, id):
+        """
+        :return: the item of a resource with the given id
+        :raises ItemNotFound: if the item is not in the replica
+        """
+        uri = resource._self.href.format(id=id)
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM items WHERE uri = ?', (uri,)).fetchone()
+        if row is None:
+            raise ItemNotFound("No '{}' item found with id {}".format(resource.__name__, repr(id)))
+        return self._decode(row[0])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _encode(self, value):
+        return self._encoder.encode(value)
+
+    def _decode(self, data):
+        # decoded items are registered with the client, so that each item exists only once
+        return json.loads(data, cls=PotionJSONDecoder, client=self._client)
+
+    def _select(self, resource, columns, where, sort, limit=None):
+        sql = 'SELECT {} FROM items WHERE resource = ?'.format(columns)
+        params = [resource._name]
+
+        for name, condition in where.items():
+            if not (isinstance(condition, dict) and condition and
+                    all(key.startswith('$') and key not in ('$date', '$ref') for key in condition)):
+                condition = {'$eq': condition}
+            for operator, value in sorted(condition.items()):
+                condition_sql, condition_params = self._condition(name, operator, value)
+                sql += ' AND ' + condition_sql
+                params.extend(condition_params)
+
+        if sort:
+            # dates are sorted by their timestamp
+            sql += ' ORDER BY ' + ', '.join('coalesce(json_extract(data, ?), json_extract(data, ?)) {}'.format(
+                'DESC' if descending else 'ASC') for descending in sort.values())
+            for name in sort:
+                params.extend([u'$."{}"."$date"'.format(name), u'$."{}"'.format(name)])
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(limit)
+
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _condition(self, name, operator, value):
+        if operator in _SQL_OPERATORS:
+            path, value = self._path(name, value)
+            if value is None:
+                return 'json_extract(data, ?) IS {}NULL'.format('NOT ' if operator == '$ne' else ''), [path]
+            return 'json_extract(data, ?) {} ?'.format(_SQL_OPERATORS[operator]), [path, value]
+        if operator == '$in':
+            paths_values = [self._path(name, v) for v in value]
+            if not paths_values:
+                return '0', []
+            return '(' + ' OR '.join('json_extract(data, ?) = ?' for _ in paths_values) + ')', \
+                [p for path_value in paths_values for p in path_value]
+        if operator == '$between':
+            (path, low), (_, high) = self._path(name, value[0]), self._path(name, value[1])
+            return 'json_extract(data, ?) BETWEEN ? AND ?', [path, low, high]
+
+        path, value = self._path(name, value)
+        if operator == '$startswith':
+            return "substr(json_extract(data, ?), 1, length(?)) = ?", [path, value, value]
+        if operator == '$endswith':
+            return "substr(json_extract(data, ?), -length(?)) = ?", [path, value, value]
+        if operator == '$contains':
+            # matches an item of an array, or a substring of a string
+            property_path = u'$."{}"'.format(name)
+            if path == property_path:
+                element_sql = 'value = ?'
+                element_params = [value]
+            else:
+                element_sql = 'json_extract(value, ?) = ?'
+                element_params = [u'$' + path[len(property_path):], value]
+            return "(CASE json_type(data, ?) " \
+                   "WHEN 'array' THEN EXISTS (SELECT 1 FROM json_each(data, ?) WHERE {}) " \
+                   "ELSE instr(json_extract(data, ?), ?) > 0 END)".format(element_sql), \
+                [property_path, property_path] + element_params + [path, value]
+        if operator in ('$istartswith', '$iendswith', '$icontains'):
+            pattern = {'$istartswith': u'{}%', '$iendswith': u'%{}', '$icontains': u'%{}%'}[operator]
+            escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return "json_extract(data, ?) LIKE ? ESCAPE '\\'", [path, pattern.format(escaped)]
+        raise ValueError("Operator '{}' is not supported by the replica".format(operator))
+
+    def _path(self, name, value):
+        """
+        :return: the JSON path of a property and the value to compare it with, which for dates and references is the
+            timestamp or URI they are encoded as.
+        """
+        path = u'$."{}"'.format(name)
+        value = self._encoder._transform(value)
+        if isinstance(value, dict) and len(value) == 1:
+            key, inner = next(iter(value.items()))
+            if key in ('$date', '$ref'):
+                return u'{}."{}"'.format(path, key), inner
+        if isinstance(value, (dict, list)):
+            raise ValueError("Cannot compare '{}' with {}".format(name, repr(value)))
+        return path, value
+
+
+class ReplicaQuery(Query):
+    """
+    A query on the items of a :class:`Replica`, with the same interface as :class:`Query`. Filter conditions support
+    the ``eq``, ``ne``, ``lt``, ``lte``, ``gt``, ``gte``, ``in``, ``between``, ``startswith``, ``endswith``,
+    ``contains`` operators and their case-insensitive variants.
+    """
+
+    def __init__(self, replica, resource, where=None, sort=None, per_page=None):
+        super(ReplicaQuery, self).__init__(None, where, sort, per_page)
+        self._replica = replica
+        self._resource = resource
+
+    def _clone(self, **kwargs):
+        state = dict(where=self._where, sort=self._sort, per_page=self._per_page)
+        state.update(kwargs)
+        return ReplicaQuery(self._replica, self._resource, **state)
+
+    def _select(self, columns='data', limit=None):
+        return self._replica._select(self._resource, columns, self._where, self._sort, limit)
+
+    def all(self):
+        return [self._replica._decode(data) for data, in self._select()]
+
+    def count(self):
+        return self._select('COUNT(*)')[0][0]
+
+    def exists(self):
+        return len(self._select('1', limit=1)) > 0
+
+    def first(self):
+        rows = self._select(limit=1)
+        if not rows:
+            raise ItemNotFound("No '{}' item found matching: {}".format(self._resource.__name__,
+                                                                         repr(self._params())))
+        return self._replica._decode(rows[0][0])
+
+    def __repr__(self):
+        return 'ReplicaQuery({params})'.format(params=', '.join(
+            [self._resource.__name__] + ['{}={}'.format(k, repr(v)) for k, v in self._params().items()]), )
@@ -3,7 +3,9 @@ from pprint import pformat
 
 import six
 
+from potion_client import debug
 from potion_client.exceptions import ItemNotFound
+from potion_client.scan import parallel_scan
 from potion_client.utils import escape
 
 
@@ -24,12 +26,14 @@ class Reference(collections.Mapping):
     any of the other types.
     """
     _client = None
-    __properties = None
+    _lazy = None
+    _monitored = True  # whether resolution is recorded by a debug.IOMonitor
+    _property_values = None  # the stored properties, read without resolving the reference
 
     def __init__(self, uri, client=None):
         self._status = None
         self._uri = uri
-        self.__properties = {'$uri': uri}
+        self._property_values = {'$uri': uri}
         if client is not None:
             self._client = client
 
@@ -39,20 +43,87 @@ class Reference(collections.Mapping):
 
     @property
     def _properties(self):
+        # concurrent resolution of the same reference is merged into a single request in Client.fetch()
         if self._uri and self._status is None:
-            self.__properties = self._resolve(self._client, self._uri)
-        return self.__properties
+            if debug._monitors and self._monitored:
+                debug._observe(True, self.__class__, self._uri)
+            self._property_values = self._resolve(self._client, self._uri)
+            self._status = 200
+        return self._property_values
 
     @_properties.setter
     def _properties(self, value):
-        self.__properties = value
+        self._property_values = value
+        self._lazy = None
         self._status = 200
 
+    def _update_properties(self, properties, lazy=None):
+        """
+        Updates the properties of a resolved reference with those of a response.
+
+        :param dict properties:
+        :param dict lazy: the properties that have not been decoded yet, with the decoder for each
+        """
+        current = self._lazy
+        if lazy:
+            # pending values are published before the raw values so that readers never see an unmarked raw value
+            self._lazy = dict(current or {}, **lazy)
+        pending = dict(lazy or {})
+        if current is not None:
+            pending.update((key, decoder) for key, decoder in current.items() if key not in properties)
+        self._property_values.update(properties)
+        self._lazy = pending or None
+
+    def _decode_property(self, item, lazy):
+        """
+        :param dict lazy: the pending values, as read once by the caller; another thread may have decoded the value
+            since, in which case it is returned as it is.
+        """
+        # Concurrent reads may decode the same value twice, which gives the same result.
+        decoder = lazy.get(item)
+        if decoder is None:
+            return self._property_values[item]
+        value = self._property_values[item] = decoder._decode(self._property_values[item], 1)
+        lazy.pop(item, None)
+        if not lazy and self._lazy is lazy:
+            self._lazy = None
+        return value
+
+    def _discard_lazy(self, keys):
+        lazy = self._lazy
+        if lazy is not None:
+            for key in keys:
+                lazy.pop(key, None)
+            if not lazy:
+                self._lazy = None
+
+    def __reduce__(self):
+        return _restore_reference, (self._client, self.__class__, self._uri), self.__getstate__()
+
+    def __getstate__(self):
+        # state is not included for unresolved references so that pickling never causes a fetch
+        if self._uri and self._status is None:
+            return None
+        lazy = self._lazy
+        for item in list(lazy or ()):
+            self._decode_property(item, lazy)
+        return {'status': self._status, 'properties': self._property_values}
+
+    def __setstate__(self, state):
+        # an instance that already exists in this process is kept as it is
+        if state is not None and self._status is None:
+            self._property_values = state['properties']
+            self._status = state['status']
+
     def __contains__(self, item):
         return item in self._properties
 
     def __getitem__(self, item):
-        return self._properties[item]
+        properties = self._properties
+        lazy = self._lazy
+        if lazy is not None and item in lazy:
+            return self._decode_property(item, lazy)
+        return properties[item]
 
     def __iter__(self):
         return iter(self._properties)
@@ -60,6 +131,31 @@ class Reference(collections.Mapping):
     def __len__(self):
         return len(self._properties)
 
+    def __bool__(self):
+        # every reference has at least a '$uri' property; checking for one must not resolve it
+        return True
+
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        # references are the same item when they have the same URI, so comparing them never fetches either;
+        # a reference is compared with other mappings by its properties
+        if not isinstance(other, Reference):
+            return collections.Mapping.__eq__(self, other)
+        if self._uri is None or other._uri is None:
+            return self is other
+        return self._uri == other._uri
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        # NOTE the hash of an item without a URI changes when it is saved
+        if self._uri is None:
+            return id(self)
+        return hash(self._uri)
+
     def __repr__(self):
         return '{cls}({uri})'.format(cls=self.__class__.__name__,
                                      uri=repr(self._uri))
@@ -67,6 +163,8 @@ class Reference(collections.Mapping):
 
 class Resource(Reference):
     _client = None
+    _name = None
+    _resource_cls = None
     _links = None
     _self = None
     _instances = None
@@ -75,26 +173,20 @@ class Resource(Reference):
     _update = None
 
     def __new__(cls, uri=None, **kwargs):
-        instance = None
-        if uri is not None:
-            if not (isinstance(uri, six.string_types) and uri.startswith('/')) and cls._self is not None:
-                uri = cls._self.href.format(id=uri)
+        if uri is None:
+            return cls._new(uri, kwargs)
 
-            instances = cls._client._instances
-            instance = instances.get(uri, None)
+        if not (isinstance(uri, six.string_types) and uri.startswith('/')) and cls._self is not None:
+            uri = cls._self.href.format(id=uri)
+
+        instances = cls._client._instances
+        instance = instances.get(uri, None)
 
         if instance is None:
-            instance = super(Resource, cls).__new__(cls)
-            super(Resource, instance).__init__(uri)
-            instance._properties = {'$uri': uri}
-            if not kwargs:
-                instance._status = None
-            else:
-                instance._status = 200
-                instance._properties.update(kwargs)
-
-            if uri is not None:
-                instances[uri] = instance
+            with cls._client._instances_lock:
+                instance = instances.get(uri, None)
+                if instance is None:
+                    instance = instances[uri] = cls._new(uri, kwargs)
 
         # NOTE ensures that there is a single instance of a Resource with a given URL unless one creates an item
         # without URL and creates an item with the URL the first item is going to have, before saving the first item.
@@ -103,6 +195,22 @@ class Resource(Reference):
     def __init__(self, uri=None, **kwargs):
         pass  # Must be blank. See __new__()
 
+    def __reduce__(self):
+        # Resource classes are created at runtime, so they are looked up by name on the client.
+        return _restore_resource, (self._client, self._name, self._uri), self.__getstate__()
+
+    @classmethod
+    def _new(cls, uri, properties):
+        instance = super(Resource, cls).__new__(cls)
+        super(Resource, instance).__init__(uri)
+        instance._properties = {'$uri': uri}
+        if not properties:
+            instance._status = None
+        else:
+            instance._status = 200
+            instance._properties.update(properties)
+        return instance
+
     @property
     def id(self):
         if self._uri is not None:
@@ -119,12 +227,16 @@ class Resource(Reference):
 
     def __delitem__(self, item):
         del self._properties[item]
+        self._discard_lazy((item,))
 
     def __setitem__(self, item, value):
         self._properties[item] = value
+        self._discard_lazy((item,))
 
     def update(self, *args, **kwargs):
-        self._properties.update(*args, **kwargs)
+        properties = dict(*args, **kwargs)
+        self._properties.update(properties)
+        self._discard_lazy(properties)
         self.save()
 
     @classmethod
@@ -138,17 +250,25 @@ class Resource(Reference):
     def fetch(cls, id):
         return cls._self(id=id)
 
+    @classmethod
+    def parallel_scan(cls, fn, workers=None, shard_by=None, reduce=None, **params):
+        """
+        Calls ``fn`` with every item of the resource in a pool of processes, each of which decodes its share of the
+        items with its own copy of the client. See :func:`potion_client.scan.parallel_scan` for the parameters.
+
+        :return: an iterator over the results of ``fn``, or their combined result if ``reduce`` is given
+        """
+        return parallel_scan(cls._instances, fn, workers, shard_by, reduce, **params)
+
     def check(self):
         pass
 
     def save(self):
-        # TODO only save the appropriate properties defined in the schemas
-        # That logic should live in the links themselves.
-
+        # only the properties the schema of the link accepts are sent; references are encoded as {"$ref"}
         if self._uri is None:
-            return self._create(**self)
+            return self._create(self._create.serializer(self))
         else:
-            return self._update(**self)
+            return self._update(self._update.serializer(self))
 
     def delete(self):
         return self._destroy(id=self.id)
@@ -177,3 +297,46 @@ class Resource(Reference):
         #                                                   properties=', '.join(parts))
         # TODO some way to define a good key for display
         return '{cls}({id})'.format(cls=self.__class__.__name__, id=repr(self.id))
+
+
+class ResourceProperty(property):
+    """
+    Descriptor for a property of a :class:`Resource`. Once an instance has been loaded and decoded, reads go directly
+    to its properties; otherwise they go through :meth:`Reference.__getitem__`, which fetches or decodes as needed.
+
+    :param str name: the name of the property in the schema
+    :param bool read_only:
+    :param str doc:
+    """
+
+    def __init__(self, name, read_only=False, doc=None):
+        # The accessors are closures rather than methods so that the built-in property.__get__() calls them directly.
+        def fget(instance):
+            if instance._status is not None and instance._lazy is None:
+                return instance._property_values[name]
+            return instance[name]
+
+        def fset(instance, value):
+            if read_only:
+                raise AttributeError("'{}' is read-only".format(name))
+            instance[name] = value
+
+        def fdel(instance):
+            if read_only:
+                raise AttributeError("'{}' is read-only".format(name))
+            del instance[name]
+
+        super(ResourceProperty, self).__init__(fget, fset, fdel)
+        self.__doc__ = doc
+        self.name = name
+        self.read_only = read_only
+
+
+def _restore_reference(client, cls, uri):
+    if client is None:
+        return cls(uri)
+    return client.instance(uri, cls=cls, client=client)
+
+
+def _restore_resource(client, name, uri):
+    return client._resource_class(name)(uri)
@@ -0,0 +1,145 @@
+"""
+Scans of whole collections in several processes, so that decoding the items is not limited to a single core. See
+:meth:`Resource.parallel_scan`.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import functools
+import itertools
+import multiprocessing
+
+import six
+
+from potion_client.collection import Query
+from potion_client.exceptions import ItemNotFound
+
+
+def parallel_scan(binding, fn, workers=None, shard_by=None, reduce=None, shards=None, per_page=100, where=None):
+    """
+    Splits the items of a paginated link into shards and calls ``fn`` on each item in a pool of processes.
+
+    Without ``shard_by``, shards are ranges of pages, found from the ``X-Total-Count`` of the first page. Items that
+    are created or deleted during the scan can then move between pages, and be skipped or seen twice. With
+    ``shard_by``, the name of a numeric property, shards are disjoint ranges of its values between the smallest and
+    largest value, which each item falls into exactly once. The API must support sorting and filtering by it. Items
+    are sharded by their id with ``shard_by='id'``; the id is read from :attr:`Resource.id`, as items have no ``id``
+    property::
+
+        totals = User.parallel_scan(total, shard_by='id', reduce=operator.add)
+
+    :param LinkBinding binding: a paginated link, such as ``User.instances``
+    :param callable fn: a function called with each item, which must be picklable
+    :param int workers: the number of processes; defaults to the number of CPUs
+    :param str shard_by: a numeric property, or ``'id'``, to split the collection by
+    :param callable reduce: a function of two arguments combining the results of ``fn``, as for
+        :func:`functools.reduce`, which must be picklable
+    :param int shards: the number of shards; defaults to four per process
+    :param int per_page: the page size of each request
+    :param dict where: a filter for the items to scan
+    :return: an iterator over the results of ``fn``, which are returned shard by shard in the order the shards
+        complete, or the combined result if ``reduce`` is given. The combined result of no items is ``None``.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    shards = shards or workers * 4
+    where = dict(where or {})
+
+    if shard_by is None:
+        tasks = _page_shards(binding, shards, per_page, where)
+    else:
+        tasks = _range_shards(binding, shard_by, shards, per_page, where)
+
+    results = _run(binding, tasks, fn, reduce, workers)
+    if reduce is None:
+        return itertools.chain.from_iterable(results)
+
+    shard_results = [result for found, result in results if found]
+    return functools.reduce(reduce, shard_results) if shard_results else None
+
+
+def _page_shards(binding, shards, per_page, where):
+    params = {'page': 1, 'per_page': per_page}
+    if where:
+        params['where'] = where
+    response, items = binding.make_request(None, params)
+    try:
+        total_count = int(response.headers['X-Total-Count'])
+    except KeyError:
+        total_count = len(items)
+
+    pages = (total_count - 1) // per_page + 1 if total_count else 0
+    size = max(1, -(-pages // shards))
+    return [('pages', where, (first, min(first + size, pages + 1)), per_page)
+            for first in range(1, pages + 1, size)]
+
+
+def _range_shards(binding, shard_by, shards, per_page, where):
+    query = Query(binding).where(where) if where else Query(binding)
+    try:
+        low = _shard_value(query.sort(**{shard_by: False}).first(), shard_by)
+        high = _shard_value(query.sort(**{shard_by: True}).first(), shard_by)
+    except ItemNotFound:
+        return []
+
+    integers = all(isinstance(value, six.integer_types) and not isinstance(value, bool) for value in (low, high))
+    if integers:
+        step = max(1, -(-(high - low + 1) // shards))
+    else:
+        step = (high - low) / float(shards)
+        if not step:
+            shards = 1
+
+    tasks = []
+    start = low
+    while start <= high:
+        end = start + step
+        last = end > high if integers else len(tasks) == shards - 1
+        condition = {'$gte': start, '$lte': high} if last else {'$gte': start, '$lt': end}
+        tasks.append(('where', dict(where, **{shard_by: condition}), None, per_page))
+        if last:
+            break
+        start = end
+    return tasks
+
+
+def _shard_value(item, shard_by):
+    # the id of an item is part of its URI rather than one of its properties
+    if shard_by not in item and shard_by == 'id':
+        return item.id
+    return item[shard_by]
+
+
+def _run(binding, tasks, fn, reduce, workers):
+    if not tasks:
+        return
+    with ProcessPoolExecutor(min(workers, len(tasks))) as executor:
+        futures = [executor.submit(_scan_shard, binding, task, fn, reduce) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _scan_shard(binding, task, fn, reduce):
+    # Runs in a worker process; the binding is restored with a client of that process.
+    kind, where, pages, per_page = task
+    if kind == 'pages':
+        items = _iter_pages(binding, where, pages, per_page)
+    else:
+        items = Query(binding).where(where).per_page(per_page)
+
+    results = (fn(item) for item in items)
+    if reduce is None:
+        return list(results)
+
+    try:
+        first = next(results)
+    except StopIteration:
+        return False, None
+    return True, functools.reduce(reduce, results, first)
+
+
+def _iter_pages(binding, where, pages, per_page):
+    params = {'per_page': per_page}
+    if where:
+        params['where'] = where
+    for page in range(*pages):
+        response, items = binding.make_request(None, dict(params, page=page))
+        for item in items:
+            yield item
@@ -22,7 +22,7 @@ class Schema(collections.Mapping):
 
     @property
     def readonly_properties(self):
-        if self.type != 'object':
+        if 'object' not in (self.type or ()):
             return ()
 
         properties = []
@@ -59,12 +59,41 @@ class Schema(collections.Mapping):
             if self._schema.get('additionalProperties', True):
                 return True
 
-            for pattern in self._schema.get('patternProperties', {}).values():
+            for pattern in self._schema.get('patternProperties', {}):
                 if re.match(pattern, name):
                     return True
 
             return False
 
+    def serializer(self):
+        """
+        Compiles a function that selects the properties of an item that can be sent with this schema, as decided by
+        :meth:`can_include_property`. Properties whose name starts with ``$``, such as ``$uri``, are only included if
+        the schema defines them.
+
+        :return: a function that takes a mapping of properties and returns a dict
+        """
+        if not self._schema:
+            return lambda properties: {name: value for name, value in properties.items() if not name.startswith('$')}
+
+        if 'object' not in (self.type or ()):
+            return lambda properties: {}
+
+        defined = self._schema.get('properties', {})
+        writable = frozenset(name for name in defined if self.can_include_property(name))
+        additional = self._schema.get('additionalProperties', True)
+        patterns = [re.compile(pattern) for pattern in self._schema.get('patternProperties', {})]
+
+        if not additional and not patterns:
+            return lambda properties: {name: properties[name] for name in writable if name in properties}
+
+        def serialize(properties):
+            return {name: value for name, value in properties.items()
+                    if (name in writable if name in defined else
+                        not name.startswith('$') and (additional or any(p.match(name) for p in patterns)))}
+
+        return serialize
+
     def __contains__(self, item):
         return item in self._schema
 
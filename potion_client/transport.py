@@ -0,0 +1,153 @@
+from requests import Request, Session
+from requests.adapters import HTTPAdapter
+from six.moves.urllib.parse import urlencode
+import six
+
+try:
+    import urllib3
+except ImportError:  # pragma: no cover
+    from requests.packages import urllib3
+
+
+class Transport(object):
+    """
+    Sends the HTTP requests of a :class:`Client`.
+
+    The client builds a :class:`requests.Request` for every request, which the transport turns into whatever it needs to
+    send with :meth:`prepare`. :meth:`send` must return a :class:`requests.Response`, or an object that behaves like one
+    for ``status_code``, ``headers``, ``content``, ``json()`` and ``raise_for_status()``.
+    """
+
+    def prepare(self, request):
+        """
+        :param requests.Request request:
+        :return: a prepared request that can be passed to :meth:`send`
+        """
+        return request
+
+    def send(self, prepared_request, stream=False):
+        """
+        :param prepared_request: a request returned by :meth:`prepare`
+        :param bool stream: if true, the response body is not downloaded until it is read
+        :rtype: requests.Response
+        """
+        raise NotImplementedError()
+
+    def get(self, url):
+        return self.send(self.prepare(Request('GET', url)))
+
+    def reset(self):
+        """
+        Replaces all connections. Called in a forked child process, which must not share connections with its parent.
+        """
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    The default transport, which sends requests using a :class:`requests.Session`.
+
+    :param session_factory: a callable returning a new :class:`requests.Session`
+    :param session_kwargs: attributes to set on the session, such as ``auth`` or ``headers``
+    """
+
+    def __init__(self, session_factory=Session, **session_kwargs):
+        self._session_factory = session_factory
+        self._session_kwargs = session_kwargs
+        self.reset()
+
+    def reset(self):
+        self.session = session = self._session_factory()
+        for key, value in self._session_kwargs.items():
+            setattr(session, key, value)
+
+    def prepare(self, request):
+        return self.session.prepare_request(request)
+
+    def send(self, prepared_request, stream=False):
+        return self.session.send(prepared_request, stream=stream)
+
+    def get(self, url):
+        return self.session.get(url)
+
+    def close(self):
+        self.session.close()
+
+    def __getstate__(self):
+        return {'session_factory': self._session_factory, 'session_kwargs': self._session_kwargs}
+
+    def __setstate__(self, state):
+        self.__init__(state['session_factory'], **state['session_kwargs'])
+
+
+class _PreparedRequest(object):
+    def __init__(self, method, url, headers, body):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+
+class Urllib3Transport(Transport):
+    """
+    A lean transport that sends requests with :mod:`urllib3` directly, skipping the request preparation of
+    :class:`requests.Session`. Cookies, proxies from the environment and hooks are not supported.
+
+    :param dict headers: headers to send with every request
+    :param auth: a Requests authentication handler that only sets headers, such as
+        :class:`potion_client.auth.HTTPBearerAuth` or :class:`requests.auth.HTTPBasicAuth`
+    :param pool_kwargs: keyword arguments for :class:`urllib3.PoolManager`
+    """
+
+    def __init__(self, headers=None, auth=None, **pool_kwargs):
+        self.headers = headers or {}
+        self.auth = auth
+        self._pool_kwargs = pool_kwargs
+        self._adapter = HTTPAdapter()
+        self.reset()
+
+    def reset(self):
+        self.pool = urllib3.PoolManager(**self._pool_kwargs)
+
+    def prepare(self, request):
+        url = request.url
+        if request.params:
+            url += ('&' if '?' in url else '?') + urlencode(sorted(request.params.items()))
+
+        headers = dict(self.headers)
+        headers.update(request.headers or {})
+
+        body = request.data or None
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+
+        prepared_request = _PreparedRequest(request.method, url, headers, body)
+        if self.auth is not None:
+            prepared_request = self.auth(prepared_request)
+        return prepared_request
+
+    def send(self, prepared_request, stream=False):
+        response = self.pool.urlopen(prepared_request.method,
+                                     prepared_request.url,
+                                     body=prepared_request.body,
+                                     headers=prepared_request.headers,
+                                     chunked=not isinstance(prepared_request.body, (bytes, type(None))),
+                                     preload_content=False,
+                                     decode_content=False,
+                                     retries=False)
+
+        response = self._adapter.build_response(prepared_request, response)
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        self.pool.clear()
+
+    def __getstate__(self):
+        return {'headers': self.headers, 'auth': self.auth, 'pool_kwargs': self._pool_kwargs}
+
+    def __setstate__(self, state):
+        self.__init__(state['headers'], state['auth'], **state['pool_kwargs'])
@@ -1,4 +1,9 @@
 import re
+import sys
+import threading
+import weakref
+
+import six
 
 __author__ = 'lyschoening'
 
@@ -24,3 +29,70 @@ def escape(html):
         .replace('>', '&gt;') \
         .replace('"', '&quot;') \
         .replace("'", '&#39;')
+
+
+class _Finalizer(object):
+    def __init__(self, obj, fn):
+        self._fn = fn
+        self._ref = weakref.ref(obj, self)
+        _finalizers.add(self)
+
+    def __call__(self, ref=None):
+        if self in _finalizers:
+            _finalizers.discard(self)
+            self._fn()
+
+
+_finalizers = set()
+
+
+def finalize(obj, fn):
+    """
+    Calls ``fn`` once, when ``obj`` is garbage collected or when the returned finalizer is called, whichever happens
+    first. Uses :class:`weakref.finalize`, which also runs at exit, where available; Python 2 does not have it.
+    """
+    if hasattr(weakref, 'finalize'):
+        return weakref.finalize(obj, fn)
+    return _Finalizer(obj, fn)
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """
+    Merges concurrent calls that share the same key into a single call. Callers that arrive while a call with their
+    key is in progress wait for it and receive its result, or its exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.exc_info is not None:
+                six.reraise(*call.exc_info)
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
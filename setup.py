@@ -20,6 +20,14 @@ setup(
         'requests>=2.5',
         'six'
     ],
+    extras_require={
+        'http2': ['httpx[http2]'],
+        'streaming': ['ijson>=3.1'],
+        ':python_version=="2.7"': ['futures']
+    },
+    entry_points={
+        'console_scripts': ['potion-client = potion_client.cli:main']
+    },
     test_suite='nose.collector',
     tests_require=[
         'responses',
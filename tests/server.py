@@ -0,0 +1,125 @@
+"""
+A stand-in for a Potion API, for the tests that need a real HTTP server or the schemas of a whole API.
+"""
+import json
+import threading
+
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import urlparse
+
+
+def schemas(prefix=''):
+    """
+    :param str prefix: the path of the API
+    :return: a new dict of the schemas of an API with ``user`` and ``group`` resources by path, for tests to extend
+    """
+    return {
+        prefix + '/schema': {
+            "properties": {
+                "user": {"$ref": prefix + "/user/schema#"},
+                "group": {"$ref": prefix + "/group/schema#"}
+            }
+        },
+        prefix + '/user/schema': {
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "name": {"type": "string"},
+                "group": {"$ref": prefix + "/group/schema#"}
+            },
+            "links": [
+                {"rel": "self", "href": prefix + "/user/{id}", "method": "GET", "targetSchema": {"$ref": "#"}},
+                {
+                    "rel": "instances",
+                    "href": prefix + "/user",
+                    "method": "GET",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "where": {"type": "object"},
+                            "sort": {"type": "object"},
+                            "page": {"type": "integer"},
+                            "per_page": {"type": "integer"}
+                        }
+                    }
+                },
+                {"rel": "create", "href": prefix + "/user", "method": "POST", "schema": {"$ref": "#"}}
+            ]
+        },
+        prefix + '/group/schema': {
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "name": {"type": "string"}
+            },
+            "links": [
+                {"rel": "self", "href": prefix + "/group/{id}", "method": "GET"}
+            ]
+        }
+    }
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_port)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers requests for the :attr:`schemas` of the API, and passes any other GET request on to :meth:`get`. Tests add
+    their routes by implementing :meth:`get` and, where needed, ``do_POST`` or ``do_PATCH``.
+    """
+    protocol_version = 'HTTP/1.1'
+    schemas = schemas()
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, data, status=200, headers=()):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        return json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path in self.schemas:
+            return self.respond(self.schemas[url.path])
+        self.get(url)
+
+    def get(self, url):
+        """
+        :param url: the parsed URL of the request
+        """
+        self.respond({"message": "Not found"}, 404)
+
+
+def serve(test_case, handler_class, **attributes):
+    """
+    Starts a :class:`StandInServer` in a background thread until the end of a test.
+
+    :param TestCase test_case:
+    :param handler_class: a subclass of :class:`Handler` with the routes of the test
+    :param attributes: attributes to set on the server, for the handler to use
+    :rtype: StandInServer
+    """
+    server = StandInServer(('127.0.0.1', 0), handler_class)
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    test_case.addCleanup(server.server_close)
+    test_case.addCleanup(server.shutdown)
+    return server
@@ -0,0 +1,145 @@
+import pickle
+import time
+from unittest import TestCase
+
+import responses
+
+from potion_client import Client
+from potion_client.cache import LinkCache
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {
+            "rel": "instances",
+            "href": "/user",
+            "method": "GET",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "where": {"type": "object"},
+                    "page": {"type": "integer"},
+                    "per_page": {"type": "integer"}
+                }
+            }
+        },
+        {"rel": "create", "href": "/user", "method": "POST"},
+        {"rel": "update", "href": "/user/{id}", "method": "PATCH"},
+        {"rel": "destroy", "href": "/user/{id}", "method": "DELETE"}
+    ]
+}
+
+GROUP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True}
+    },
+    "links": [
+        {"rel": "self", "href": "/group/{id}", "method": "GET"},
+        {"rel": "create", "href": "/group", "method": "POST"}
+    ]
+}
+
+
+class LinkCacheTestCase(TestCase):
+    def test_ttl(self):
+        cache = LinkCache(ttl=0.05)
+        cache.set('key', None, 1)
+        self.assertEqual(1, cache.get('key'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_lru(self):
+        cache = LinkCache(max_entries=2)
+        cache.set('a', None, 1)
+        cache.set('b', None, 2)
+        cache.get('a')
+        cache.set('c', None, 3)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+
+    def test_invalidate(self):
+        cache = LinkCache()
+        cache.set('a', 'user', 1)
+        cache.set('b', 'group', 2)
+        cache.invalidate('user')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(2, cache.get('b'))
+        cache.invalidate()
+        self.assertEqual(0, len(cache))
+
+    def test_pickle(self):
+        cache = LinkCache(ttl=5, max_entries=10)
+        cache.set('a', None, 1)
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((5, 10, 0), (copy.ttl, copy.max_entries, len(copy)))
+
+
+class ClientCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = LinkCache()
+        self.client = Client('http://example.com', fetch_schema=False, cache=self.cache)
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+        self.Group = self.client.resource_factory('group', GROUP_SCHEMA)
+
+    def add_instances(self):
+        responses.add(responses.GET, 'http://example.com/user', json=[{"$uri": "/user/1", "name": "foo"}],
+                      headers={'X-Total-Count': '1'})
+
+    @responses.activate
+    def test_identical_queries(self):
+        self.add_instances()
+
+        users = list(self.User.instances.where(name='foo'))
+        self.assertEqual(users, list(self.User.instances.where(name='foo')))
+        self.assertEqual(1, len(responses.calls))
+
+        list(self.User.instances.where(name='bar'))
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_invalidate_on_save(self):
+        self.add_instances()
+        responses.add(responses.PATCH, 'http://example.com/user/1', json={"$uri": "/user/1", "name": "bar"})
+        responses.add(responses.POST, 'http://example.com/group', json={"$uri": "/group/1"})
+
+        users = list(self.User.instances())
+        self.Group._create()
+        list(self.User.instances())
+        self.assertEqual(2, len(responses.calls))
+
+        users[0].name = 'bar'
+        users[0].save()
+        list(self.User.instances())
+        self.assertEqual(4, len(responses.calls))
+
+    @responses.activate
+    def test_failed_write_keeps_entries(self):
+        self.add_instances()
+        responses.add(responses.DELETE, 'http://example.com/user/1', status=500)
+
+        users = list(self.User.instances())
+        with self.assertRaises(Exception):
+            users[0].delete()
+        list(self.User.instances())
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_clients_do_not_share_entries(self):
+        self.add_instances()
+        client = Client('http://example.com', fetch_schema=False, cache=self.cache)
+        User = client.resource_factory('user', USER_SCHEMA)
+
+        list(self.User.instances())
+        users = list(User.instances())
+        self.assertEqual(2, len(responses.calls))
+        self.assertIsInstance(users[0], User)
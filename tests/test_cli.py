@@ -0,0 +1,146 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import responses
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from potion_client import Client
+from potion_client.cli import main, export_items, import_items, Checkpoint
+from potion_client.converter import schema_resolve_refs
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"},
+        "friend": {"$ref": "#"},
+        "created_at": {"type": "object", "readOnly": True}
+    },
+    "links": [
+        {"rel": "self", "href": "/api/user/{id}", "method": "GET"},
+        {"rel": "create", "href": "/api/user", "method": "POST", "schema": {"$ref": "#"}},
+        {"rel": "update", "href": "/api/user/{id}", "method": "PATCH", "schema": {"$ref": "#"}},
+        {
+            "rel": "instances",
+            "href": "/api/user",
+            "method": "GET",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "page": {"type": "integer"},
+                    "per_page": {"type": "integer"},
+                    "where": {"type": "object"}
+                }
+            }
+        }
+    ]
+}
+
+
+class CommandLineTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def add_api(self, users):
+        responses.add(responses.GET, 'http://example.com/api/schema', json={
+            "properties": {"user": {"$ref": "/api/user/schema#"}}
+        })
+        responses.add(responses.GET, 'http://example.com/api/user/schema', json=USER_SCHEMA)
+
+        def request_callback(request):
+            params = {k: json.loads(v[0]) for k, v in parse_qs(urlparse(request.url).query).items()}
+            page, per_page = params['page'], params['per_page']
+            return 200, {'X-Total-Count': str(len(users))}, json.dumps(users[(page - 1) * per_page:page * per_page])
+
+        responses.add_callback(responses.GET, 'http://example.com/api/user', callback=request_callback,
+                               content_type='application/json')
+
+    @responses.activate
+    def test_export(self):
+        users = [{"$uri": "/api/user/{}".format(i),
+                  "name": u"user №{}".format(i),
+                  "friend": {"$ref": "/api/user/1"},
+                  "created_at": {"$date": 1451606400000}} for i in range(1, 26)]
+        self.add_api(users)
+
+        path = os.path.join(self.directory, 'users.ndjson')
+        self.assertEqual(0, main(['export', 'http://example.com/api', 'user', '--per-page', '3', '--workers', '3',
+                                  '--header', 'Authorization: Bearer token', '--output', path]))
+        with io.open(path, encoding='utf-8') as f:
+            self.assertEqual(users, [json.loads(line) for line in f])
+        self.assertEqual('Bearer token', responses.calls[-1].request.headers['Authorization'])
+        self.assertIn('User-Agent', responses.calls[-1].request.headers)
+
+        path = os.path.join(self.directory, 'users.csv')
+        self.assertEqual(0, main(['export', 'http://example.com/api', 'user', '--format', 'csv', '--output', path]))
+        with io.open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(26, len(lines))
+        self.assertEqual(u'$uri,created_at,friend,name', lines[0])
+        self.assertEqual(u'/api/user/2,2016-01-01T00:00:00+00:00,/api/user/1,user №2', lines[2])
+
+    @responses.activate
+    def test_export_csv_lazy_decode(self):
+        users = [{"$uri": "/api/user/1",
+                  "name": "user 1",
+                  "friend": {"$ref": "/api/user/1"},
+                  "created_at": {"$date": 1451606400000}}]
+        self.add_api(users)
+        client = Client('http://example.com/api', lazy_decode=True)
+
+        output = io.StringIO()
+        self.assertEqual(1, export_items(client.User, output, format='csv'))
+        self.assertEqual(u'/api/user/1,2016-01-01T00:00:00+00:00,/api/user/1,user 1',
+                         output.getvalue().splitlines()[1])
+
+    @responses.activate
+    def test_import(self):
+        client = Client('http://example.com', fetch_schema=False)
+        User = client.resource_factory('user', schema_resolve_refs(USER_SCHEMA))
+        received = []
+
+        def request_callback(request):
+            data = json.loads(request.body)
+            received.append((request.method, request.url, data))
+            if data['name'] == 'fail':
+                return 400, {}, json.dumps({"message": "Bad request"})
+            return 200, {}, json.dumps(dict(data, **{"$uri": "/api/user/9"}))
+
+        responses.add_callback(responses.POST, 'http://example.com/api/user', callback=request_callback,
+                               content_type='application/json')
+        responses.add_callback(responses.PATCH, 'http://example.com/api/user/1', callback=request_callback,
+                               content_type='application/json')
+
+        lines = [
+            '{"$uri": "/api/user/1", "name": "foo", "created_at": {"$date": 0}}\n',
+            '{"name": "bar", "friend": {"$ref": "/api/user/1"}}\n',
+            '\n',
+            '{"name": "fail"}\n',
+        ]
+        path = os.path.join(self.directory, 'checkpoint')
+        checkpoint = Checkpoint(path)
+        errors = io.StringIO()
+        self.assertEqual((2, 1), import_items(User, lines, workers=2, checkpoint=checkpoint, errors=errors))
+        checkpoint.close()
+
+        self.assertEqual(sorted([
+            ('PATCH', 'http://example.com/api/user/1', {"name": "foo"}),
+            ('POST', 'http://example.com/api/user', {"name": "bar", "friend": {"$ref": "/api/user/1"}}),
+            ('POST', 'http://example.com/api/user', {"name": "fail"}),
+        ], key=repr), sorted(received, key=repr))
+        self.assertIn('line 4:', errors.getvalue())
+
+        # a second run only retries the line that failed
+        del received[:]
+        checkpoint = Checkpoint(path)
+        self.assertEqual({1, 2}, checkpoint.done)
+        self.assertEqual((0, 1), import_items(User, lines, checkpoint=checkpoint))
+        checkpoint.close()
+        self.assertEqual([('POST', 'http://example.com/api/user', {"name": "fail"})], received)
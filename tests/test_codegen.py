@@ -0,0 +1,103 @@
+import types
+from unittest import TestCase
+
+import responses
+
+from potion_client import Resource
+from potion_client.resource import ResourceProperty
+from potion_client.codegen import fetch_schemas, generate, check
+from tests import server
+
+SCHEMAS = {'http://example.com' + path: schema for path, schema in server.schemas('/api').items()}
+USER_SCHEMA = SCHEMAS['http://example.com/api/user/schema']
+USER_SCHEMA['description'] = 'A user.'
+USER_SCHEMA['properties']['name']['description'] = 'The name of the user.'
+USER_SCHEMA['properties']['created-at'] = {"type": "string", "readOnly": True}
+USER_SCHEMA['links'].append({"rel": "readFriends", "href": "/api/user/{id}/friends", "method": "GET"})
+SCHEMAS['http://example.com/api/group/schema']['properties']['name']['readOnly'] = True
+
+
+def add_schemas(schemas=SCHEMAS):
+    for url, schema in schemas.items():
+        responses.add(responses.GET, url, json=schema)
+
+
+def load(source):
+    module = types.ModuleType('generated_api')
+    exec(compile(source, 'generated_api.py', 'exec'), module.__dict__)
+    return module
+
+
+class CodegenTestCase(TestCase):
+    @responses.activate
+    def setUp(self):
+        add_schemas()
+        root, schemas = fetch_schemas('http://example.com/api')
+        self.source = generate('http://example.com/api', root, schemas)
+
+    @responses.activate
+    def test_import_makes_no_requests(self):
+        module = load(self.source)
+        client = module.connect()
+        self.assertEqual(0, len(responses.calls))
+
+        self.assertTrue(issubclass(client.User, module.User))
+        self.assertTrue(issubclass(client.User, Resource))
+        self.assertEqual('A user.', client.User.__doc__)
+        self.assertIsInstance(module.User.name, ResourceProperty)
+        self.assertEqual('The name of the user.', module.User.name.__doc__)
+        self.assertEqual({'self', 'instances', 'create', 'readFriends'}, set(client.User._links))
+        self.assertIs(module.User._links['readFriends'], module.User.__dict__['read_friends'])
+        self.assertIs(module.SCHEMAS['user']['properties']['group'], module.SCHEMAS['group'])
+        self.assertIs(module.SCHEMAS['user']['links'][0]['targetSchema'], module.SCHEMAS['user'])
+
+    @responses.activate
+    def test_fetch(self):
+        module = load(self.source)
+        client = module.connect()
+
+        responses.add(responses.GET, 'http://example.com/api/user/1', json={
+            "$uri": "/api/user/1",
+            "name": "foo",
+            "created-at": "today",
+            "group": {"$ref": "/api/group/2"}
+        })
+        responses.add(responses.GET, 'http://example.com/api/group/2', json={"$uri": "/api/group/2", "name": "bar"})
+        responses.add(responses.GET, 'http://example.com/api/user/1/friends', json=[])
+
+        user = client.User.fetch(1)
+        self.assertIsInstance(user, client.User)
+        self.assertEqual('foo', user.name)
+        self.assertEqual('today', getattr(user, 'created-at'))
+        self.assertIsInstance(user.group, client.Group)
+        self.assertEqual('bar', user.group.name)
+        self.assertEqual([], user.read_friends())
+
+        user.name = 'baz'
+        self.assertEqual('baz', user['name'])
+        with self.assertRaises(AttributeError):
+            user.group.name = 'qux'
+        with self.assertRaises(AttributeError):
+            setattr(user, 'created-at', 'tomorrow')
+
+    def test_clients_are_independent(self):
+        module = load(self.source)
+        a = module.connect()
+        b = module.connect('http://example.org/api')
+        self.assertIsNot(a.User, b.User)
+        self.assertIs(a, a.User._client)
+        self.assertIs(b, b.User._client)
+        self.assertIsNone(module.User._client)
+
+    @responses.activate
+    def test_check(self):
+        module = load(self.source)
+        add_schemas()
+        self.assertTrue(check(module))
+
+        responses.reset()
+        changed = dict(SCHEMAS)
+        changed['http://example.com/api/group/schema'] = dict(changed['http://example.com/api/group/schema'],
+                                                              description='Changed.')
+        add_schemas(changed)
+        self.assertFalse(check(module))
@@ -0,0 +1,105 @@
+from unittest import TestCase
+
+import responses
+
+from potion_client import Client
+from potion_client.debug import IOMonitor
+from potion_client.exceptions import ImplicitFetchError
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"},
+        "group": {"type": "object", "properties": {"$ref": {"type": "string"}}}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {
+            "rel": "instances",
+            "href": "/user",
+            "method": "GET",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "page": {"type": "integer"},
+                    "per_page": {"type": "integer"}
+                }
+            }
+        }
+    ]
+}
+
+GROUP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"}
+    },
+    "links": [
+        {"rel": "self", "href": "/group/{id}", "method": "GET"}
+    ]
+}
+
+
+class IOMonitorTestCase(TestCase):
+    def setUp(self):
+        self.client = Client('http://example.com', fetch_schema=False)
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+        self.Group = self.client.resource_factory('group', GROUP_SCHEMA)
+
+        responses.add(responses.GET, 'http://example.com/user',
+                      json=[{"$uri": "/user/{}".format(i), "name": "user {}".format(i),
+                             "group": {"$ref": "/group/{}".format(i)}} for i in range(1, 5)],
+                      headers={'X-Total-Count': '4'})
+        for i in range(1, 5):
+            responses.add(responses.GET, 'http://example.com/group/{}'.format(i),
+                          json={"$uri": "/group/{}".format(i), "name": "group {}".format(i)})
+
+    def test_equality_does_not_fetch(self):
+        a, b = self.User(1), self.User(2)
+        self.assertEqual(a, self.client.instance('/user/1', cls=self.User))
+        self.assertNotEqual(a, b)
+        self.assertEqual({a, b}, {self.User(1), self.User(2)})
+        self.assertTrue(a)
+
+        new = self.User(name='new')
+        self.assertEqual(new, new)
+        self.assertNotEqual(new, self.User(name='new'))
+
+        with IOMonitor(strict=True) as monitor:
+            a == b, hash(a), bool(b), repr(a)
+        self.assertEqual([], monitor.fetches)
+
+    @responses.activate
+    def test_n_plus_one(self):
+        with IOMonitor() as monitor:
+            names = [user.group.name for user in self.User.instances()]
+        self.assertEqual(['group 1', 'group 2', 'group 3', 'group 4'], names)
+
+        self.assertEqual(4, len(monitor.implicit_fetches))
+        pattern, = monitor.n_plus_one()
+        self.assertEqual(('Group', 4), (pattern.resource, pattern.count))
+        self.assertEqual(['/group/1', '/group/2', '/group/3', '/group/4'], pattern.uris)
+        self.assertEqual(__file__.rstrip('c'), pattern.call_site[0])
+        self.assertIn('N+1: 4 fetches of Group', monitor.report())
+
+    @responses.activate
+    def test_explicit_fetches(self):
+        with IOMonitor() as monitor:
+            for i in range(1, 5):
+                self.Group.fetch(i)
+        self.assertEqual([], monitor.implicit_fetches)
+        pattern, = monitor.n_plus_one()
+        self.assertEqual(('Group', 4), (pattern.resource, pattern.count))
+
+    @responses.activate
+    def test_strict(self):
+        users = list(self.User.instances())
+        with IOMonitor(strict=True):
+            self.assertEqual('user 1', users[0].name)
+            self.assertEqual('/group/1', users[0].group._uri)
+            with self.assertRaises(ImplicitFetchError):
+                users[0].group.name
+        self.assertEqual(1, len(responses.calls))
+        self.assertEqual('group 1', users[0].group.name)
@@ -0,0 +1,139 @@
+import itertools
+import json
+import pickle
+import threading
+import time
+from timeit import default_timer
+from unittest import TestCase
+
+import responses
+
+from potion_client import Client
+from potion_client.hedging import HedgingPolicy
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {"rel": "create", "href": "/user", "method": "POST"}
+    ]
+}
+
+
+class Slow(object):
+    """
+    A stand-in for sending a request, which is slow the n-th time it is called.
+    """
+
+    def __init__(self, slow_calls, delay=0.5, fail=False):
+        self.calls = itertools.count()
+        self.slow_calls = slow_calls
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            call = next(self.calls)
+        if call in self.slow_calls:
+            time.sleep(self.delay)
+            if self.fail:
+                raise IOError('failed')
+        return call
+
+
+class HedgingPolicyTestCase(TestCase):
+    def test_hedge(self):
+        policy = HedgingPolicy(min_samples=5, budget=1.0)
+        send = Slow(slow_calls={5})
+        for _ in range(5):
+            self.assertIsNone(policy.delay('link'))
+            policy.send('link', send)
+        self.assertIsNotNone(policy.delay('link'))
+
+        started = default_timer()
+        self.assertEqual(6, policy.send('link', send))
+        self.assertLess(default_timer() - started, 0.4)
+        self.assertEqual(1, policy.hedged)
+        self.assertEqual(6, policy.requests)
+
+    def test_budget(self):
+        policy = HedgingPolicy(min_samples=5, budget=0.0)
+        send = Slow(slow_calls={5}, delay=0.2)
+        for _ in range(5):
+            policy.send('link', send)
+
+        started = default_timer()
+        self.assertEqual(5, policy.send('link', send))
+        self.assertGreaterEqual(default_timer() - started, 0.2)
+        self.assertEqual(0, policy.hedged)
+
+    def test_failed_request(self):
+        policy = HedgingPolicy(min_samples=5, budget=1.0)
+        send = Slow(slow_calls={5}, delay=0.2, fail=True)
+        for _ in range(5):
+            policy.send('link', send)
+        self.assertEqual(6, policy.send('link', send))
+
+        # when both requests fail, the error is raised
+        send = Slow(slow_calls={5, 6}, delay=0.1, fail=True)
+        policy = HedgingPolicy(min_samples=5, budget=1.0)
+        for _ in range(5):
+            policy.send('link', send)
+        with self.assertRaises(IOError):
+            policy.send('link', send)
+
+    def test_pickle(self):
+        policy = HedgingPolicy(percentile=99, budget=0.1)
+        policy.send('link', lambda: None)
+        copy = pickle.loads(pickle.dumps(policy))
+        self.assertEqual(99, copy.percentile)
+        self.assertEqual(0, copy.requests)
+
+
+class ClientHedgingTestCase(TestCase):
+    def setUp(self):
+        self.policy = HedgingPolicy(min_samples=5, budget=1.0)
+        self.client = Client('http://example.com', fetch_schema=False, hedging=self.policy)
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+
+    @responses.activate
+    def test_fetch(self):
+        calls = itertools.count()
+
+        def request_callback(request):
+            if next(calls) == 5:
+                time.sleep(0.5)
+            return 200, {}, json.dumps({"$uri": "/user/1", "name": "foo"})
+
+        responses.add_callback(responses.GET, 'http://example.com/user/1', callback=request_callback,
+                               content_type='application/json')
+
+        for _ in range(5):
+            self.User.fetch(1)
+
+        started = default_timer()
+        self.assertEqual('foo', self.User.fetch(1).name)
+        self.assertLess(default_timer() - started, 0.4)
+        self.assertEqual(1, self.policy.hedged)
+
+    @responses.activate
+    def test_only_get_requests(self):
+        responses.add(responses.POST, 'http://example.com/user', json={"$uri": "/user/1", "name": "foo"})
+        self.User._create(name='foo')
+        self.assertEqual(0, self.policy.requests)
+
+    @responses.activate
+    def test_link_policy(self):
+        client = Client('http://example.com', fetch_schema=False)
+        User = client.resource_factory('user', USER_SCHEMA)
+        policy = User._links['self'].hedging = HedgingPolicy()
+
+        responses.add(responses.GET, 'http://example.com/user/1', json={"$uri": "/user/1", "name": "foo"})
+        User.fetch(1)
+        self.assertEqual(1, policy.requests)
+        self.assertEqual(0, self.policy.requests)
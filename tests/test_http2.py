@@ -0,0 +1,130 @@
+import json
+import socket
+import ssl
+import threading
+from unittest import TestCase, skipIf
+
+from potion_client import Client
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class H2Server(object):
+    """
+    A minimal HTTP/2 server without TLS that answers GET requests with JSON from a dict of paths.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.connections = 0
+        self.streams = 0
+        self._socket = socket.socket()
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(5)
+        self.url = 'http://127.0.0.1:{}'.format(self._socket.getsockname()[1])
+
+        thread = threading.Thread(target=self._serve)
+        thread.daemon = True
+        thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                sock, _ = self._socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            thread = threading.Thread(target=self._handle, args=(sock,))
+            thread.daemon = True
+            thread.start()
+
+    def _handle(self, sock):
+        connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        connection.initiate_connection()
+        sock.sendall(connection.data_to_send())
+
+        while True:
+            data = sock.recv(65535)
+            if not data:
+                break
+
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    self.streams += 1
+                    headers = dict((k.decode() if isinstance(k, bytes) else k,
+                                    v.decode() if isinstance(v, bytes) else v) for k, v in event.headers)
+                    body = json.dumps(self.routes[headers[':path']]).encode()
+                    connection.send_headers(event.stream_id, [(':status', '200'),
+                                                              ('content-type', 'application/json'),
+                                                              ('content-length', str(len(body)))])
+                    connection.send_data(event.stream_id, body, end_stream=True)
+            sock.sendall(connection.data_to_send())
+        sock.close()
+
+    def close(self):
+        self._socket.close()
+
+
+@skipIf(httpx is None, 'httpx and h2 are required for HTTP/2 support')
+class HTTP2TestCase(TestCase):
+    def test_multiplexed_requests(self):
+        routes = {
+            '/api/schema': {
+                "properties": {
+                    "user": {"$ref": "/api/user/schema#"}
+                }
+            },
+            '/api/user/schema': {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"}
+                },
+                "links": [
+                    {
+                        "rel": "self",
+                        "href": "/api/user/{id}",
+                        "method": "GET"
+                    }
+                ]
+            }
+        }
+        routes.update(('/api/user/{}'.format(i), {"$uri": "/api/user/{}".format(i), "name": "user-{}".format(i)})
+                      for i in range(1, 21))
+
+        server = H2Server(routes)
+        self.addCleanup(server.close)
+
+        client = Client(server.url + '/api', http2={'http1': False})
+        self.addCleanup(client.session.close)
+
+        names = {}
+
+        def fetch(i):
+            names[i] = client.User(i).name
+
+        threads = [threading.Thread(target=fetch, args=(i,)) for i in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual({i: "user-{}".format(i) for i in range(1, 21)}, names)
+        self.assertEqual(1, server.connections)
+        self.assertEqual(22, server.streams)
+
+    def test_session_options(self):
+        client = Client('https://example.com', fetch_schema=False, http2=True, verify=False, timeout=(1, 5))
+        self.addCleanup(client.session.close)
+
+        http2_client = client.session.http2_client
+        self.assertEqual(httpx.Timeout(None, connect=1, read=5), http2_client.timeout)
+        self.assertEqual(ssl.CERT_NONE, http2_client._transport._pool._ssl_context.verify_mode)
+
+        with self.assertRaises(TypeError):
+            Client('https://example.com', fetch_schema=False, http2=True, proxies={'https': 'http://proxy:3128'})
@@ -1,15 +1,28 @@
+import gc
+import gzip
 import json
+import pickle
+import threading
+import time
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from unittest import TestCase, SkipTest
 from six.moves.urllib.parse import urlparse, parse_qs
 from requests import HTTPError
+import six
 import responses
-from potion_client import Client, Resource, PotionJSONDecoder, uri_for
-from potion_client.converter import PotionJSONEncoder, timezone
-from potion_client.collection import PaginatedList
+import potion_client
+from potion_client import Client, Resource, PotionJSONDecoder, uri_for, DESC
+from potion_client.converter import PotionJSONEncoder, timezone, schema_resolve_refs, compile_field_decoders, \
+    SCALAR, DATE, REFERENCE
+from potion_client.collection import PaginatedList, Query
 from potion_client.exceptions import ItemNotFound
 
 
+def describe(user):
+    return type(user).__name__, user.name, user.friend.name, len(user._client._resources)
+
+
 class ClientInitTestCase(TestCase):
     @responses.activate
     def test_read_schema(self):
@@ -51,6 +64,41 @@ class ClientInitTestCase(TestCase):
             'self': client.User._self.link
         }, client.User._links)
 
+    @responses.activate
+    def test_read_schema_concurrently(self):
+        names = ['user', 'group', 'project', 'task', 'comment']
+        responses.add(responses.GET, 'http://example.com/api/schema', json={
+            "properties": {name: {"$ref": "/api/{}/schema#".format(name)} for name in names}
+        })
+
+        # only passes once requests for all schemas are in flight at the same time
+        arrived = []
+        condition = threading.Condition()
+
+        def request_callback(request):
+            with condition:
+                arrived.append(request.url)
+                condition.notify_all()
+                deadline = time.time() + 5
+                while len(arrived) < len(names) and time.time() < deadline:
+                    condition.wait(deadline - time.time())
+                if len(arrived) < len(names):
+                    return 500, {}, ''
+            return 200, {}, json.dumps({
+                "type": "object",
+                "properties": {},
+                "links": []
+            })
+
+        for name in names:
+            responses.add_callback(responses.GET, 'http://example.com/api/{}/schema'.format(name),
+                                   callback=request_callback,
+                                   content_type='application/json')
+
+        client = Client('http://example.com/api')
+
+        self.assertEqual(len(names) + 1, len(responses.calls))
+        self.assertTrue(issubclass(client.Comment, Resource))
 
     @responses.activate
     def test_fetch_instance(self):
@@ -149,6 +197,78 @@ class ClientInitTestCase(TestCase):
 
         # TODO user.save() for create
 
+    @responses.activate
+    def test_compressed_and_streamed_requests(self):
+        client = Client('http://example.com', fetch_schema=False, compress_threshold=100)
+
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {
+                "$uri": {
+                    "type": "string",
+                    "readOnly": True
+                },
+                "name": {
+                    "type": "string"
+                }
+            },
+            "links": [
+                {
+                    "rel": "create",
+                    "href": "/user",
+                    "method": "POST"
+                },
+                {
+                    "rel": "createMany",
+                    "href": "/user/bulk",
+                    "method": "POST"
+                }
+            ]
+        })
+
+        received = []
+
+        def request_callback(request):
+            body = request.body
+            if isinstance(body, six.text_type):
+                body = body.encode('utf-8')
+            elif not isinstance(body, bytes):
+                body = b''.join(body)
+            if request.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.GzipFile(fileobj=six.BytesIO(body)).read()
+            received.append((request.headers.get('Content-Encoding'),
+                             request.headers.get('Transfer-Encoding'),
+                             json.loads(body.decode('utf-8'))))
+            return 200, {}, 'null'
+
+        responses.add_callback(responses.POST, 'http://example.com/user', callback=request_callback)
+        responses.add_callback(responses.POST, 'http://example.com/user/bulk', callback=request_callback)
+
+        User.create(name='foo')
+        User.create(name='foo' * 100)
+        self.assertEqual([
+            (None, None, {"name": "foo"}),
+            ('gzip', None, {"name": "foo" * 100})
+        ], received)
+
+        users = [{"name": "user-{}".format(i), "friend": User('/user/{}'.format(i))} for i in range(5000)]
+        expected = [{"name": "user-{}".format(i), "friend": {"$ref": "/user/{}".format(i)}} for i in range(5000)]
+
+        User.create_many(users)
+        self.assertEqual(('gzip', None, expected), received[-1])
+
+        User._links['createMany'].stream_threshold = 1000
+        User.create_many(users)
+        self.assertEqual(('gzip', 'chunked', expected), received[-1])
+
+        User._links['createMany'].compress_threshold = 10 ** 9
+        User.create_many(users)
+        self.assertEqual(('gzip', 'chunked', expected), received[-1])
+
+        client._compress_threshold = User._links['createMany'].compress_threshold = None
+        User.create_many(users)
+        self.assertEqual((None, 'chunked', expected), received[-1])
+
     @responses.activate
     def test_first(self):
         client = Client('http://example.com', fetch_schema=False)
@@ -281,6 +401,190 @@ class ClientInitTestCase(TestCase):
         foo_b = client.instance('/foo')
         self.assertIs(foo_a, foo_b)
 
+    @responses.activate
+    def test_concurrent_fetches(self):
+        client = Client('http://example.com', fetch_schema=False)
+
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {
+                "$uri": {
+                    "type": "string",
+                    "readOnly": True
+                },
+                "name": {
+                    "type": "string"
+                }
+            },
+            "links": [
+                {
+                    "rel": "self",
+                    "method": "GET",
+                    "href": "/user/{id}"
+                },
+                {
+                    "rel": "instances",
+                    "method": "GET",
+                    "href": "/user",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "page": {"type": "integer"},
+                            "per_page": {"type": "integer"}
+                        }
+                    }
+                }
+            ]
+        })
+
+        calls = []
+
+        def request_callback(request):
+            calls.append(request.url)
+            time.sleep(0.1)
+            if request.url.endswith('/user/99'):
+                return 200, {}, json.dumps({"$uri": "/user/99", "name": "foo"})
+            params = parse_qs(urlparse(request.url).query)
+            page = int(params['page'][0])
+            return 200, {'X-Total-Count': '40'}, json.dumps([{"$uri": "/user/{}".format(i), "name": str(i)}
+                                                             for i in range(page * 20 - 19, page * 20 + 1)])
+
+        responses.add_callback(responses.GET, 'http://example.com/user/99',
+                               callback=request_callback,
+                               content_type='application/json')
+        responses.add_callback(responses.GET, 'http://example.com/user',
+                               callback=request_callback,
+                               content_type='application/json')
+
+        users = User.instances()
+        reference = client.instance('/user/99')
+        results = []
+
+        def work():
+            results.append((reference['name'], users[30], client.instance('/user/99')))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(8, len(results))
+        for name, user, instance in results:
+            self.assertEqual('foo', name)
+            self.assertIs(User(31), user)
+            self.assertIs(reference, instance)
+        self.assertEqual(1, calls.count('http://example.com/user/99'))
+        self.assertEqual(3, len(calls))
+
+        # other threads only see an instance as resolved once its properties are stored
+        user = client.instance('/user/50')
+        status_during_update = []
+
+        class Properties(dict):
+            def update(self, *args, **kwargs):
+                status_during_update.append(user._status)
+                dict.update(self, *args, **kwargs)
+
+        user._property_values = Properties()
+        self.assertIs(user, PotionJSONDecoder(client).decode(json.dumps({"$uri": "/user/50", "name": "bar"})))
+        self.assertEqual([None], status_during_update)
+        self.assertEqual('bar', user.name)
+
+    @responses.activate
+    def test_pickle(self):
+        responses.add(responses.GET, 'http://example.com/schema', json={
+            "properties": {
+                "user": {"$ref": "/user/schema#"}
+            }
+        })
+
+        responses.add(responses.GET, 'http://example.com/user/schema', json={
+            "type": "object",
+            "properties": {
+                "$uri": {
+                    "type": "string",
+                    "readOnly": True
+                },
+                "name": {
+                    "type": "string"
+                },
+                "friend": {
+                    "$ref": "#"
+                }
+            },
+            "links": [
+                {
+                    "rel": "self",
+                    "href": "/user/{id}",
+                    "method": "GET"
+                },
+                {
+                    "rel": "instances",
+                    "href": "/user",
+                    "method": "GET",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "page": {"type": "integer"},
+                            "per_page": {"type": "integer"}
+                        }
+                    }
+                }
+            ]
+        })
+
+        responses.add(responses.GET, 'http://example.com/user', json=[
+            {"$uri": "/user/1", "name": "foo", "friend": {"$ref": "/user/2"}},
+            {"$uri": "/user/2", "name": "bar", "friend": {"$ref": "/user/1"}}
+        ])
+
+        client = Client('http://example.com')
+        users = client.User.instances()
+        foo, bar = users
+
+        self.assertIs(foo, pickle.loads(pickle.dumps(foo)))
+        self.assertIs(client, pickle.loads(pickle.dumps(client)))
+
+        unsaved = pickle.loads(pickle.dumps(client.User(name='baz')))
+        self.assertEqual({"$uri": None, "name": "baz"}, dict(unsaved))
+
+        # simulate a process in which the client does not yet exist:
+        data = pickle.dumps((foo, users, client.User.instances.where(name='foo')))
+        del potion_client._clients[client._key]
+
+        count = len(responses.calls)
+        foo_copy, users_copy, query_copy = pickle.loads(data)
+        self.assertEqual(count, len(responses.calls))
+
+        self.assertIsNot(foo, foo_copy)
+        self.assertIsNot(client, foo_copy._client)
+        self.assertIs(foo_copy._client.User, type(foo_copy))
+        self.assertIs(foo_copy.friend, users_copy[1])
+        self.assertIs(foo_copy, users_copy[1].friend)
+        self.assertEqual('bar', foo_copy.friend.name)
+        self.assertEqual({'where': {'name': 'foo'}}, query_copy._params())
+        self.assertIs(foo_copy._client.User, query_copy._binding.owner)
+        self.assertIs(foo_copy._client, pickle.loads(data)[0]._client)
+
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual([('User', 'foo', 'bar', 1), ('User', 'bar', 'foo', 1)],
+                             list(executor.map(describe, users)))
+
+    def test_restored_clients_are_released(self):
+        data = [pickle.dumps(Client('http://example.com', fetch_schema=False))
+                for _ in range(potion_client._MAX_RESTORED_CLIENTS + 1)]
+        gc.collect()  # as if in another process, where the clients do not exist yet
+
+        first_key = pickle.loads(data[0])._key
+        restored = [pickle.loads(d) for d in data[1:]]
+        self.assertNotIn(first_key, potion_client._restored_clients)
+        self.assertTrue(all(client._key in potion_client._restored_clients for client in restored))
+        self.assertIs(restored[0], pickle.loads(data[1]))
+
+        gc.collect()
+        self.assertNotIn(first_key, potion_client._clients)
+
     def test_singleton(self):
         client = Client('http://example.com/api', fetch_schema=False)
 
@@ -507,6 +811,127 @@ class ClientInitTestCase(TestCase):
         user.update(name='Bar', age=21)
         self.assertEqual(user.age, 21)
 
+    @responses.activate
+    def test_save_serializer(self):
+        client = Client('http://example.com', fetch_schema=False)
+        schema = {
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "name": {"type": "string"},
+                "created_at": {"type": "string", "readOnly": True},
+                "friend": {"type": "object", "properties": {"$ref": {"type": "string"}}}
+            },
+            "links": [
+                {"rel": "self", "href": "/user/{id}", "method": "GET"},
+                {"rel": "instances", "href": "/user", "method": "GET"},
+                {"rel": "create", "href": "/user", "method": "POST",
+                 "schema": {"type": "object", "additionalProperties": False, "properties": {}}},
+                {"rel": "update", "href": "/user/{id}", "method": "PATCH"}
+            ]
+        }
+        schema['links'][2]['schema']['properties'] = schema['properties']
+        User = client.resource_factory('user', schema)
+
+        self.assertEqual((), User._update.schema.readonly_properties)
+        self.assertEqual({'$uri', 'created_at'}, set(User._create.schema.readonly_properties))
+
+        requests = []
+
+        def request_callback(request):
+            requests.append((request.method, json.loads(request.body)))
+            return 200, {}, json.dumps({"$uri": "/user/1", "name": "foo"})
+
+        responses.add_callback(responses.POST, 'http://example.com/user', callback=request_callback,
+                               content_type='application/json')
+        responses.add_callback(responses.PATCH, 'http://example.com/user/1', callback=request_callback,
+                               content_type='application/json')
+
+        user = User(name='foo', friend=User(2), unknown=1)
+        user['created_at'] = 'today'
+        user.save()
+        self.assertEqual(('POST', {'name': 'foo', 'friend': {'$ref': '/user/2'}}), requests[0])
+
+        # the update link has no schema and accepts any property except for those starting with '$'
+        user.save()
+        self.assertEqual('PATCH', requests[1][0])
+        self.assertEqual({'name', 'friend', 'unknown', 'created_at'}, set(requests[1][1]))
+
+    @responses.activate
+    def test_save_pattern_properties(self):
+        client = Client('http://example.com', fetch_schema=False)
+        link_schema = {
+            "type": "object",
+            "additionalProperties": False,
+            "properties": {"name": {"type": "string"}},
+            "patternProperties": {"^meta_": {"type": "string"}}
+        }
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {"$uri": {"type": "string", "readOnly": True}},
+            "links": [
+                {"rel": "self", "href": "/user/{id}", "method": "GET"},
+                {"rel": "create", "href": "/user", "method": "POST", "schema": link_schema}
+            ]
+        })
+
+        self.assertTrue(User._create.schema.can_include_property('meta_color'))
+        self.assertFalse(User._create.schema.can_include_property('color'))
+
+        requests = []
+
+        def request_callback(request):
+            requests.append(json.loads(request.body))
+            return 200, {}, json.dumps({"$uri": "/user/1", "name": "foo"})
+
+        responses.add_callback(responses.POST, 'http://example.com/user', callback=request_callback,
+                               content_type='application/json')
+
+        User(name='foo', meta_color='red', color='red').save()
+        self.assertEqual([{'name': 'foo', 'meta_color': 'red'}], requests)
+
+    @responses.activate
+    def test_property_access(self):
+        client = Client('http://example.com', fetch_schema=False)
+
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "name": {"type": "string"},
+                "created_at": {"type": "string", "readOnly": True}
+            },
+            "links": [
+                {"rel": "self", "href": "/user/{id}", "method": "GET"}
+            ]
+        })
+
+        responses.add(responses.GET, 'http://example.com/user/1', json={
+            "$uri": "/user/1",
+            "name": "foo",
+            "created_at": "today"
+        })
+
+        user = User(1)
+        self.assertEqual('foo', user.name)
+        self.assertEqual('today', user.created_at)
+        self.assertEqual(1, len(responses.calls))
+
+        user.name = 'bar'
+        self.assertEqual('bar', user['name'])
+        del user.name
+        self.assertFalse('name' in user)
+        with self.assertRaises(KeyError):
+            user.name
+
+        with six.assertRaisesRegex(self, AttributeError, "'created_at' is read-only"):
+            user.created_at = 'tomorrow'
+        with self.assertRaises(AttributeError):
+            del user.created_at
+
+        self.assertEqual('baz', User(name='baz').name)
+        self.assertEqual(1, len(responses.calls))
+
     def test_encode_reference(self):
         client = Client('http://example.com', fetch_schema=False)
 
@@ -574,6 +999,125 @@ class ClientInitTestCase(TestCase):
             "owner": User(123)
         }, result)
 
+    @responses.activate
+    def test_lazy_decode(self):
+        client = Client('http://example.com', fetch_schema=False, lazy_decode=True)
+
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "name": {"type": "string"},
+                "created_at": {"type": "object"},
+                "friend": {"$ref": "#"},
+                "tags": {"type": "array"}
+            },
+            "links": [
+                {"rel": "self", "href": "/user/{id}", "method": "GET"}
+            ]
+        })
+
+        responses.add(responses.GET, 'http://example.com/user/1', json={
+            "$uri": "/user/1",
+            "name": "foo",
+            "created_at": {"$date": 1451606400000},
+            "friend": {"$ref": "/user/2"},
+            "tags": [{"$date": 0}]
+        })
+
+        user = User.fetch(1)
+        self.assertEqual({"$date": 1451606400000}, user._properties['created_at'])
+        self.assertEqual({"$ref": "/user/2"}, user._properties['friend'])
+        self.assertEqual('foo', user.name)
+
+        self.assertEqual(datetime(2016, 1, 1, tzinfo=timezone.utc), user.created_at)
+        self.assertEqual(datetime(2016, 1, 1, tzinfo=timezone.utc), user._properties['created_at'])
+        self.assertIs(User(2), user['friend'])
+        self.assertIs(User(2), user.friend)
+
+        user.tags = ['bar']
+        self.assertEqual(['bar'], user.tags)
+        self.assertIsNone(user._lazy)
+
+        user = pickle.loads(pickle.dumps(User.fetch(1)))
+        self.assertEqual([datetime(1970, 1, 1, tzinfo=timezone.utc)], user.tags)
+        self.assertEqual(2, len(responses.calls))
+
+        # a reader holding an outdated copy of the pending values gets the decoded value
+        user = User.fetch(1)
+        lazy = user._lazy
+        self.assertEqual(datetime(2016, 1, 1, tzinfo=timezone.utc), user.created_at)
+        self.assertEqual(datetime(2016, 1, 1, tzinfo=timezone.utc), user._decode_property('created_at', lazy))
+
+        # raw values are only ever visible while they are marked as pending
+        pending_during_update = []
+
+        class Properties(dict):
+            def update(self, *args, **kwargs):
+                pending_during_update.append(set(user._lazy or ()))
+                dict.update(self, *args, **kwargs)
+
+        user._property_values = Properties(user._property_values)
+        User.fetch(1)
+        self.assertEqual([{'created_at', 'friend', 'tags'}], pending_during_update)
+        self.assertEqual(datetime(2016, 1, 1, tzinfo=timezone.utc), user.created_at)
+
+    def test_compiled_field_decoders(self):
+        client = Client('http://example.com', fetch_schema=False)
+
+        User = client.resource_factory('user', schema_resolve_refs({
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "name": {"type": "string"},
+                "age": {"type": ["integer", "null"]},
+                "created_at": {
+                    "type": "object",
+                    "properties": {"$date": {"type": "integer"}},
+                    "additionalProperties": False
+                },
+                "friend": {"$ref": "#"},
+                "manager": {
+                    "anyOf": [
+                        {"type": "object", "properties": {"$ref": {"type": "string"}}},
+                        {"type": "null"}
+                    ]
+                },
+                "meta": {"type": "object"}
+            },
+            "links": [
+                {"rel": "self", "href": "/user/{id}", "method": "GET"}
+            ]
+        }))
+
+        self.assertEqual({
+            '$uri': SCALAR,
+            'name': SCALAR,
+            'age': SCALAR,
+            'created_at': DATE,
+            'friend': REFERENCE,
+            'manager': REFERENCE
+        }, compile_field_decoders(User._schema))
+
+        user = json.loads(json.dumps({
+            "$uri": "/user/1",
+            "name": "foo",
+            "created_at": {"$date": 1451606400000},
+            "friend": {"$uri": "/user/2", "name": "bar"},
+            "manager": None,
+            "meta": {"updated_at": {"$date": 0}},
+            "unknown": {"$ref": "/user/3"}
+        }), cls=PotionJSONDecoder, client=client)
+
+        self.assertIs(User(1), user)
+        self.assertEqual('foo', user.name)
+        self.assertEqual(datetime(2016, 1, 1, tzinfo=timezone.utc), user.created_at)
+        self.assertIs(User(2), user.friend)
+        self.assertEqual('bar', user.friend.name)
+        self.assertIsNone(user.manager)
+        self.assertEqual({"updated_at": datetime(1970, 1, 1, tzinfo=timezone.utc)}, user.meta)
+        self.assertIs(User(3), user['unknown'])
+
     @responses.activate
     def test_pagination(self):
         client = Client('http://example.com', fetch_schema=False)
@@ -641,7 +1185,6 @@ class ClientInitTestCase(TestCase):
         result = User.instances()
 
         # TODO test: result = User.instances(where={"foo": {"$gt": 123}})
-        # TODO magic: result = User.instances.where(foo__gt=123).sort(foo=DESC)
 
         self.assertIsInstance(result, PaginatedList)
         self.assertEqual(35, len(result))
@@ -656,6 +1199,145 @@ class ClientInitTestCase(TestCase):
         self.assertEqual(20, len(result._pages[1]))
         self.assertEqual(15, len(result._pages[2]))
 
+    @responses.activate
+    def test_adaptive_pagination(self):
+        client = Client('http://example.com', fetch_schema=False, adaptive_pagination=True)
+
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {
+                "$uri": {
+                    "type": "string",
+                    "readOnly": True
+                },
+                "name": {
+                    "type": "string"
+                }
+            },
+            "links": [
+                {
+                    "rel": "instances",
+                    "method": "GET",
+                    "href": "/user",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "page": {
+                                "minimum": 1,
+                                "type": "integer"
+                            },
+                            "per_page": {
+                                "maximum": 40,
+                                "minimum": 1,
+                                "type": "integer"
+                            }
+                        }
+                    }
+                }
+            ]
+        })
+
+        requested = []
+
+        def request_callback(request):
+            users = [
+                {
+                    "$uri": "/user/{}".format(i),
+                    "name": "user-{}".format(i)
+                } for i in range(1, 151)
+                ]
+
+            params = parse_qs(urlparse(request.url).query)
+            page, per_page = int(params['page'][0]), int(params['per_page'][0])
+            requested.append((page, per_page))
+            offset = (page - 1) * per_page
+            return 200, {'X-Total-Count': '150'}, json.dumps(users[offset:offset + per_page])
+
+        responses.add_callback(responses.GET, 'http://example.com/user',
+                               callback=request_callback,
+                               content_type='application/json')
+
+        result = User.instances(per_page=10)
+        self.assertEqual(["user-{}".format(i) for i in range(1, 151)], [user.name for user in result])
+        self.assertEqual(15, len(result._pages))
+        self.assertTrue(all(len(result._pages[page]) == 10 for page in range(1, 16)))
+
+        self.assertEqual((1, 10), requested[0])
+        self.assertTrue(len(requested) < 15)
+        self.assertEqual(40, max(per_page for page, per_page in requested))
+        self.assertEqual(150, sum(min(per_page, 150 - (page - 1) * per_page) for page, per_page in requested))
+
+    @responses.activate
+    def test_query(self):
+        client = Client('http://example.com', fetch_schema=False)
+
+        User = client.resource_factory('user', {
+            "type": "object",
+            "properties": {
+                "$uri": {
+                    "type": "string",
+                    "readOnly": True
+                },
+                "age": {
+                    "type": "integer"
+                }
+            },
+            "links": [
+                {
+                    "rel": "instances",
+                    "method": "GET",
+                    "href": "/user",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "page": {"type": "integer"},
+                            "per_page": {"type": "integer"},
+                            "where": {"type": "object"},
+                            "sort": {"type": "object"}
+                        }
+                    }
+                }
+            ]
+        })
+
+        requests = []
+
+        def request_callback(request):
+            params = {k: json.loads(v[0]) for k, v in parse_qs(urlparse(request.url).query).items()}
+            requests.append(params)
+
+            users = [{"$uri": "/user/{}".format(i), "age": i} for i in range(1, 36)]
+            where = params.get('where', {})
+            if 'age' in where:
+                users = [u for u in users if where['age'].get('$gt', 0) < u['age'] < where['age'].get('$lt', 100)]
+            if params.get('sort', {}).get('age'):
+                users.reverse()
+
+            offset = (params['page'] - 1) * params['per_page']
+            return 200, {'X-Total-Count': str(len(users))}, json.dumps(users[offset:offset + params['per_page']])
+
+        responses.add_callback(responses.GET, 'http://example.com/user',
+                               callback=request_callback,
+                               content_type='application/json')
+
+        query = User.instances.where(age__gt=10).where(age__lt=20).sort(age=DESC)
+        self.assertIsInstance(query, Query)
+        self.assertEqual([], requests)
+
+        self.assertEqual(9, query.count())
+        self.assertEqual(True, query.exists())
+        self.assertEqual(19, query.first().age)
+        self.assertEqual([{'page': 1, 'per_page': 1,
+                           'where': {'age': {'$gt': 10, '$lt': 20}},
+                           'sort': {'age': True}}] * 3, requests)
+
+        self.assertEqual(list(range(19, 10, -1)), [user.age for user in query.per_page(5)])
+        self.assertEqual(5, requests[-1]['per_page'])
+
+        self.assertEqual(False, User.instances.where(age__gt=50).exists())
+        with self.assertRaises(ItemNotFound):
+            User.instances.where(age__gt=50).first()
+
     @responses.activate
     def test_response_errors(self):
         client = Client('http://example.com', fetch_schema=False)
@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from potion_client import Client
+from potion_client.loadtest import run, Fetch, Instances, Create, Update, LinkStats
+from tests.server import Handler, schemas, serve
+
+SCHEMAS = schemas()
+SCHEMAS['/user/schema']['links'].append({"rel": "update", "href": "/user/{id}", "method": "PATCH",
+                                         "schema": {"$ref": "#"}})
+
+
+class UserHandler(Handler):
+    schemas = SCHEMAS
+
+    def get(self, url):
+        if url.path == '/user':
+            return self.respond([{"$uri": "/user/{}".format(i), "name": "foo"} for i in range(1, 11)])
+        if url.path == '/user/3':
+            return self.respond({"message": "Not found"}, 404)
+        self.respond({"$uri": url.path, "name": "foo"})
+
+    def do_POST(self):
+        self.respond(dict(self.read_json(), **{"$uri": "/user/11"}))
+
+    def do_PATCH(self):
+        self.respond(dict(self.read_json(), **{"$uri": self.path}))
+
+
+class LoadTestTestCase(TestCase):
+    def setUp(self):
+        self.client = Client(serve(self, UserHandler).url)
+        User = self.client.User
+        self.workload = [
+            Fetch(User, ids=[1, 2, 3], weight=6),
+            Instances(User, per_page=10, weight=2),
+            Create(User, lambda: {"name": "bar"}),
+            Update(User, ids=[1, 2], properties=lambda: {"name": "baz"}),
+        ]
+
+    def test_concurrency(self):
+        report = run(self.workload, concurrency=4, duration=None, count=200, seed=1)
+
+        self.assertEqual({'User.self', 'User.instances', 'User.create', 'User.update'}, set(report.stats))
+        self.assertEqual(200, sum(stats.count for stats in report.stats.values()))
+        self.assertGreater(report.stats['User.self'].count, report.stats['User.create'].count)
+        self.assertGreater(report.stats['User.self'].errors, 0)  # one in three fetches is a 404
+        self.assertEqual(0, report.stats['User.update'].errors)
+        self.assertGreater(report.throughput(), 0)
+
+        stats = report.stats['User.instances']
+        self.assertTrue(0 < stats.percentile(50) <= stats.percentile(95) <= stats.percentile(99))
+        self.assertIn('User.instances', str(report))
+
+    def test_rate(self):
+        report = run(self.workload, concurrency=4, rate=100, duration=0.5, seed=1)
+        count = sum(stats.count for stats in report.stats.values())
+        self.assertTrue(40 <= count <= 52, count)
+
+    def test_operation_errors(self):
+        report = run([Create(self.client.User, lambda: 1 / 0)], count=50, duration=None)
+        self.assertEqual(50, report.stats['User.create'].errors)
+        self.assertEqual(50, report.stats['User.create'].count)
+
+    def test_percentile(self):
+        stats = LinkStats()
+        stats.latencies = [float(i) for i in range(1, 101)]
+        self.assertEqual(50.0, stats.percentile(50))
+        self.assertEqual(95.0, stats.percentile(95))
+        self.assertEqual(99.0, stats.percentile(99))
+        self.assertEqual(100.0, stats.percentile(100))
+        self.assertIsNone(LinkStats().percentile(50))
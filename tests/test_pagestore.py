@@ -0,0 +1,140 @@
+import gc
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from functools import partial
+from unittest import TestCase
+
+import responses
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from potion_client import Client
+from potion_client.converter import timezone
+from potion_client.pagestore import SQLitePageStore
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"},
+        "created_at": {"type": "object", "properties": {"$date": {"type": "integer"}}},
+        "friend": {"type": "object", "properties": {"$ref": {"type": "string"}}}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {
+            "rel": "instances",
+            "href": "/user",
+            "method": "GET",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "page": {"type": "integer"},
+                    "per_page": {"type": "integer"}
+                }
+            }
+        }
+    ]
+}
+
+TOTAL = 50
+
+
+def users_callback(request):
+    query = parse_qs(urlparse(request.url).query)
+    page, per_page = int(query['page'][0]), int(query['per_page'][0])
+    items = [{"$uri": "/user/{}".format(i),
+              "name": "user {}".format(i),
+              "created_at": {"$date": 1451060269000},
+              "friend": {"$ref": "/user/{}".format((i + 1) % TOTAL)}}
+             for i in range((page - 1) * per_page, min(page * per_page, TOTAL))]
+    return 200, {'X-Total-Count': str(TOTAL)}, json.dumps(items)
+
+
+class SQLitePageStoreTestCase(TestCase):
+    def setUp(self):
+        self.client = Client('http://example.com', fetch_schema=False,
+                             page_store=partial(SQLitePageStore, memory_pages=2))
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+        responses.add_callback(responses.GET, 'http://example.com/user', callback=users_callback,
+                               content_type='application/json')
+
+    @responses.activate
+    def test_random_access(self):
+        users = self.User.instances(per_page=5)
+        self.assertIsInstance(users._pages, SQLitePageStore)
+        self.assertEqual(['user {}'.format(i) for i in range(TOTAL)], [user.name for user in users])
+        self.assertEqual(10, len(responses.calls))
+        self.assertEqual(2, len(users._pages._memory))
+        self.assertEqual(10, len(users._pages))
+
+        # items of pages read back from the database are decoded again once the originals are gone
+        gc.collect()
+        for i in (3, 47, 12, 3, 31):
+            user = users[i]
+            self.assertEqual('user {}'.format(i), user.name)
+            self.assertEqual(datetime(2015, 12, 25, 16, 17, 49, tzinfo=timezone.utc), user.created_at)
+            self.assertEqual((i + 1) % TOTAL, user.friend.id)
+        self.assertEqual(10, len(responses.calls))
+
+    @responses.activate
+    def test_items_in_memory_are_reused(self):
+        users = self.User.instances(per_page=5)
+        first = users[0]
+        first['name'] = 'changed'
+        users[25], users[TOTAL - 1]
+        self.assertNotIn(1, users._pages._memory)
+
+        self.assertIs(first, users[0])
+        self.assertEqual('changed', users[0].name)
+
+    @responses.activate
+    def test_pickle(self):
+        users = self.User.instances(per_page=5)
+        users[TOTAL - 1]
+        copy = pickle.loads(pickle.dumps(users))
+        self.assertEqual(0, len(copy._pages))
+        self.assertEqual('user 7', copy[7].name)
+
+    def test_close(self):
+        store = SQLitePageStore(self.client, memory_pages=0)
+        store[1] = [{'a': 1}]
+        self.assertEqual([{'a': 1}], store[1])
+        self.assertEqual([1], list(store))
+        del store[1]
+        self.assertNotIn(1, store)
+        with self.assertRaises(KeyError):
+            store[1]
+        store.close()
+
+    @responses.activate
+    def test_tables_are_dropped_with_lists(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'pages.db')
+        client = Client('http://example.com', fetch_schema=False,
+                        page_store=partial(SQLitePageStore, path=path, memory_pages=1))
+        User = client.resource_factory('user', USER_SCHEMA)
+
+        def tables():
+            connection = sqlite3.connect(path)
+            try:
+                return connection.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+            finally:
+                connection.close()
+
+        users = User.instances(per_page=5)
+        users[TOTAL - 1]
+        with User.instances(per_page=5) as other:
+            other[TOTAL - 1]
+            self.assertEqual(2, tables())
+        self.assertEqual(1, tables())
+        other.close()
+
+        del users
+        gc.collect()
+        self.assertEqual(0, tables())
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import responses
+
+from potion_client import Client
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"},
+        "group": {"type": "object", "properties": {"$ref": {"type": "string"}}}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {
+            "rel": "instances",
+            "href": "/user",
+            "method": "GET",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "page": {"type": "integer"},
+                    "per_page": {"type": "integer"}
+                }
+            }
+        },
+        {"rel": "create", "href": "/user", "method": "POST"}
+    ]
+}
+
+GROUP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"}
+    },
+    "links": [
+        {"rel": "self", "href": "/group/{id}", "method": "GET"}
+    ]
+}
+
+
+class ProfilerTestCase(TestCase):
+    def setUp(self):
+        self.client = Client('http://example.com', fetch_schema=False)
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+        self.Group = self.client.resource_factory('group', GROUP_SCHEMA)
+
+        responses.add(responses.GET, 'http://example.com/user',
+                      json=[{"$uri": "/user/{}".format(i), "name": "user {}".format(i),
+                             "group": {"$uri": "/group/{}".format(i), "name": "group {}".format(i)}}
+                            for i in range(1, 11)],
+                      headers={'X-Total-Count': '10'})
+        responses.add(responses.GET, 'http://example.com/group/11', json={"$uri": "/group/11", "name": "group 11"})
+        responses.add(responses.POST, 'http://example.com/user', json={"$uri": "/user/11", "name": "new"})
+
+    @responses.activate
+    def test_phases(self):
+        with self.client.profile() as profile:
+            self.assertEqual(10, len(list(self.User.instances())))
+            self.User(name='new').save()
+            self.client.instance('/group/11', cls=self.Group).name
+        self.assertIsNone(self.client._profiler)
+        self.assertGreater(profile.wall_time, 0)
+
+        phases = profile.phases()
+        self.assertLessEqual({'User.instances', 'User.create', 'fetch', 'request_factory', 'encode', 'prepare',
+                              'network', 'parse', 'decode', 'identity_map'}, set(phases))
+        self.assertEqual(1, phases['User.instances']['calls'])
+        self.assertEqual(3, phases['network']['calls'])
+        self.assertEqual(3, phases['decode']['calls'])
+
+        folded = profile.folded().splitlines()
+        stacks = set(line.rsplit(' ', 1)[0] for line in folded)
+        self.assertIn('User.instances;parse;decode;identity_map', stacks)
+        self.assertIn('User.create;request_factory;encode', stacks)
+        self.assertIn('fetch;network', stacks)
+        self.assertTrue(all(int(line.rsplit(' ', 1)[1]) > 0 for line in folded))
+
+        summary = profile.summary()
+        self.assertTrue(summary.startswith('wall time'))
+        self.assertIn('identity_map', summary)
+
+    @responses.activate
+    def test_memory(self):
+        with self.client.profile(memory=True) as profile:
+            list(self.User.instances())
+
+        memory = profile.resource_memory()
+        self.assertEqual({'User', 'Group'}, set(memory))
+        self.assertIn('allocated (KiB)', profile.summary())
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'memory.folded')
+        profile.write_folded(path, memory=True)
+        with open(path) as f:
+            self.assertIn('User.instances;parse', f.read())
@@ -0,0 +1,144 @@
+import json
+import pickle
+from timeit import default_timer
+from unittest import TestCase
+
+import responses
+from requests import HTTPError, Response
+
+from potion_client import Client
+from potion_client.ratelimit import RateLimiter, _parse_retry_after
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {"rel": "create", "href": "/user", "method": "POST"},
+        {"rel": "createMany", "href": "/user/many", "method": "POST"}
+    ]
+}
+
+
+def response(status_code=200, **headers):
+    response = Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    return response
+
+
+class RateLimiterTestCase(TestCase):
+    def test_rate(self):
+        limiter = RateLimiter(rate=50)
+        started = default_timer()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(default_timer() - started, 0.09)
+
+    def test_too_many_requests(self):
+        limiter = RateLimiter(rate=100)
+        self.assertTrue(limiter.update(response(429, **{'Retry-After': '0.1'})))
+        self.assertEqual(50, limiter.rate)
+
+        started = default_timer()
+        limiter.acquire()
+        self.assertGreaterEqual(default_timer() - started, 0.09)
+
+        # the rate grows again with successful responses, up to the initial rate
+        self.assertFalse(limiter.update(response(200)))
+        self.assertAlmostEqual(50.02, limiter.rate)
+        for _ in range(10000):
+            limiter.update(response(200))
+        self.assertEqual(100, limiter.rate)
+
+    def test_unlimited_until_too_many_requests(self):
+        limiter = RateLimiter(retry_after=0)
+        for _ in range(10):
+            limiter.acquire()
+        self.assertIsNone(limiter.rate)
+        limiter.update(response(429))
+        self.assertIsNotNone(limiter.rate)
+        self.assertGreaterEqual(limiter.rate, limiter.min_rate)
+
+    def test_rate_limit_headers(self):
+        limiter = RateLimiter()
+        limiter.update(response(200, **{'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': '2'}))
+        self.assertEqual(5, limiter.rate)
+
+        limiter.update(response(200, **{'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '0.1'}))
+        started = default_timer()
+        limiter.acquire()
+        self.assertGreaterEqual(default_timer() - started, 0.09)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(2, _parse_retry_after('2'))
+        self.assertEqual(0, _parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'))
+        self.assertIsNone(_parse_retry_after('soon'))
+
+    def test_pickle(self):
+        limiter = RateLimiter(rate=10, max_retries=2)
+        limiter.update(response(429, **{'Retry-After': '0'}))
+        copy = pickle.loads(pickle.dumps(limiter))
+        self.assertEqual(10, copy.rate)
+        self.assertEqual(2, copy.max_retries)
+
+
+class ClientRateLimitTestCase(TestCase):
+    def setUp(self):
+        self.client = Client('http://example.com', fetch_schema=False, rate_limit=RateLimiter(retry_after=0))
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+
+    @responses.activate
+    def test_replay(self):
+        responses.add(responses.POST, 'http://example.com/user', status=429, headers={'Retry-After': '0'})
+        responses.add(responses.POST, 'http://example.com/user', json={"$uri": "/user/1", "name": "foo"})
+
+        user = self.User._create(name='foo')
+        self.assertEqual(1, user.id)
+        self.assertEqual(2, len(responses.calls))
+        self.assertEqual({'name': 'foo'}, json.loads(responses.calls[1].request.body))
+
+    @responses.activate
+    def test_fetch(self):
+        responses.add(responses.GET, 'http://example.com/user/1', status=429)
+        responses.add(responses.GET, 'http://example.com/user/1', json={"$uri": "/user/1", "name": "foo"})
+
+        self.assertEqual('foo', self.User(1).name)
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_max_retries(self):
+        self.client._rate_limiter.max_retries = 2
+        responses.add(responses.GET, 'http://example.com/user/1', status=429)
+
+        with self.assertRaises(HTTPError):
+            self.User._self(id=1)
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_streamed_body_is_not_replayed(self):
+        self.User._links['createMany'].stream_threshold = 1
+        responses.add(responses.POST, 'http://example.com/user/many', status=429)
+
+        with self.assertRaises(HTTPError):
+            self.User.create_many([{'name': 'foo'}])
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_link_rate_limiter(self):
+        limiter = RateLimiter(retry_after=0, max_retries=0)
+        self.User._links['create'].rate_limiter = limiter
+        responses.add(responses.POST, 'http://example.com/user', status=429)
+
+        with self.assertRaises(HTTPError):
+            self.User._create(name='foo')
+        self.assertEqual(1, len(responses.calls))
+        self.assertEqual(1, len(limiter._sent))
+        self.assertEqual(0, len(self.client._rate_limiter._sent))
+
+    def test_rate_limit_option(self):
+        client = Client('http://example.com', fetch_schema=False, rate_limit=5)
+        self.assertEqual(5, client._rate_limiter.rate)
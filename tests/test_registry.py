@@ -0,0 +1,152 @@
+import pickle
+import threading
+from unittest import TestCase
+
+import responses
+
+import potion_client
+from potion_client import Client
+from potion_client.registry import SchemaRegistry
+from potion_client.resource import Reference
+from tests import server
+
+SCHEMAS = {'http://example.com' + path: schema for path, schema in server.schemas('/api').items()}
+
+
+def add_schemas(etag='"1"'):
+    for url, schema in SCHEMAS.items():
+        headers = {'ETag': etag} if etag and url == 'http://example.com/api/schema' else {}
+        responses.add(responses.GET, url, json=schema, headers=headers)
+
+
+def schema_requests():
+    return [call.request.url for call in responses.calls]
+
+
+class SchemaRegistryTestCase(TestCase):
+    @responses.activate
+    def test_shared_classes(self):
+        add_schemas()
+        registry = SchemaRegistry()
+        first = Client('http://example.com/api', registry=registry, headers={'Authorization': 'first'})
+        self.assertEqual(3, len(responses.calls))
+
+        second = Client('http://example.com/api', registry=registry, headers={'Authorization': 'second'})
+        self.assertEqual(['http://example.com/api/schema'], schema_requests()[3:])
+        self.assertEqual(1, len(registry))
+
+        # the classes share their links and schema, but each is bound to its own client
+        self.assertIsNot(first.User, second.User)
+        self.assertIs(first.User.__bases__[0], second.User.__bases__[0])
+        self.assertIs(first.User._links, second.User._links)
+        self.assertIs(first.User._schema, second.User._schema)
+        self.assertIs(first, first.User._client)
+        self.assertIs(second, second.User._client)
+
+        # the shared schemas are plain dicts that do not refer to the first client
+        self.assertIs(first.User._schema['properties']['group'], first.Group._schema)
+        self.assertIs(first.User._schema['links'][0]['targetSchema'], first.User._schema)
+        self.assertNotIsInstance(first.User._schema['properties']['group'], Reference)
+
+        responses.add(responses.GET, 'http://example.com/api/user/1', json={"$uri": "/api/user/1", "name": "foo"})
+        self.assertIsNot(first.User(1), second.User(1))
+        self.assertEqual('foo', second.User(1).name)
+        self.assertIsInstance(second.instance('/api/user/1'), second.User)
+        self.assertEqual('second', responses.calls[-1].request.headers['Authorization'])
+
+    @responses.activate
+    def test_references_are_not_bound_to_a_tenant(self):
+        responses.add(responses.GET, 'http://example.com/api/schema', json={
+            "properties": {"user": {"$ref": "/api/user/schema#"}}
+        }, headers={'ETag': '"1"'})
+        responses.add(responses.GET, 'http://example.com/api/user/schema', json={
+            "type": "object",
+            "properties": {
+                "$uri": {"type": "string", "readOnly": True},
+                "address": {"$ref": "/api/address/schema#"}
+            },
+            "links": [{"rel": "self", "href": "/api/user/{id}", "method": "GET"}]
+        })
+        responses.add(responses.GET, 'http://example.com/api/address/schema', json={
+            "type": "object",
+            "properties": {"city": {"type": "string"}}
+        })
+
+        registry = SchemaRegistry()
+        first = Client('http://example.com/api', registry=registry, headers={'Authorization': 'first'})
+        self.assertEqual(3, len(responses.calls))
+
+        second = Client('http://example.com/api', registry=registry, headers={'Authorization': 'second'})
+        address = second.User._schema['properties']['address']
+        self.assertNotIsInstance(address, Reference)
+        self.assertEqual({"city": {"type": "string"}}, address['properties'])
+        self.assertEqual(['http://example.com/api/schema'], schema_requests()[3:])
+        self.assertEqual('second', responses.calls[-1].request.headers['Authorization'])
+        self.assertIs(first.User._schema, second.User._schema)
+
+    @responses.activate
+    def test_schema_version(self):
+        add_schemas()
+        registry = SchemaRegistry()
+        Client('http://example.com/api', registry=registry, schema_version='1')
+        self.assertEqual(3, len(responses.calls))
+
+        client = Client('http://example.com/api', registry=registry, schema_version='1')
+        self.assertEqual(3, len(responses.calls))
+        self.assertEqual({'self', 'instances', 'create'}, set(client.User._links))
+
+    @responses.activate
+    def test_new_version(self):
+        add_schemas(etag=None)
+        registry = SchemaRegistry()
+        first = Client('http://example.com/api', registry=registry)
+        second = Client('http://example.com/api', registry=registry)
+        self.assertIs(first.User.__bases__[0], second.User.__bases__[0])
+
+        responses.reset()
+        add_schemas(etag='"2"')
+        third = Client('http://example.com/api', registry=registry)
+        self.assertIsNot(first.User.__bases__[0], third.User.__bases__[0])
+        self.assertEqual(2, len(registry))
+
+        registry.clear()
+        self.assertEqual(0, len(registry))
+
+    @responses.activate
+    def test_concurrent_clients(self):
+        add_schemas()
+        registry = SchemaRegistry()
+        clients = []
+
+        def create():
+            clients.append(Client('http://example.com/api', registry=registry, schema_version='1'))
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(8, len(clients))
+        self.assertEqual(1, len(set(client.User.__bases__[0] for client in clients)))
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_pickle(self):
+        add_schemas()
+        client = Client('http://example.com/api', registry=SchemaRegistry())
+
+        responses.add(responses.GET, 'http://example.com/api/user/1', json={"$uri": "/api/user/1", "name": "foo"})
+        user = client.User(1)
+        self.assertEqual('foo', user.name)
+
+        data = pickle.dumps((client, user))
+        self.assertIs(user, pickle.loads(data)[1])
+
+        # as if in another process, the client is restored with classes of its own
+        del potion_client._clients[client._key]
+        client_copy, user_copy = pickle.loads(data)
+        self.assertIsNot(client, client_copy)
+        self.assertIsInstance(user_copy, client_copy.User)
+        self.assertEqual('foo', user_copy.name)
+        self.assertEqual(client.User._links.keys(), client_copy.User._links.keys())
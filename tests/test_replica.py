@@ -0,0 +1,160 @@
+import json
+import threading
+from datetime import datetime
+from unittest import TestCase
+
+import responses
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from potion_client import Client, DESC
+from potion_client.converter import timezone
+from potion_client.exceptions import ItemNotFound
+from potion_client.replica import Replica
+
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "$uri": {"type": "string", "readOnly": True},
+        "name": {"type": "string"},
+        "age": {"type": "integer"},
+        "tags": {"type": "array"},
+        "friend": {"$ref": "#"},
+        "updated_at": {"type": "object", "readOnly": True}
+    },
+    "links": [
+        {"rel": "self", "href": "/user/{id}", "method": "GET"},
+        {
+            "rel": "instances",
+            "href": "/user",
+            "method": "GET",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "page": {"type": "integer"},
+                    "per_page": {"type": "integer"},
+                    "where": {"type": "object"}
+                }
+            }
+        }
+    ]
+}
+
+
+def timestamp(day):
+    return {"$date": int((datetime(2016, 1, day, tzinfo=timezone.utc) -
+                          datetime(1970, 1, 1, tzinfo=timezone.utc)).total_seconds() * 1000)}
+
+
+class ReplicaTestCase(TestCase):
+    def setUp(self):
+        self.client = Client('http://example.com', fetch_schema=False)
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+        self.users = {
+            1: {"$uri": "/user/1", "name": "Anne", "age": 31, "tags": ["admin"], "updated_at": timestamp(1)},
+            2: {"$uri": "/user/2", "name": "Bob", "age": 25, "tags": [], "friend": {"$ref": "/user/1"},
+                "updated_at": timestamp(2)},
+            3: {"$uri": "/user/3", "name": "Carl", "age": 42, "tags": ["admin", "staff"], "updated_at": timestamp(3)},
+        }
+        self.requests = []
+
+    def add_instances(self):
+        def request_callback(request):
+            params = {k: json.loads(v[0]) for k, v in parse_qs(urlparse(request.url).query).items()}
+            self.requests.append(params)
+
+            items = [self.users[id] for id in sorted(self.users)]
+            if 'where' in params:
+                since = params['where']['updated_at']['$gte']['$date']
+                items = [item for item in items if item['updated_at']['$date'] >= since]
+
+            page, per_page = params['page'], params['per_page']
+            return 200, {'X-Total-Count': str(len(items))}, json.dumps(items[(page - 1) * per_page:page * per_page])
+
+        responses.add_callback(responses.GET, 'http://example.com/user', callback=request_callback,
+                               content_type='application/json')
+
+    @responses.activate
+    def test_sync_and_query(self):
+        self.add_instances()
+        replica = Replica(self.client, resources=[self.User], per_page=2)
+
+        self.assertEqual(3, replica.sync())
+        self.assertEqual([{'page': 1, 'per_page': 2}, {'page': 2, 'per_page': 2}], self.requests)
+
+        query = replica.query(self.User)
+        self.assertEqual(3, query.count())
+        self.assertEqual(['Carl', 'Anne'], [user.name for user in query.where(age__gt=25).sort(age=DESC)])
+        self.assertEqual(['Anne', 'Carl'], [user.name for user in query.where(tags__contains='admin').sort('name')])
+        self.assertEqual(['Bob'], [user.name for user in query.where(friend=self.User(1))])
+        self.assertEqual(['Bob'], [user.name for user in query.where(name__istartswith='b')])
+        self.assertEqual(['Bob', 'Anne'], [user.name for user in query.where(age__in=[25, 31]).sort('age')])
+        self.assertEqual(['Bob'], [user.name for user in
+                                   query.where(updated_at__gt=datetime(2016, 1, 1, 12, tzinfo=timezone.utc),
+                                               updated_at__lt=datetime(2016, 1, 2, 12, tzinfo=timezone.utc))])
+        self.assertFalse(query.where(name='Dora').exists())
+        with self.assertRaises(ItemNotFound):
+            query.where(name='Dora').first()
+
+        user = query.where(name='Bob').first()
+        self.assertIs(self.User(2), user)
+        self.assertIs(self.User(1), user.friend)
+        self.assertIs(user, replica.get(self.User, 2))
+        with self.assertRaises(ItemNotFound):
+            replica.get(self.User, 4)
+
+        self.assertEqual(2, len(self.requests))
+
+    @responses.activate
+    def test_incremental_sync(self):
+        self.add_instances()
+        replica = Replica(self.client, resources=[self.User])
+        replica.sync()
+
+        self.users[2] = dict(self.users[2], name='Bert', updated_at=timestamp(4))
+        self.users[4] = {"$uri": "/user/4", "name": "Dora", "age": 19, "tags": [], "updated_at": timestamp(4)}
+        del self.users[1]
+
+        self.assertEqual(3, replica.sync())
+        self.assertEqual({"updated_at": {"$gte": timestamp(3)}}, self.requests[-1]['where'])
+        self.assertEqual(['Anne', 'Bert', 'Carl', 'Dora'],
+                         [user.name for user in replica.query(self.User).sort('name')])
+
+        self.assertEqual(2, replica.sync())
+        self.assertEqual({"updated_at": {"$gte": timestamp(4)}}, self.requests[-1]['where'])
+
+        self.assertEqual(3, replica.sync(self.User, full=True))
+        self.assertNotIn('where', self.requests[-1])
+        self.assertEqual(['Bert', 'Carl', 'Dora'], [user.name for user in replica.query(self.User).sort('name')])
+
+    @responses.activate
+    def test_lazy_decode(self):
+        self.client = Client('http://example.com', fetch_schema=False, lazy_decode=True)
+        self.User = self.client.resource_factory('user', USER_SCHEMA)
+        self.add_instances()
+        replica = Replica(self.client, resources=[self.User])
+
+        self.assertEqual(3, replica.sync())
+        self.assertEqual(1, replica.sync())
+        self.assertEqual({"updated_at": {"$gte": timestamp(3)}}, self.requests[-1]['where'])
+        self.assertIs(self.User(1), replica.query(self.User).where(name='Bob').first().friend)
+
+    @responses.activate
+    def test_reads_during_sync(self):
+        self.add_instances()
+        replica = Replica(self.client, resources=[self.User], per_page=2)
+        replica.sync()
+
+        counts = []
+
+        def read_callback(request):
+            # the pages are fetched while another thread reads from the replica
+            reader = threading.Thread(target=lambda: counts.append(replica.query(self.User).count()))
+            reader.start()
+            reader.join(5)
+            return 200, {'X-Total-Count': '0'}, '[]'
+
+        responses.reset()
+        responses.add_callback(responses.GET, 'http://example.com/user', callback=read_callback,
+                               content_type='application/json')
+        replica.sync()
+        self.assertEqual([3], counts)
@@ -0,0 +1,76 @@
+import json
+import operator
+from unittest import TestCase
+
+from six.moves.urllib.parse import parse_qs
+
+from potion_client import Client
+from tests.server import Handler, schemas, serve
+
+SCHEMAS = schemas()
+SCHEMAS['/user/schema']['properties']['number'] = {"type": "integer"}
+
+USERS = [{"$uri": "/user/{}".format(i), "number": i * 3} for i in range(1, 101)]
+
+OPERATORS = {
+    '$gte': operator.ge,
+    '$gt': operator.gt,
+    '$lte': operator.le,
+    '$lt': operator.lt,
+}
+
+
+class UserHandler(Handler):
+    schemas = SCHEMAS
+
+    def get(self, url):
+        query = {name: json.loads(values[0]) for name, values in parse_qs(url.query).items()}
+        users = USERS
+        for name, condition in query.get('where', {}).items():
+            users = [user for user in users
+                     if all(OPERATORS[op](value_of(user, name), value) for op, value in condition.items())]
+        for name, descending in query.get('sort', {}).items():
+            users = sorted(users, key=lambda user: value_of(user, name), reverse=descending)
+
+        page, per_page = query.get('page', 1), query.get('per_page', 20)
+        self.respond(users[(page - 1) * per_page:page * per_page], headers=[('X-Total-Count', str(len(users)))])
+
+
+def value_of(user, name):
+    if name == 'id':
+        return int(user['$uri'].rsplit('/', 1)[1])
+    return user[name]
+
+
+def number(user):
+    return user.number
+
+
+class ParallelScanTestCase(TestCase):
+    def setUp(self):
+        self.client = Client(serve(self, UserHandler).url)
+
+    def test_pages(self):
+        numbers = self.client.User.parallel_scan(number, workers=2, per_page=7)
+        self.assertEqual([user['number'] for user in USERS], sorted(numbers))
+
+    def test_ranges(self):
+        numbers = self.client.User.parallel_scan(number, workers=2, shard_by='number', shards=7, per_page=10)
+        self.assertEqual([user['number'] for user in USERS], sorted(numbers))
+
+    def test_ids(self):
+        numbers = self.client.User.parallel_scan(number, workers=2, shard_by='id', shards=3)
+        self.assertEqual([user['number'] for user in USERS], sorted(numbers))
+
+    def test_reduce(self):
+        self.assertEqual(sum(user['number'] for user in USERS),
+                         self.client.User.parallel_scan(number, workers=2, reduce=operator.add))
+        self.assertEqual(sum(user['number'] for user in USERS if user['number'] > 150),
+                         self.client.User.parallel_scan(number, workers=2, shard_by='number', reduce=operator.add,
+                                                        where={'number': {'$gt': 150}}))
+
+    def test_empty(self):
+        where = {'number': {'$lt': 0}}
+        self.assertEqual([], list(self.client.User.parallel_scan(number, workers=2, where=where)))
+        self.assertIsNone(self.client.User.parallel_scan(number, workers=2, shard_by='number', reduce=operator.add,
+                                                         where=where))
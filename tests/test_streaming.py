@@ -0,0 +1,52 @@
+import json
+import threading
+from unittest import TestCase, skipIf
+
+from six.moves.urllib.parse import parse_qs
+
+from potion_client import Client
+from potion_client.converter import ijson
+from tests.server import Handler, serve
+
+
+class UserHandler(Handler):
+    def get(self, url):
+        params = parse_qs(url.query)
+        page, per_page = int(params['page'][0]), int(params['per_page'][0])
+        users = [{"$uri": "/user/{}".format(i), "name": "user-{}".format(i)}
+                 for i in range((page - 1) * per_page + 1, min(page * per_page, 30) + 1)]
+        body = json.dumps(users).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Total-Count', '30')
+        self.end_headers()
+
+        # hold back the second half of later pages until the client has received the first item
+        self.wfile.write(body[:len(body) // 2])
+        self.wfile.flush()
+        if page > 1:
+            self.server.released.append(self.server.item_received.wait(5))
+        self.wfile.write(body[len(body) // 2:])
+
+
+@skipIf(ijson is None, 'ijson is required for streaming')
+class StreamingTestCase(TestCase):
+    def test_stream_pages(self):
+        server = serve(self, UserHandler, item_received=threading.Event(), released=[])
+        client = Client(server.url, stream_pages=True)
+        User = client.User
+
+        users = User.instances(per_page=20)
+        names = []
+        for user in users:
+            names.append(user.name)
+            if user.name == 'user-21':
+                self.assertFalse(server.item_received.is_set())
+                server.item_received.set()
+
+        self.assertEqual(["user-{}".format(i) for i in range(1, 31)], names)
+        self.assertEqual([True], server.released)
+        self.assertEqual(10, len(users._pages[2]))
+        self.assertIs(User('/user/25'), users[24])
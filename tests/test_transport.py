@@ -0,0 +1,76 @@
+import json
+from unittest import TestCase
+
+from requests import Response
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from potion_client import Client
+from potion_client.auth import HTTPBearerAuth
+from potion_client.transport import Transport, Urllib3Transport
+from tests.server import Handler, schemas, serve
+
+SCHEMAS = schemas()
+
+
+class InProcessTransport(Transport):
+    def __init__(self):
+        self.requests = []
+
+    def send(self, request, stream=False):
+        self.requests.append((request.method, request.url, request.params))
+
+        response = Response()
+        response.status_code = 200
+        response.url = request.url
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(SCHEMAS.get(urlparse(request.url).path) or [
+            {"$uri": "/user/1", "name": "foo"}
+        ]).encode('utf-8')
+        return response
+
+
+class UserHandler(Handler):
+    def get(self, url):
+        self.server.received.append((self.headers.get('Authorization'), parse_qs(url.query)))
+        self.respond([{"$uri": "/user/1", "name": "foo"}])
+
+    def do_POST(self):
+        self.respond(dict(self.read_json(), **{"$uri": "/user/2"}), 201)
+
+
+class TransportTestCase(TestCase):
+    def test_custom_transport(self):
+        transport = InProcessTransport()
+        client = Client('http://example.com', transport=transport)
+
+        self.assertEqual(['foo'], [user.name for user in client.User.instances(where={"name": "foo"})])
+        self.assertEqual(('GET', 'http://example.com/user', {
+            'page': '1',
+            'per_page': '20',
+            'where': '{"name": "foo"}'
+        }), transport.requests[-1])
+
+        with self.assertRaises(TypeError):
+            Client('http://example.com', transport=transport, auth=HTTPBearerAuth('token'))
+
+    def test_session_of_transport_without_one(self):
+        client = Client('http://example.com', fetch_schema=False, transport=Urllib3Transport())
+        self.assertIsNone(client.session)
+        with self.assertRaises(TypeError):
+            client.session = None
+
+    def test_urllib3_transport(self):
+        server = serve(self, UserHandler, received=[])
+        client = Client(server.url, transport=Urllib3Transport(auth=HTTPBearerAuth('token')))
+
+        users = client.User.instances(where={"name": "foo"})
+        self.assertEqual('foo', users[0].name)
+        self.assertEqual(('Bearer token', {
+            'page': ['1'],
+            'per_page': ['20'],
+            'where': ['{"name": "foo"}']
+        }), server.received[-1])
+
+        user = client.User.create(name='bar')
+        self.assertEqual(2, user.id)
+        self.assertEqual('bar', user.name)